@@ -16,38 +16,92 @@
 
 import calendar
 import hashlib
+import os
 import threading
 from io import BytesIO
 from typing import Optional
 
 from mapproxy.cache.tile import Tile
 from mapproxy.cache import path
-from mapproxy.cache.base import tile_buffer, TileCacheBase
+from mapproxy.cache.base import tile_buffer, TileCacheBase, tile_coord_in_bbox
 from mapproxy.image import ImageResult
-from mapproxy.util import async_
+from mapproxy.util.async_ import Executor
 from mapproxy.util.coverage import Coverage
 
 try:
+    import requests
     from azure.storage.blob import BlobServiceClient, ContentSettings
-    from azure.core.exceptions import AzureError
+    from azure.core.exceptions import AzureError, ResourceNotFoundError
+    from azure.core.pipeline.transport import RequestsTransport
 except ImportError:
     BlobServiceClient = None  # type: ignore
     ContentSettings = None  # type: ignore
     AzureError = None  # type: ignore
+    ResourceNotFoundError = None  # type: ignore
 
 import logging
 log = logging.getLogger('mapproxy.cache.azureblob')
 
 
+# max number of sub-requests of a blob batch request
+BATCH_SIZE = 256
+
+_container_clients: dict[tuple, object] = {}
+_container_clients_lock = threading.Lock()
+
+
+def container_client(connection_string, container_name, max_pool_connections=10, retries=None,
+                     connect_timeout=None, read_timeout=None):
+    """
+    Return a ContainerClient for the given options. The clients are
+    thread-safe and shared within each process, so that the connection
+    pool of the client is reused.
+
+    :param retries: maximum number of retries for failed requests
+    """
+    key = (os.getpid(), connection_string, container_name, max_pool_connections,
+           retries, connect_timeout, read_timeout)
+    client = _container_clients.get(key)
+    if client is not None:
+        return client
+
+    with _container_clients_lock:
+        client = _container_clients.get(key)
+        if client is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=max_pool_connections,
+                                                    pool_maxsize=max_pool_connections)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            transport_options = {}
+            if connect_timeout is not None:
+                transport_options['connection_timeout'] = connect_timeout
+            if read_timeout is not None:
+                transport_options['read_timeout'] = read_timeout
+            client_options = {}
+            if retries is not None:
+                client_options['retry_total'] = retries
+            client = (BlobServiceClient
+                      .from_connection_string(connection_string,
+                                              transport=RequestsTransport(session=session, **transport_options),
+                                              **client_options)
+                      .get_container_client(container_name))
+            _container_clients[key] = client
+    return client
+
+
 class AzureBlobConnectionError(Exception):
     pass
 
 
 class AzureBlobCache(TileCacheBase):
+    supports_tile_iteration = True
+    supports_metadata_on_load = True
 
     def __init__(self, base_path, file_ext, directory_layout='tms', container_name='mapproxy',
-                 _concurrent_writer=4, _concurrent_reader=4, connection_string=None,
-                 coverage: Optional[Coverage] = None):
+                 _concurrent_writer=None, _concurrent_reader=None, connection_string=None,
+                 coverage: Optional[Coverage] = None, max_pool_connections=10, retries=None,
+                 connect_timeout=None, read_timeout=None):
         super().__init__(coverage)
         if BlobServiceClient is None:
             raise ImportError("Azure Blob Cache requires 'azure-storage-blob' package")
@@ -57,22 +111,26 @@ class AzureBlobCache(TileCacheBase):
 
         self.connection_string = connection_string
         self.container_name = container_name
-        self._container_client_cache = threading.local()
+        self.max_pool_connections = max_pool_connections
+        self.retries = retries
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
 
         self.base_path = base_path
         self.file_ext = file_ext
-        self._concurrent_writer = _concurrent_writer
-        self._concurrent_reader = _concurrent_reader
+        # the pools are shared by all requests, use as many threads as connections
+        self._concurrent_writer = _concurrent_writer or max_pool_connections
+        self._concurrent_reader = _concurrent_reader or max_pool_connections
+        self._writer = Executor(self._concurrent_writer, name='mapproxy-azureblob-writer')
+        self._reader = Executor(self._concurrent_reader, name='mapproxy-azureblob-reader')
+        self.directory_layout = directory_layout
         self._tile_location, _ = path.location_funcs(layout=directory_layout)
 
     @property
     def container_client(self):
-        if not getattr(self._container_client_cache, 'client', None):
-            container_client = (BlobServiceClient
-                                .from_connection_string(self.connection_string)
-                                .get_container_client(self.container_name))
-            self._container_client_cache.client = container_client
-        return self._container_client_cache.client
+        return container_client(self.connection_string, self.container_name,
+                                max_pool_connections=self.max_pool_connections, retries=self.retries,
+                                connect_timeout=self.connect_timeout, read_timeout=self.read_timeout)
 
     def tile_key(self, tile):
         return self._tile_location(tile, self.base_path, self.file_ext).lstrip('/')
@@ -91,16 +149,39 @@ class AzureBlobCache(TileCacheBase):
         if tile.is_missing():
             key = self.tile_key(tile)
             blob = self.container_client.get_blob_client(key)
-            if not blob.exists():
-                return False
-            else:
+            try:
                 self._set_metadata(blob.get_blob_properties(), tile)
+            except ResourceNotFoundError:
+                return False
 
         return True
 
+    def is_cached_tiles(self, tiles, dimensions=None):
+        """
+        Check multiple tiles with a single ``list_blobs`` request for the
+        common key prefix of all tiles. Falls back to `is_cached` for each
+        tile if the prefix matches too many other blobs.
+        """
+        keys = {self.tile_key(t): t for t in tiles if t.is_missing()}
+        prefix = os.path.commonprefix(list(keys))
+        if len(keys) < 2 or not prefix:
+            return self._reader.map(lambda t: self.is_cached(t, dimensions=dimensions), tiles)
+
+        max_results = len(keys) * 16
+        found = set()
+        blobs = self.container_client.list_blobs(name_starts_with=prefix,
+                                                 results_per_page=min(max_results, 5000))
+        for i, blob in enumerate(blobs):
+            if i >= max_results:
+                return self._reader.map(lambda t: self.is_cached(t, dimensions=dimensions), tiles)
+            tile = keys.get(blob.name)
+            if tile is not None:
+                self._set_metadata(blob, tile)
+                found.add(blob.name)
+        return [not t.is_missing() or self.tile_key(t) in found for t in tiles]
+
     def load_tiles(self, tiles, with_metadata=True, dimensions=None):
-        p = async_.Pool(min(self._concurrent_reader, len(tiles)))
-        return all(p.map(self.load_tile, tiles))
+        return all(self._reader.map(self.load_tile, tiles))
 
     def load_tile(self, tile: Tile, with_metadata: bool = True, dimensions=None):
         if not tile.cacheable:
@@ -116,6 +197,10 @@ class AzureBlobCache(TileCacheBase):
             r = self.container_client.download_blob(key)
             self._set_metadata(r.properties, tile)
             tile.image_result = ImageResult(BytesIO(r.readall()))
+        except ResourceNotFoundError:
+            log.debug("AzureBlob:load_tile key not found: %s" % key)
+            tile.image_result = None
+            return False
         except AzureError as e:
             log.debug("AzureBlob:load_tile unable to load key: %s" % key, e)
             tile.image_result = None
@@ -129,9 +214,30 @@ class AzureBlobCache(TileCacheBase):
         log.debug('remove_tile, key: %s' % key)
         self.container_client.delete_blob(key)
 
+    def remove_tiles(self, tiles, dimensions=None):
+        keys = [self.tile_key(t) for t in tiles if t.coord is not None]
+        for i in range(0, len(keys), BATCH_SIZE):
+            batch = keys[i:i + BATCH_SIZE]
+            log.debug('remove_tiles, %d keys starting with: %s' % (len(batch), batch[0]))
+            # missing blobs are reported as failed sub-requests, ignore them
+            self.container_client.delete_blobs(*batch, raise_on_any_failure=False)
+
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        return self.iter_tile_metadata(level, bbox=bbox, dimensions=dimensions)
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        prefix = path.level_key_prefix(self.directory_layout, self.base_path, level)
+        for blob in self.container_client.list_blobs(name_starts_with=prefix):
+            coord = path.parse_tile_location(self.directory_layout, blob.name[len(prefix):].split('/'),
+                                             level, self.file_ext)
+            if coord is None or not tile_coord_in_bbox(coord, bbox):
+                continue
+            tile = Tile(coord)
+            self._set_metadata(blob, tile)
+            yield tile
+
     def store_tiles(self, tiles, dimensions=None):
-        p = async_.Pool(min(self._concurrent_writer, len(tiles)))
-        p.map(self.store_tile, tiles)
+        self._writer.map(self.store_tile, tiles)
 
     def store_tile(self, tile, dimensions=None):
         if tile.stored:
@@ -42,6 +42,22 @@ def tile_buffer(tile):
     tile.stored = True
 
 
+def tile_coord_in_bbox(coord, bbox):
+    """
+    Return ``True`` if the tile `coord` is within the tile coordinate `bbox`
+    ``(minx, miny, maxx, maxy)`` (inclusive). Always ``True`` if `bbox` is ``None``.
+
+    >>> tile_coord_in_bbox((2, 3, 4), (0, 0, 3, 3))
+    True
+    >>> tile_coord_in_bbox((2, 4, 4), (0, 0, 3, 3))
+    False
+    """
+    if bbox is None:
+        return True
+    x, y = coord[0], coord[1]
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+
 class TileCacheBase(ABC):
     """
     Base implementation of a tile cache.
@@ -49,6 +65,12 @@ class TileCacheBase(ABC):
 
     supports_timestamp = True
     supports_dimensions = False
+    # whether the cache can enumerate stored tiles with iter_tiles
+    supports_tile_iteration = False
+    # whether load_tile fetches the tile data together with its metadata
+    # in a single request, so that a failed load means the tile is missing
+    # and the timestamp of a loaded tile can be used to check expiration
+    supports_metadata_on_load = False
 
     def __init__(self, coverage: Optional[Coverage] = None) -> None:
         self.coverage = coverage
@@ -90,6 +112,13 @@ class TileCacheBase(ABC):
         """
         pass
 
+    def is_cached_tiles(self, tiles, dimensions=None):
+        """
+        Return a list with ``True`` for each of the `tiles` that is cached.
+        Caches can set the metadata of the cached tiles.
+        """
+        return [self.is_cached(tile, dimensions=dimensions) for tile in tiles]
+
     @abstractmethod
     def load_tile_metadata(self, tile, dimensions=None):
         """
@@ -98,6 +127,25 @@ class TileCacheBase(ABC):
         """
         pass
 
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        """
+        Yield a `Tile` (without image data) for each tile of `level` that
+        is stored in the cache. `bbox` limits the tiles to the tile coordinate
+        range ``(minx, miny, maxx, maxy)`` (inclusive).
+
+        Only available if ``supports_tile_iteration`` is ``True``.
+        The order of the tiles is undefined.
+        """
+        raise NotImplementedError('%s does not support tile iteration' % self.__class__.__name__)
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        """
+        Like `iter_tiles`, but with ``.timestamp`` and ``.size`` of each tile.
+        """
+        for tile in self.iter_tiles(level, bbox=bbox, dimensions=dimensions):
+            self.load_tile_metadata(tile, dimensions=dimensions)
+            yield tile
+
 
 # whether we immediately remove lock files or not
 REMOVE_ON_UNLOCK = True
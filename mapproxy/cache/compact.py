@@ -17,6 +17,7 @@ import contextlib
 import errno
 import hashlib
 import os
+import re
 import shutil
 import struct
 from abc import ABC, abstractmethod
@@ -26,7 +27,7 @@ from typing import Optional
 from mapproxy.grid import TileCoord
 from mapproxy.cache.tile import Tile
 from mapproxy.image import ImageResult
-from mapproxy.cache.base import TileCacheBase, tile_buffer
+from mapproxy.cache.base import TileCacheBase, tile_buffer, tile_coord_in_bbox
 from mapproxy.util.fs import ensure_directory, write_atomic
 from mapproxy.util.lock import FileLock
 
@@ -37,8 +38,12 @@ from mapproxy.util.coverage import Coverage
 log = logging.getLogger(__name__)
 
 
+BUNDLE_FILE_RE = re.compile(r'^R([0-9a-f]{4,})C([0-9a-f]{4,})\.bundle$', re.IGNORECASE)
+
+
 class CompactCacheBase(TileCacheBase, ABC):
     supports_timestamp = False
+    supports_tile_iteration = True
 
     @property
     @abstractmethod
@@ -147,6 +152,38 @@ class CompactCacheBase(TileCacheBase, ABC):
             return True
         return False
 
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        """
+        Yield all stored tiles of `level` by reading the index of each bundle.
+        The tiles include the ``.size``.
+        """
+        level_dir = os.path.join(self.cache_dir, 'L%02d' % level)
+        try:
+            with os.scandir(level_dir) as it:
+                names = sorted(entry.name for entry in it)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            match = BUNDLE_FILE_RE.match(name)
+            if not match:
+                continue
+            r, c = int(match.group(1), 16), int(match.group(2), 16)
+            if bbox is not None and (c + BUNDLEX_V1_GRID_WIDTH <= bbox[0] or c > bbox[2] or
+                                     r + BUNDLEX_V1_GRID_HEIGHT <= bbox[1] or r > bbox[3]):
+                continue
+            bundle = self.bundle_class(os.path.join(level_dir, name[:-len(BUNDLE_EXT)]), offset=(c, r))
+            for x, y, size in bundle.iter_tile_sizes():
+                coord = (c + x, r + y, level)
+                if tile_coord_in_bbox(coord, bbox):
+                    tile = Tile(coord)
+                    tile.size = size
+                    tile.timestamp = -1
+                    yield tile
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        return self.iter_tiles(level, bbox=bbox, dimensions=dimensions)
+
 
 BUNDLE_EXT = '.bundle'
 BUNDLEX_V1_EXT = '.bundlx'
@@ -256,6 +293,24 @@ class BundleV1:
 
         return True
 
+    def iter_tile_sizes(self):
+        """
+        Yield ``(x, y, size)`` for each stored tile, relative to the bundle.
+        """
+        with self.index().readonly() as idx:
+            if not idx:
+                return
+
+            with self.data().readonly() as bundle:
+                for y in range(BUNDLEX_V1_GRID_HEIGHT):
+                    for x in range(BUNDLEX_V1_GRID_WIDTH):
+                        offset = idx.tile_offset(x, y)
+                        if not offset:
+                            continue
+                        size = bundle.read_size(offset)
+                        if size:
+                            yield x, y, size
+
     def size(self):
         total_size = 0
 
@@ -669,6 +724,22 @@ class BundleV2:
 
         return True
 
+    def iter_tile_sizes(self):
+        """
+        Yield ``(x, y, size)`` for each stored tile, relative to the bundle.
+        """
+        with self._readonly() as fh:
+            if not fh:
+                return
+            fh.seek(BUNDLE_V2_HEADER_SIZE)
+            index = struct.unpack('<%dQ' % BUNDLE_V2_TILES, fh.read(BUNDLE_V2_INDEX_SIZE))
+
+        for i, val in enumerate(index):
+            # size is stored in the 24 most significant bits
+            size = val >> 40
+            if size:
+                yield i % BUNDLE_V2_GRID_WIDTH, i // BUNDLE_V2_GRID_WIDTH, size
+
     def size(self):
         total_size = 0
         with self._readonly() as fh:
@@ -21,6 +21,7 @@ import socket
 import time
 import hashlib
 import base64
+import uuid
 from io import BytesIO
 from threading import Lock
 from typing import Optional
@@ -49,7 +50,8 @@ class UnexpectedResponse(CacheBackendError):
 class CouchDBCache(TileCacheBase):
     def __init__(self, url, db_name,
                  file_ext, tile_grid, md_template=None,
-                 tile_id_template=None, coverage: Optional[Coverage] = None):
+                 tile_id_template=None, coverage: Optional[Coverage] = None,
+                 max_pool_connections=10):
         super().__init__(coverage)
 
         if requests is None:
@@ -62,11 +64,16 @@ class CouchDBCache(TileCacheBase):
         self.md_template = md_template
         self.couch_url = '%s/%s' % (url.rstrip('/'), db_name.lower())
         self.req_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_pool_connections)
+        self.req_session.mount('http://', adapter)
+        self.req_session.mount('https://', adapter)
         self.db_initialised = False
         self.app_init_db_lock = Lock()
         self.tile_id_template = tile_id_template
 
     def init_db(self):
+        if self.db_initialised:
+            return
         with self.app_init_db_lock:
             if self.db_initialised:
                 return
@@ -118,7 +125,11 @@ class CouchDBCache(TileCacheBase):
             return False
         raise SourceError('%r: %r' % (resp.status_code, resp.content))
 
-    def _tile_doc(self, tile):
+    def _tile_doc(self, tile, attachment=None):
+        """
+        Return the document for `tile`. Includes the tile data as base64
+        encoded attachment, unless `attachment` is given.
+        """
         tile_id = self.document_url(tile.coord, relative=True)
         if self.md_template:
             tile_doc = self.md_template.doc(tile, self.tile_grid)
@@ -126,19 +137,65 @@ class CouchDBCache(TileCacheBase):
             tile_doc = {}
         tile_doc['_id'] = tile_id
 
-        with tile_buffer(tile) as buf:
-            data = buf.read()
-        tile_doc['_attachments'] = {
-            'tile': {
+        if attachment is None:
+            with tile_buffer(tile) as buf:
+                data = buf.read()
+            attachment = {
                 'content_type': 'image/' + self.file_ext,
                 'data': codecs.decode(
                     base64.b64encode(data).replace(b'\n', b''),
                     'ascii',
                 ),
             }
-        }
+        tile_doc['_attachments'] = {'tile': attachment}
         return tile_id, tile_doc
 
+    def _store_multipart(self, tile):
+        """
+        PUT a single tile with the tile data as binary attachment
+        in a multipart/related request.
+        """
+        with tile_buffer(tile) as buf:
+            data = buf.read()
+        _tile_id, tile_doc = self._tile_doc(tile, attachment={
+            'content_type': 'image/' + self.file_ext,
+            'follows': True,
+            'length': len(data),
+        })
+        url = self.document_url(tile.coord)
+        boundary = uuid.uuid4().hex
+        self.init_db()
+        for _ in range(3):
+            body = b''.join([
+                b'--', boundary.encode('ascii'), b'\r\n',
+                b'Content-Type: application/json\r\n\r\n',
+                json.dumps(tile_doc).encode('utf-8'), b'\r\n',
+                b'--', boundary.encode('ascii'), b'\r\n\r\n',
+                data, b'\r\n',
+                b'--', boundary.encode('ascii'), b'--',
+            ])
+            resp = self.req_session.put(url, data=body,
+                                        headers={'Content-Type': 'multipart/related; boundary="%s"' % boundary})
+            if resp.status_code in (201, 202):
+                return True
+            if resp.status_code == 409 and '_rev' not in tile_doc:
+                # overwrite existing tile
+                rev_id = self._rev_id(url)
+                if rev_id is not None:
+                    tile_doc['_rev'] = rev_id
+                continue
+            break
+        raise UnexpectedResponse('got unexpected resp (%d) from CouchDB: %s' % (resp.status_code, resp.content))
+
+    def _rev_id(self, url):
+        """
+        Return the current revision of the document, or None if it does not exist.
+        """
+        resp = self.req_session.head(url)
+        if resp.status_code == 404:
+            return None
+        return resp.headers['etag'].strip('"')
+
     def _store_bulk(self, tiles):
         tile_docs = {}
         for tile in tiles:
@@ -196,7 +253,7 @@ class CouchDBCache(TileCacheBase):
         if tile.stored:
             return True
 
-        return self._store_bulk([tile])
+        return self._store_multipart(tile)
 
     def store_tiles(self, tiles, dimensions=None):
         tiles = [t for t in tiles if not t.stored]
@@ -209,10 +266,12 @@ class CouchDBCache(TileCacheBase):
         # is_cached loads metadata
         self.is_cached(tile, dimensions=None)
 
-    def load_tile(self, tile: Tile, with_metadata=False, dimensions=None) -> bool:
-        # bulk loading with load_tiles is not implemented, because
-        # CouchDB's /all_docs? does not include attachments
+    def _set_tile_from_doc(self, tile, doc):
+        tile_data = BytesIO(base64.b64decode(doc['_attachments']['tile']['data']))
+        tile.image_result = ImageResult(tile_data)
+        tile.timestamp = doc.get(self.md_template.timestamp_key)
 
+    def load_tile(self, tile: Tile, with_metadata=False, dimensions=None) -> bool:
         if tile.image_result or tile.coord is None:
             return True
         url = self.document_url(tile.coord) + '?attachments=true'
@@ -220,24 +279,53 @@ class CouchDBCache(TileCacheBase):
         resp = self.req_session.get(url, headers={'Accept': 'application/json'})
         if resp.status_code == 200:
             doc = json.loads(codecs.decode(resp.content, 'utf-8'))
-            tile_data = BytesIO(base64.b64decode(doc['_attachments']['tile']['data']))
-            tile.image_result = ImageResult(tile_data)
-            tile.timestamp = doc.get(self.md_template.timestamp_key)
+            self._set_tile_from_doc(tile, doc)
             return True
         return False
 
+    def load_tiles(self, tiles, with_metadata=False, dimensions=None):
+        """
+        Load all tiles with a single ``_all_docs`` request.
+        """
+        tiles_by_id = {}
+        for tile in tiles:
+            if tile.image_result or tile.coord is None:
+                continue
+            tiles_by_id[self.document_url(tile.coord, relative=True)] = tile
+
+        if len(tiles_by_id) <= 1:
+            return all(self.load_tile(tile) for tile in tiles_by_id.values())
+
+        self.init_db()
+        resp = self.req_session.post(self.couch_url + '/_all_docs',
+                                     params={'include_docs': 'true', 'attachments': 'true'},
+                                     data=json.dumps({'keys': list(tiles_by_id)}),
+                                     headers={'Content-type': 'application/json', 'Accept': 'application/json'})
+        if resp.status_code != 200:
+            raise UnexpectedResponse('got unexpected resp (%d) from CouchDB: %s' % (resp.status_code, resp.content))
+
+        loaded = 0
+        resp_doc = json.loads(codecs.decode(resp.content, 'utf-8'))
+        for row in resp_doc['rows']:
+            # missing and deleted tiles have no doc
+            doc = row.get('doc')
+            tile = tiles_by_id.get(row.get('key'))
+            if not doc or tile is None:
+                continue
+            self._set_tile_from_doc(tile, doc)
+            loaded += 1
+        return loaded == len(tiles_by_id)
+
     def remove_tile(self, tile, dimensions=None):
         if tile.coord is None:
             return True
         url = self.document_url(tile.coord)
-        resp = requests.head(url)
-        if resp.status_code == 404:
+        self.init_db()
+        rev_id = self._rev_id(url)
+        if rev_id is None:
             # already removed
             return True
-        rev_id = resp.headers['etag']
-        url += '?rev=' + rev_id.strip('"')
-        self.init_db()
-        resp = self.req_session.delete(url)
+        resp = self.req_session.delete(url, params={'rev': rev_id})
         if resp.status_code == 200:
             return True
         return False
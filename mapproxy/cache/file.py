@@ -19,10 +19,10 @@ import hashlib
 from typing import Optional
 
 from mapproxy.cache.tile import Tile
-from mapproxy.util.fs import ensure_directory, write_atomic
+from mapproxy.util.fs import DirectoryCache, supports_write_at, write_atomic, write_atomic_at
 from mapproxy.image import ImageResult, is_single_color_image
 from mapproxy.cache import path
-from mapproxy.cache.base import TileCacheBase, tile_buffer
+from mapproxy.cache.base import TileCacheBase, tile_buffer, tile_coord_in_bbox
 
 import logging
 
@@ -36,14 +36,17 @@ class FileCache(TileCacheBase):
     This class is responsible to store and load the actual tile data.
     """
     supports_dimensions = True
+    supports_tile_iteration = True
 
     def __init__(self, cache_dir, file_ext, directory_layout='tc',
                  link_single_color_images=False, coverage: Optional[Coverage] = None, image_opts=None,
-                 directory_permissions=None, file_permissions=None):
+                 directory_permissions=None, file_permissions=None, batch_writes=False):
         """
         :param cache_dir: the path where the tile will be stored
         :param file_ext: the file extension that will be appended to
             each tile (e.g. 'png')
+        :param batch_writes: write all tiles of `store_tiles` that are in
+            the same directory relative to a single directory file descriptor
         """
         super().__init__(coverage)
         md5 = hashlib.new('md5', cache_dir.encode('utf-8'), usedforsecurity=False)
@@ -54,6 +57,9 @@ class FileCache(TileCacheBase):
         self.link_single_color_images = link_single_color_images
         self.directory_permissions = directory_permissions
         self.file_permissions = file_permissions
+        self.batch_writes = batch_writes and supports_write_at
+        self.directory_layout = directory_layout
+        self._known_dirs = DirectoryCache(directory_permissions=directory_permissions)
         self._tile_location, self._level_location = path.location_funcs(layout=directory_layout)
         if self._level_location is None:
             # TODO: Maybe there is a better way than to overwrite the function with None
@@ -93,7 +99,7 @@ class FileCache(TileCacheBase):
         )
         location = os.path.join(*parts)
         if create_dir:
-            ensure_directory(location, self.directory_permissions)
+            self._known_dirs.ensure(location)
         return location
 
     def load_tile_metadata(self, tile, dimensions=None):
@@ -108,6 +114,28 @@ class FileCache(TileCacheBase):
             tile.timestamp = 0
             tile.size = 0
 
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        for coord, _entry in self._iter_tile_entries(level, bbox, dimensions):
+            yield Tile(coord)
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        for coord, entry in self._iter_tile_entries(level, bbox, dimensions):
+            tile = Tile(coord)
+            try:
+                # DirEntry caches the stat result from scandir where possible
+                stats = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            tile.timestamp = stats.st_mtime
+            tile.size = stats.st_size
+            yield tile
+
+    def _iter_tile_entries(self, level, bbox, dimensions):
+        for coord, entry in path.iter_tile_locations(self.directory_layout, self.cache_dir, self.file_ext,
+                                                     level, dimensions=dimensions):
+            if tile_coord_in_bbox(coord, bbox):
+                yield coord, entry
+
     def is_cached(self, tile, dimensions=None):
         """
         Returns ``True`` if the tile data is present.
@@ -152,10 +180,63 @@ class FileCache(TileCacheBase):
         `FileCache.tile_location`.
         """
         if tile.stored:
-            return
+            return True
+
+        tile_loc = self.tile_location(tile, dimensions=dimensions)
+        self._known_dirs.ensure(tile_loc)
+        try:
+            self._store_tile(tile, tile_loc)
+        except FileNotFoundError:
+            # directory was removed after we created it (e.g. by a cleanup)
+            self._known_dirs.forget(tile_loc)
+            self._known_dirs.ensure(tile_loc)
+            self._store_tile(tile, tile_loc)
+        return True
 
-        tile_loc = self.tile_location(tile, create_dir=True, dimensions=dimensions)
+    def store_tiles(self, tiles, dimensions=None):
+        """
+        Store multiple tiles. With `batch_writes`, tiles in the same
+        directory are written relative to a single open directory file
+        descriptor.
+        """
+        if not self.batch_writes or self.link_single_color_images:
+            return super().store_tiles(tiles, dimensions=dimensions)
+
+        tiles_by_dir = {}
+        for tile in tiles:
+            if tile.stored:
+                continue
+            tile_loc = self.tile_location(tile, dimensions=dimensions)
+            tiles_by_dir.setdefault(os.path.dirname(tile_loc), []).append(tile)
+
+        for dir_name, dir_tiles in tiles_by_dir.items():
+            if len(dir_tiles) == 1:
+                self.store_tile(dir_tiles[0], dimensions=dimensions)
+                continue
+            self._known_dirs.ensure(dir_tiles[0].location)
+            try:
+                dir_fd = os.open(dir_name, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+            except FileNotFoundError:
+                self._known_dirs.forget(dir_tiles[0].location)
+                self._known_dirs.ensure(dir_tiles[0].location)
+                dir_fd = os.open(dir_name, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+            try:
+                for tile in dir_tiles:
+                    self._store_at(tile, dir_fd)
+            finally:
+                os.close(dir_fd)
+        return True
+
+    def _store_at(self, tile: Tile, dir_fd):
+        assert tile.location is not None
+        name = os.path.basename(tile.location)
+        with tile_buffer(tile) as buf:
+            log.debug('writing %r to %s' % (tile.coord, tile.location))
+            write_atomic_at(dir_fd, name, buf.read())
+        if self.file_permissions:
+            os.chmod(name, int(self.file_permissions, base=8), dir_fd=dir_fd)
 
+    def _store_tile(self, tile: Tile, tile_loc):
         if self.link_single_color_images:
             assert tile.image_result is not None
             color = is_single_color_image(tile.image_result.as_image())
@@ -167,7 +248,8 @@ class FileCache(TileCacheBase):
             self._store(tile, tile_loc)
 
     def _store(self, tile: Tile, location):
-        if os.path.islink(location):
+        # only single color tiles are linked
+        if self.link_single_color_images and os.path.islink(location):
             os.unlink(location)
 
         with tile_buffer(tile) as buf:
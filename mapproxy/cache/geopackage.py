@@ -28,6 +28,7 @@ from typing import Optional
 from mapproxy.cache.tile import TileCollection
 from mapproxy.cache.tile import Tile
 from mapproxy.cache.base import TileCacheBase, tile_buffer, REMOVE_ON_UNLOCK
+from mapproxy.cache.mbtiles import tile_range_query
 from mapproxy.image import ImageResult
 from mapproxy.srs import get_epsg_num
 from mapproxy.util.fs import ensure_directory
@@ -40,6 +41,7 @@ log = logging.getLogger(__name__)
 
 class GeopackageCache(TileCacheBase):
     supports_timestamp = False
+    supports_tile_iteration = True
 
     def __init__(
             self, geopackage_file, tile_grid, table_name, with_timestamps=False, timeout=30, wal=False,
@@ -437,8 +439,34 @@ class GeopackageCache(TileCacheBase):
         else:
             self.load_tile(tile, dimensions=dimensions)
 
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        for row in self._iter_rows(level, bbox, with_metadata=False):
+            yield Tile((row[0], row[1], level))
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        for row in self._iter_rows(level, bbox, with_metadata=True):
+            tile = Tile((row[0], row[1], level))
+            tile.size = row[2]
+            tile.timestamp = -1
+            yield tile
+
+    def _iter_rows(self, level, bbox, with_metadata):
+        if not os.path.exists(self.geopackage_file):
+            return
+        columns = 'tile_column, tile_row'
+        if with_metadata:
+            columns += ', length(tile_data)'
+        stmt, args = tile_range_query(columns, self.table_name, level, bbox)
+        # separate connection, callers might use the cache while we iterate
+        db = self.uncached_db()
+        try:
+            yield from db.execute(stmt, args)
+        finally:
+            db.close()
+
 
 class GeopackageLevelCache(TileCacheBase):
+    supports_tile_iteration = True
 
     def __init__(self, geopackage_dir, tile_grid, table_name, timeout=30, wal=False,
                  coverage: Optional[Coverage] = None, directory_permissions=None, file_permissions=None):
@@ -505,7 +533,7 @@ class GeopackageLevelCache(TileCacheBase):
             res = self._get_level(level).store_tiles(tiles, dimensions=dimensions)
             if not res:
                 failed = True
-        return failed
+        return not failed
 
     def load_tile(self, tile, with_metadata=False, dimensions=None):
         if tile.image_result or tile.coord is None:
@@ -521,7 +549,7 @@ class GeopackageLevelCache(TileCacheBase):
             level = tile.coord[2]
             break
 
-        if not level:
+        if level is None:
             return True
 
         return self._get_level(level).load_tiles(tiles, with_metadata=with_metadata, dimensions=dimensions)
@@ -544,6 +572,25 @@ class GeopackageLevelCache(TileCacheBase):
     def load_tile_metadata(self, tile, dimensions=None):
         return self._get_level(tile.coord[2]).load_tile_metadata(tile, dimensions=dimensions)
 
+    def _existing_level(self, level):
+        """
+        Return the level cache, or ``None`` if no tiles for `level` were stored.
+        """
+        if level not in self._geopackage:
+            if not os.path.exists(os.path.join(self.cache_dir, '%s.gpkg' % level)):
+                return None
+        return self._get_level(level)
+
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        level_cache = self._existing_level(level)
+        if level_cache is not None:
+            yield from level_cache.iter_tiles(level, bbox=bbox, dimensions=dimensions)
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        level_cache = self._existing_level(level)
+        if level_cache is not None:
+            yield from level_cache.iter_tile_metadata(level, bbox=bbox, dimensions=dimensions)
+
 
 def is_close(a, b, rel_tol=1e-09, abs_tol=0.0):
     """
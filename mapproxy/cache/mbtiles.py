@@ -51,8 +51,26 @@ def sqlite_datetime_to_timestamp(datetime):
     return time.mktime(d)
 
 
+def tile_range_query(columns, table, level, bbox=None):
+    """
+    Return the SQL statement and arguments to select `columns` of all
+    tiles of `level` within the tile coordinate `bbox`.
+
+    >>> tile_range_query('tile_column', 'tiles', 3, (0, 1, 2, 3))
+    ('SELECT tile_column FROM [tiles] WHERE zoom_level = ? AND tile_column BETWEEN ? AND ? \
+AND tile_row BETWEEN ? AND ?', [3, 0, 2, 1, 3])
+    """
+    stmt = 'SELECT %s FROM [%s] WHERE zoom_level = ?' % (columns, table)
+    args = [level]
+    if bbox is not None:
+        stmt += ' AND tile_column BETWEEN ? AND ? AND tile_row BETWEEN ? AND ?'
+        args.extend([bbox[0], bbox[2], bbox[1], bbox[3]])
+    return stmt, args
+
+
 class MBTilesCache(TileCacheBase):
     supports_timestamp = False
+    supports_tile_iteration = True
 
     def __init__(self, mbtile_file, with_timestamps=False, timeout=30, wal=False, ttl=0,
                  coverage: Optional[Coverage] = None, directory_permissions=None, file_permissions=None):
@@ -320,9 +338,40 @@ class MBTilesCache(TileCacheBase):
         else:
             self.load_tile(tile, dimensions=dimensions)
 
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        for row in self._iter_rows(level, bbox, with_metadata=False):
+            yield Tile((row[0], row[1], level))
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        for row in self._iter_rows(level, bbox, with_metadata=True):
+            tile = Tile((row[0], row[1], level))
+            tile.size = row[2]
+            if self.supports_timestamp:
+                tile.timestamp = sqlite_datetime_to_timestamp(row[3])
+            else:
+                tile.timestamp = -1
+            yield tile
+
+    def _iter_rows(self, level, bbox, with_metadata):
+        if not os.path.exists(self.mbtile_file):
+            return
+        columns = 'tile_column, tile_row'
+        if with_metadata:
+            columns += ', length(tile_data)'
+            if self.supports_timestamp:
+                columns += ', last_modified'
+        stmt, args = tile_range_query(columns, 'tiles', level, bbox)
+        # separate connection, callers might use the cache while we iterate
+        db = sqlite3.connect(self.mbtile_file, self.timeout)
+        try:
+            yield from db.execute(stmt, args)
+        finally:
+            db.close()
+
 
 class MBTilesLevelCache(TileCacheBase):
     supports_timestamp = True
+    supports_tile_iteration = True
 
     def __init__(self, mbtiles_dir, timeout=30, wal=False, ttl=0, coverage: Optional[Coverage] = None,
                  directory_permissions=None, file_permissions=None):
@@ -387,7 +436,7 @@ class MBTilesLevelCache(TileCacheBase):
             res = self._get_level(level).store_tiles(tiles, dimensions=dimensions)
             if not res:
                 failed = True
-        return failed
+        return not failed
 
     def load_tile(self, tile, with_metadata=False, dimensions=None):
         if tile.image_result or tile.coord is None:
@@ -403,7 +452,7 @@ class MBTilesLevelCache(TileCacheBase):
             level = tile.coord[2]
             break
 
-        if not level:
+        if level is None:
             return True
 
         return self._get_level(level).load_tiles(tiles, with_metadata=with_metadata, dimensions=dimensions)
@@ -417,6 +466,25 @@ class MBTilesLevelCache(TileCacheBase):
     def load_tile_metadata(self, tile, dimensions=None):
         self.load_tile(tile, dimensions=dimensions)
 
+    def _existing_level(self, level):
+        """
+        Return the level cache, or ``None`` if no tiles for `level` were stored.
+        """
+        if level not in self._mbtiles:
+            if not os.path.exists(os.path.join(self.cache_dir, '%s.mbtiles' % level)):
+                return None
+        return self._get_level(level)
+
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        level_cache = self._existing_level(level)
+        if level_cache is not None:
+            yield from level_cache.iter_tiles(level, bbox=bbox, dimensions=dimensions)
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        level_cache = self._existing_level(level)
+        if level_cache is not None:
+            yield from level_cache.iter_tile_metadata(level, bbox=bbox, dimensions=dimensions)
+
     def remove_level_tiles_before(self, level, timestamp=None, remove_all=False):
         level_cache = self._get_level(level)
         if remove_all:
@@ -265,3 +265,218 @@ def tile_location_arcgiscache(tile, cache_dir, file_ext, create_dir=False, dimen
 
 def level_location_arcgiscache(z, cache_dir, dimensions=None):
     return level_location('L%02d' % z, cache_dir=cache_dir, dimensions=dimensions)
+
+
+# number of path elements below the level directory for each layout
+_layout_depth = {
+    'tc': 6,
+    'mp': 4,
+    'tms': 2,
+    'reverse_tms': 3,
+    'quadkey': 1,
+    'arcgis': 2,
+}
+
+
+def level_dir_part(layout, level, dimensions=None):
+    """
+    Return the path (relative to the cache directory) that contains all
+    tiles of `level`. Tiles of other levels are also stored in this path
+    for layouts without level directories (``reverse_tms`` and ``quadkey``).
+
+    >>> level_dir_part('tc', 2)
+    '02'
+    >>> level_dir_part('tms', 2)
+    '2'
+    >>> level_dir_part('arcgis', 2)
+    'L02'
+    >>> level_dir_part('quadkey', 2)
+    ''
+    """
+    if layout == 'arcgis':
+        return 'L%02d' % level
+    if layout == 'quadkey':
+        return ''
+    dim_path = dimensions_part(dimensions)
+    if layout in ('tc', 'mp'):
+        return os.path.join(dim_path, level_part(level))
+    if layout == 'tms':
+        return os.path.join(dim_path, str(level))
+    if layout == 'reverse_tms':
+        return dim_path
+    raise ValueError('unknown directory_layout "%s"' % layout)
+
+
+def level_key_prefix(layout, base_path, level):
+    """
+    Return the common key prefix of all tiles of `level` for object
+    storages. See `level_dir_part`.
+
+    >>> level_key_prefix('tms', '/mapproxy/osm', 2)
+    'mapproxy/osm/2/'
+    >>> level_key_prefix('quadkey', 'osm', 2)
+    'osm/'
+    """
+    return os.path.join(base_path, level_dir_part(layout, level), '').lstrip('/')
+
+
+def parse_tile_location(layout, parts, level, file_ext):
+    """
+    Return the tile coordinate for the path elements `parts` (relative
+    to the `level_dir_part`), or ``None`` if `parts` is not a tile of `level`.
+
+    >>> parse_tile_location('tc', ['000', '000', '003', '000', '000', '004.png'], 2, 'png')
+    (3, 4, 2)
+    >>> parse_tile_location('mp', ['1234', '5678', '9876', '5432.png'], 22, 'png')
+    (12345678, 98765432, 22)
+    >>> parse_tile_location('tms', ['3', '4.png'], 2, 'png')
+    (3, 4, 2)
+    >>> parse_tile_location('reverse_tms', ['4', '3', '2.png'], 2, 'png')
+    (3, 4, 2)
+    >>> parse_tile_location('reverse_tms', ['4', '3', '1.png'], 2, 'png')
+    >>> parse_tile_location('quadkey', ['11.png'], 2, 'png')
+    (3, 0, 2)
+    >>> parse_tile_location('arcgis', ['R05397fb1', 'C0012d687.png'], 9, 'png')
+    (1234567, 87654321, 9)
+    >>> parse_tile_location('tms', ['3', '4.png.tmp-1234'], 2, 'png')
+    """
+    if len(parts) != _layout_depth[layout]:
+        return None
+    ext = '.' + file_ext
+    if not parts[-1].endswith(ext):
+        return None
+    parts = parts[:-1] + [parts[-1][:-len(ext)]]
+
+    try:
+        if layout == 'tc':
+            x = int(parts[0]) * 1000000 + int(parts[1]) * 1000 + int(parts[2])
+            y = int(parts[3]) * 1000000 + int(parts[4]) * 1000 + int(parts[5])
+        elif layout == 'mp':
+            x = int(parts[0]) * 10000 + int(parts[1])
+            y = int(parts[2]) * 10000 + int(parts[3])
+        elif layout == 'tms':
+            x, y = int(parts[0]), int(parts[1])
+        elif layout == 'reverse_tms':
+            if int(parts[2]) != level:
+                return None
+            y, x = int(parts[0]), int(parts[1])
+        elif layout == 'quadkey':
+            return quadkey_to_tile_coord(parts[0], level)
+        elif layout == 'arcgis':
+            if parts[0][:1] != 'R' or parts[1][:1] != 'C':
+                return None
+            y, x = int(parts[0][1:], 16), int(parts[1][1:], 16)
+        else:
+            raise ValueError('unknown directory_layout "%s"' % layout)
+    except ValueError:
+        return None
+    return x, y, level
+
+
+# (axis, factor) of the directory elements below the level directory
+_layout_dir_digits = {
+    'tc': (('x', 1000000), ('x', 1000), ('x', 1), ('y', 1000000), ('y', 1000)),
+    'mp': (('x', 10000), ('x', 1), ('y', 10000)),
+    'tms': (('x', 1), ),
+    'arcgis': (('y', 1), ),
+}
+
+
+def location_tile_range(layout, parts):
+    """
+    Return the range of tile coordinates ``(minx, miny, maxx, maxy)`` that
+    are stored below the directory path elements `parts` (relative to the
+    `level_dir_part`). Unbounded values are ``None``. Returns ``None`` if
+    `parts` is not a tile directory of `layout`.
+
+    >>> location_tile_range('tc', [])
+    (None, None, None, None)
+    >>> location_tile_range('tc', ['000', '001'])
+    (1000, None, 1999, None)
+    >>> location_tile_range('tc', ['000', '001', '002', '003'])
+    (1002, 3000000, 1002, 3999999)
+    >>> location_tile_range('mp', ['0001', '0002', '0003'])
+    (10002, 30000, 10002, 39999)
+    >>> location_tile_range('tms', ['5'])
+    (5, None, 5, None)
+    >>> location_tile_range('arcgis', ['R0000000a'])
+    (None, 10, None, 10)
+    >>> location_tile_range('tms', ['foo'])
+    """
+    digits = _layout_dir_digits.get(layout, ())
+    if len(parts) > len(digits):
+        return None
+    values = {'x': [0, None], 'y': [0, None]}
+    try:
+        for part, (axis, factor) in zip(parts, digits):
+            if layout == 'arcgis':
+                if part[:1] != 'R':
+                    return None
+                value = int(part[1:], 16)
+            else:
+                value = int(part)
+            values[axis][0] += value * factor
+            values[axis][1] = factor
+    except ValueError:
+        return None
+
+    (minx, fx), (miny, fy) = values['x'], values['y']
+    if fx is None:
+        minx = maxx = None
+    else:
+        maxx = minx + fx - 1
+    if fy is None:
+        miny = maxy = None
+    else:
+        maxy = miny + fy - 1
+    return minx, miny, maxx, maxy
+
+
+def quadkey_to_tile_coord(quadkey, level):
+    """
+    Return the tile coordinate for `quadkey`, or ``None`` if `quadkey` is
+    not a valid quadkey for `level`. Inverse of `tile_location_quadkey`.
+
+    >>> quadkey_to_tile_coord('11', 2)
+    (3, 0, 2)
+    >>> quadkey_to_tile_coord('', 0)
+    (0, 0, 0)
+    >>> quadkey_to_tile_coord('14', 2)
+    """
+    if len(quadkey) != level:
+        return None
+    x = y = 0
+    for digit in quadkey:
+        if digit not in '0123':
+            return None
+        digit = int(digit)
+        x = (x << 1) | (digit & 1)
+        y = (y << 1) | (digit >> 1)
+    return x, y, level
+
+
+def iter_tile_locations(layout, cache_dir, file_ext, level, dimensions=None):
+    """
+    Yield ``(tile_coord, entry)`` for each stored tile of `level`, where
+    `entry` is the ``os.DirEntry`` of the tile file.
+    """
+    level_dir = os.path.join(cache_dir, level_dir_part(layout, level, dimensions))
+    depth = _layout_depth[layout]
+
+    def walk(directory, parts):
+        try:
+            it = os.scandir(directory)
+        except FileNotFoundError:
+            return
+        with it:
+            entries = list(it)
+        for entry in entries:
+            if len(parts) + 1 < depth:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from walk(entry.path, parts + [entry.name])
+            elif entry.is_file():
+                coord = parse_tile_location(layout, parts + [entry.name], level, file_ext)
+                if coord is not None:
+                    yield coord, entry
+
+    return walk(level_dir, [])
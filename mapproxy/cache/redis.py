@@ -26,6 +26,7 @@ from mapproxy.image import ImageResult
 from mapproxy.cache.base import (
     TileCacheBase,
     tile_buffer,
+    tile_coord_in_bbox,
 )
 from mapproxy.util.coverage import Coverage
 
@@ -40,6 +41,8 @@ log = logging.getLogger(__name__)
 
 
 class RedisCache(TileCacheBase):
+    supports_tile_iteration = True
+
     def __init__(
             self, host, port, prefix, ttl=0, db=0, username=None, password=None, coverage: Optional[Coverage] = None,
             ssl_certfile=None, ssl_keyfile=None, ssl_ca_certs=None):
@@ -156,3 +159,29 @@ class RedisCache(TileCacheBase):
         key = self._key(tile)
         self.r.delete(key)
         return True
+
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        key_prefix = self.prefix + '-%d-' % level
+        match = _escape_glob(key_prefix) + '*'
+        for key in self.r.scan_iter(match=match, count=1000):
+            if isinstance(key, bytes):
+                key = key.decode('utf-8')
+            try:
+                x, y = map(int, key[len(key_prefix):].split('-'))
+            except ValueError:
+                continue
+            coord = (x, y, level)
+            if tile_coord_in_bbox(coord, bbox):
+                yield Tile(coord)
+
+
+def _escape_glob(pattern):
+    """
+    Escape special characters for Redis glob-style patterns.
+
+    >>> print(_escape_glob('tiles[1]-*?'))
+    tiles\\[1\\]-\\*\\?
+    """
+    for c in '\\[]*?':
+        pattern = pattern.replace(c, '\\' + c)
+    return pattern
@@ -16,16 +16,18 @@
 
 import calendar
 import hashlib
+import os
 import sys
 import threading
+from email.utils import parsedate_to_datetime
 from typing import Optional
 
 from mapproxy.cache.tile import TileCollection
 from mapproxy.cache.tile import Tile
 from mapproxy.image import ImageResult
 from mapproxy.cache import path
-from mapproxy.cache.base import tile_buffer, TileCacheBase
-from mapproxy.util import async_
+from mapproxy.cache.base import tile_buffer, TileCacheBase, tile_coord_in_bbox
+from mapproxy.util.async_ import Executor
 from mapproxy.util.py import reraise_exception
 from urllib import request as urllib2
 
@@ -42,15 +44,41 @@ import logging
 log = logging.getLogger('mapproxy.cache.s3')
 
 
-_s3_sessions_cache = threading.local()
-
-
-def s3_session(profile_name=None):
-    if not hasattr(_s3_sessions_cache, 'sessions'):
-        _s3_sessions_cache.sessions = {}
-    if profile_name not in _s3_sessions_cache.sessions:
-        _s3_sessions_cache.sessions[profile_name] = boto3.session.Session(profile_name=profile_name)
-    return _s3_sessions_cache.sessions[profile_name]
+_s3_clients: dict[tuple, object] = {}
+_s3_clients_lock = threading.Lock()
+
+
+def s3_client(profile_name=None, region_name=None, endpoint_url=None, max_pool_connections=10,
+              retries=None, connect_timeout=None, read_timeout=None):
+    """
+    Return an S3 client for the given options. boto3 clients are
+    thread-safe and the clients are shared within each process, so that
+    the connection pool of the client is reused.
+
+    :param retries: maximum number of retries for failed requests
+    """
+    key = (os.getpid(), profile_name, region_name, endpoint_url, max_pool_connections,
+           retries, connect_timeout, read_timeout)
+    client = _s3_clients.get(key)
+    if client is not None:
+        return client
+
+    with _s3_clients_lock:
+        client = _s3_clients.get(key)
+        if client is None:
+            config = {'max_pool_connections': max_pool_connections}
+            if retries is not None:
+                config['retries'] = {'max_attempts': retries, 'mode': 'standard'}
+            if connect_timeout is not None:
+                config['connect_timeout'] = connect_timeout
+            if read_timeout is not None:
+                config['read_timeout'] = read_timeout
+            # sessions are not thread-safe, create one for each client
+            session = boto3.session.Session(profile_name=profile_name)
+            client = session.client("s3", region_name=region_name, endpoint_url=endpoint_url,
+                                    config=botocore.config.Config(**config))
+            _s3_clients[key] = client
+    return client
 
 
 class S3ConnectionError(Exception):
@@ -58,11 +86,14 @@ class S3ConnectionError(Exception):
 
 
 class S3Cache(TileCacheBase):
+    supports_tile_iteration = True
+    supports_metadata_on_load = True
 
     def __init__(self, base_path, file_ext, directory_layout='tms',
                  bucket_name='mapproxy', profile_name=None, region_name=None, endpoint_url=None,
-                 _concurrent_writer=4, access_control_list=None, coverage: Optional[Coverage] = None,
-                 use_http_get=False):
+                 _concurrent_writer=None, access_control_list=None, coverage: Optional[Coverage] = None,
+                 use_http_get=False, max_pool_connections=10, retries=None, connect_timeout=None,
+                 read_timeout=None):
         super().__init__(coverage)
         md5 = hashlib.new('md5', base_path.encode('utf-8') + bucket_name.encode('utf-8'), usedforsecurity=False)
         self.lock_cache_id = md5.hexdigest()
@@ -72,6 +103,10 @@ class S3Cache(TileCacheBase):
         self.endpoint_url = endpoint_url
         self.access_control_list = access_control_list
         self.use_http_get = use_http_get
+        self.max_pool_connections = max_pool_connections
+        self.retries = retries
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
 
         try:
             self.bucket = self.conn().head_bucket(Bucket=bucket_name)
@@ -88,8 +123,11 @@ class S3Cache(TileCacheBase):
 
         self.base_path = base_path
         self.file_ext = file_ext
-        self._concurrent_writer = _concurrent_writer
+        # the pool is shared by all requests, use as many threads as connections
+        self._concurrent_writer = _concurrent_writer or max_pool_connections
+        self._executor = Executor(self._concurrent_writer, name='mapproxy-s3')
 
+        self.directory_layout = directory_layout
         self._tile_location, _ = path.location_funcs(layout=directory_layout)
 
     def get_bucket_url(self, tile):
@@ -103,8 +141,9 @@ class S3Cache(TileCacheBase):
             raise ImportError("S3 Cache requires 'boto3' package.")
 
         try:
-            return s3_session(self.profile_name).client(
-                "s3", region_name=self.region_name, endpoint_url=self.endpoint_url)
+            return s3_client(self.profile_name, region_name=self.region_name, endpoint_url=self.endpoint_url,
+                             max_pool_connections=self.max_pool_connections, retries=self.retries,
+                             connect_timeout=self.connect_timeout, read_timeout=self.read_timeout)
         except Exception as e:
             raise S3ConnectionError('Error during connection %s' % e)
 
@@ -119,15 +158,23 @@ class S3Cache(TileCacheBase):
         if 'ContentLength' in response:
             tile.size = response['ContentLength']
 
+    def _set_http_metadata(self, headers, tile):
+        last_modified = headers.get('Last-Modified')
+        if last_modified:
+            tile.timestamp = calendar.timegm(parsedate_to_datetime(last_modified).timetuple())
+        content_length = headers.get('Content-Length')
+        if content_length:
+            tile.size = int(content_length)
+
     def is_cached(self, tile: Tile, dimensions=None) -> bool:
         if tile.is_missing():
             if self.use_http_get:
                 try:
                     req = urllib2.Request(self.get_bucket_url(tile))
                     response = urllib2.urlopen(req)
-                    self._set_metadata(response.info(), tile)
+                    self._set_http_metadata(response.info(), tile)
                 except urllib2.HTTPError as e:
-                    if e.code == 403:
+                    if e.code in (403, 404):
                         return False
                     raise
             else:
@@ -143,8 +190,7 @@ class S3Cache(TileCacheBase):
         return True
 
     def load_tiles(self, tiles: TileCollection, with_metadata=True, dimensions=None) -> bool:
-        p = async_.Pool(min(4, len(tiles)))
-        return all(p.map(self.load_tile, tiles))
+        return all(self._executor.map(self.load_tile, tiles))
 
     def load_tile(self, tile: Tile, with_metadata=True, dimensions=None) -> bool:
         if not tile.is_missing():
@@ -156,9 +202,12 @@ class S3Cache(TileCacheBase):
         if self.use_http_get:
             try:
                 req = urllib2.Request(self.get_bucket_url(tile))
-                tile.image_result = ImageResult(urllib2.urlopen(req))
+                response = urllib2.urlopen(req)
+                self._set_http_metadata(response.info(), tile)
+                tile.image_result = ImageResult(response)
             except urllib2.HTTPError as e:
-                if e.code == 403:
+                # public buckets respond with 403 for missing keys
+                if e.code in (403, 404):
                     return False
                 raise
         else:
@@ -180,9 +229,25 @@ class S3Cache(TileCacheBase):
         log.debug('remove_tile, key: %s' % key)
         self.conn().delete_object(Bucket=self.bucket_name, Key=key)
 
+    def iter_tiles(self, level, bbox=None, dimensions=None):
+        return self.iter_tile_metadata(level, bbox=bbox, dimensions=dimensions)
+
+    def iter_tile_metadata(self, level, bbox=None, dimensions=None):
+        prefix = path.level_key_prefix(self.directory_layout, self.base_path, level)
+        paginator = self.conn().get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                coord = path.parse_tile_location(self.directory_layout, obj['Key'][len(prefix):].split('/'),
+                                                 level, self.file_ext)
+                if coord is None or not tile_coord_in_bbox(coord, bbox):
+                    continue
+                tile = Tile(coord)
+                tile.timestamp = calendar.timegm(obj['LastModified'].timetuple())
+                tile.size = obj['Size']
+                yield tile
+
     def store_tiles(self, tiles, dimensions=None):
-        p = async_.Pool(min(self._concurrent_writer, len(tiles)))
-        p.map(self.store_tile, tiles)
+        self._executor.map(self.store_tile, tiles)
 
     def store_tile(self, tile, dimensions=None):
         if tile.stored:
@@ -170,6 +170,16 @@ class TileCollection(object):
     def __iter__(self):
         return iter(self.tiles)
 
+    def filtered(self, func) -> 'TileCollection':
+        """
+        Return a new collection with all tiles for which `func` returns ``True``.
+        The tiles are not copied.
+        """
+        collection = TileCollection([])
+        collection.tiles = [t for t in self.tiles if func(t)]
+        collection.tiles_dict = {t.coord: t for t in collection.tiles}
+        return collection
+
     @property
     def empty(self):
         """
@@ -1,18 +1,19 @@
 import sys
+import threading
 from typing import Optional, Callable, TypeVar, Union, TYPE_CHECKING
 
 from mapproxy.cache.tile import TileCollection
 from mapproxy.grid import TileCoord
 from mapproxy.grid.meta_grid import MetaTile
 from mapproxy.cache.tile import Tile
-from mapproxy.image import BaseImageResult
+from mapproxy.image import BaseImageResult, BlankImageResult, ImageResult
 from mapproxy.image.merge import merge_images
 from mapproxy.image.tile import TileSplitter
 from mapproxy.layer import BlankImageError
 from mapproxy.layer.map_layer import MapLayer
 from mapproxy.query import MapQuery
 from mapproxy.source import SourceError
-from mapproxy.util import async_
+from mapproxy.util import async_, tracing
 from mapproxy.util.coverage import Coverage
 from mapproxy.util.py import reraise_exception, reraise
 if TYPE_CHECKING:
@@ -39,6 +40,20 @@ class TileCreator:
         """
         return self.tile_mgr.is_cached(tile, dimensions=dimensions)
 
+    def _load_if_cached(self, tile: Tile, dimensions=None) -> bool:
+        """
+        Load the tile if it is cached and not expired.
+        Return False if the tile needs to be created.
+        """
+        if getattr(self.cache, 'supports_metadata_on_load', False):
+            # a single request instead of is_cached followed by load_tile
+            self.cache.load_tile(tile, with_metadata=True, dimensions=dimensions)
+            return not self.tile_mgr._is_tile_missing(tile, cache_only=False, dimensions=dimensions)
+        if self.is_cached(tile, dimensions=dimensions):
+            self.cache.load_tile(tile)
+            return True
+        return False
+
     def is_stale(self, tile: Tile) -> bool:
         """
         Return True if the tile exists in cache and is expired.
@@ -90,7 +105,7 @@ class TileCreator:
         query = MapQuery(tile_bbox, self.grid.tile_size, self.grid.srs,
                          self.tile_mgr.request_format, dimensions=self.dimensions)
         with self.tile_mgr.lock(tile):
-            if not self.is_cached(tile, dimensions=dimensions):
+            if not self._load_if_cached(tile, dimensions=dimensions):
                 image_result = None
                 try:
                     image_result = self._query_sources(query)
@@ -116,8 +131,6 @@ class TileCreator:
                 tile = self.tile_mgr.apply_tile_filter(tile)
                 if image_result.cacheable:
                     self.cache.store_tile(tile)
-            else:
-                self.cache.load_tile(tile)
         return [tile]
 
     def _query_sources(self, query: MapQuery) -> Optional[BaseImageResult]:
@@ -133,13 +146,13 @@ class TileCreator:
                      self.sources[0].coverage.clip and
                      self.sources[0].coverage.intersects(query.bbox, query.srs))):
             try:
-                return self.sources[0].get_map(query)
+                return self._source_get_map(self.sources[0], query)
             except BlankImageError:
                 return None
 
         def get_map_from_source(source: MapLayer) -> tuple[Optional[BaseImageResult], Optional[Coverage]]:
             try:
-                img = source.get_map(query)
+                img = self._source_get_map(source, query)
             except BlankImageError:
                 return None, None
             else:
@@ -150,8 +163,13 @@ class TileCreator:
             if layer[0] is not None:
                 layers.append(layer)
 
-        return merge_images(layers, size=query.size, bbox=query.bbox, bbox_srs=query.srs,
-                            image_opts=self.tile_mgr.image_opts, merger=self.image_merger)
+        with tracing.span('mapproxy.merge', cache=self.tile_mgr.identifier, layers=len(layers)):
+            return merge_images(layers, size=query.size, bbox=query.bbox, bbox_srs=query.srs,
+                                image_opts=self.tile_mgr.image_opts, merger=self.image_merger)
+
+    def _source_get_map(self, source: MapLayer, query: MapQuery) -> BaseImageResult:
+        with tracing.span('mapproxy.get_map', cache=self.tile_mgr.identifier, source=type(source).__name__):
+            return source.get_map(query)
 
     def _create_meta_tiles(self, meta_tiles: list[MetaTile]) -> list[Tile]:
         if self.bulk_meta_tiles:
@@ -160,14 +178,31 @@ class TileCreator:
                 created_tiles.extend(self._create_bulk_meta_tile(meta_tile))
             return created_tiles
 
+        create_meta_tile = self._create_meta_tile
+        coalescer = self.tile_mgr.meta_tile_coalescer
+        if coalescer is not None:
+            create_meta_tile = self._create_coalesced_meta_tile
+
         if self.tile_mgr.concurrent_tile_creators > 1 and len(meta_tiles) > 1:
-            return self._create_threaded(self._create_meta_tile, meta_tiles)
+            if coalescer is not None:
+                coalescer.announce(len(meta_tiles))
+            return self._create_threaded(create_meta_tile, meta_tiles)
 
         created_tiles = []
         for meta_tile in meta_tiles:
-            created_tiles.extend(self._create_meta_tile(meta_tile))
+            if coalescer is not None:
+                coalescer.announce(1)
+            created_tiles.extend(create_meta_tile(meta_tile))
         return created_tiles
 
+    def _create_coalesced_meta_tile(self, meta_tile: MetaTile) -> list[Tile]:
+        coalescer = self.tile_mgr.meta_tile_coalescer
+        assert coalescer is not None
+        try:
+            return self._create_meta_tile(meta_tile)
+        finally:
+            coalescer.finished()
+
     def _create_meta_tile(self, meta_tile: MetaTile) -> list[Tile]:
         """
         _create_meta_tile queries a single meta tile and splits it into
@@ -179,9 +214,21 @@ class TileCreator:
         main_tile = Tile(meta_tile.main_tile_coord)
         with self.tile_mgr.lock(main_tile):
             if not all(self.is_cached(t, dimensions=self.dimensions) for t in meta_tile.tiles if t is not None):
-                meta_tile_image = self._query_sources(query)
+                coalescer = self.tile_mgr.meta_tile_coalescer
+                try:
+                    if coalescer is not None:
+                        meta_tile_image = coalescer.query(self, meta_tile, query)
+                    else:
+                        meta_tile_image = self._query_sources(query)
+                # if source is not available, try to serve tiles in cache
+                except SourceError as e:
+                    if self._is_meta_tile_stale(meta_tile):
+                        return self._load_meta_tile(meta_tile)
+                    raise reraise_exception(e, sys.exc_info())
                 if not meta_tile_image:
                     return []
+                if meta_tile_image.authorize_stale and self._is_meta_tile_stale(meta_tile):
+                    return self._load_meta_tile(meta_tile)
                 splitted_tiles = split_meta_tiles(meta_tile_image, meta_tile.tile_patterns,
                                                   tile_size, self.tile_mgr.image_opts)
                 splitted_tiles = [self.tile_mgr.apply_tile_filter(t) for t in splitted_tiles]
@@ -189,6 +236,18 @@ class TileCreator:
                     self.cache.store_tiles(splitted_tiles, dimensions=self.dimensions)
                 return splitted_tiles
             # else
+        return self._load_meta_tile(meta_tile)
+
+    def _is_meta_tile_stale(self, meta_tile: MetaTile) -> bool:
+        """
+        Return True if all tiles of the meta tile exist in cache.
+        Called for meta tiles that need to be created, i.e. at least
+        one of the tiles is expired.
+        """
+        return all(self.cache.is_cached(Tile(t), dimensions=self.dimensions)
+                   for t in meta_tile.tiles if t is not None)
+
+    def _load_meta_tile(self, meta_tile: MetaTile) -> list[Tile]:
         tiles = TileCollection(meta_tile.tiles)
         self.cache.load_tiles(tiles, dimensions=self.dimensions)
         return tiles.tiles
@@ -249,6 +308,169 @@ class TileCreator:
         return tile_collection
 
 
+class _PendingMetaTile:
+    def __init__(self, meta_tile: MetaTile, query: MapQuery):
+        self.meta_tile = meta_tile
+        self.query = query
+        self.done = threading.Event()
+        # set if this thread should query the sources for this run of meta tiles
+        self.run: Optional[list['_PendingMetaTile']] = None
+        self.result: Optional[BaseImageResult] = None
+        self.exc_info: Optional[tuple] = None
+
+
+class MetaTileCoalescer:
+    """
+    Combines horizontally adjacent meta tiles that are created concurrently
+    into a single source request.
+
+    Meta tiles are `announce`d before they are created and are `finished`
+    afterwards. The first thread that queries a meta tile waits up to `delay`
+    seconds for other meta tiles of the same row, but only as long as other
+    announced meta tiles did not reach the query yet. Each run of adjacent
+    meta tiles is then requested with a single query of up to `max_pixels`
+    and the result is cropped back into one image per meta tile.
+    """
+
+    def __init__(self, max_meta_tiles: int, max_pixels: int = 4000 * 4000, delay: float = 0.05):
+        self.max_meta_tiles = max_meta_tiles
+        self.max_pixels = max_pixels
+        self.delay = delay
+        self._cond = threading.Condition()
+        # number of announced meta tiles and of meta tiles that reached the query
+        self._active = 0
+        self._querying = 0
+        self._pending: dict[tuple, list[_PendingMetaTile]] = {}
+
+    def announce(self, num: int) -> None:
+        with self._cond:
+            self._active += num
+
+    def finished(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @staticmethod
+    def _key(meta_tile: MetaTile, query: MapQuery) -> tuple:
+        bbox = meta_tile.bbox
+        res = (bbox[2] - bbox[0]) / meta_tile.size[0]
+        dimensions = repr(sorted((query.dimensions or {}).items()))
+        return (bbox[1], bbox[3], meta_tile.size[1], round(res, 9), query.format, dimensions)
+
+    def query(self, creator: TileCreator, meta_tile: MetaTile, query: MapQuery) -> Optional[BaseImageResult]:
+        """
+        Return the image for `meta_tile`, possibly queried together with
+        other meta tiles.
+        """
+        entry = _PendingMetaTile(meta_tile, query)
+        key = self._key(meta_tile, query)
+        with self._cond:
+            self._querying += 1
+            self._cond.notify_all()
+            group = self._pending.get(key)
+            leader = group is None
+            if group is None:
+                group = self._pending[key] = [entry]
+            else:
+                group.append(entry)
+
+        try:
+            return self._query(creator, entry, key, group, leader)
+        finally:
+            with self._cond:
+                self._querying -= 1
+
+    def _query(self, creator: TileCreator, entry: _PendingMetaTile, key: tuple,
+               group: list[_PendingMetaTile], leader: bool) -> Optional[BaseImageResult]:
+        if leader:
+            with self._cond:
+                # wait as long as other meta tiles can join the group
+                self._cond.wait_for(lambda: self._querying >= self._active, timeout=self.delay)
+                del self._pending[key]
+            own_run = None
+            for run in self._runs(group):
+                if entry in run:
+                    own_run = run
+                else:
+                    # the first thread of each run queries the sources for
+                    # the whole run
+                    run[0].run = run
+                    run[0].done.set()
+            assert own_run is not None
+            self._query_run(creator, own_run)
+        else:
+            entry.done.wait()
+            if entry.run is not None:
+                self._query_run(creator, entry.run)
+
+        if entry.exc_info is not None:
+            raise reraise(entry.exc_info)
+        return entry.result
+
+    def _runs(self, group: list[_PendingMetaTile]) -> list[list[_PendingMetaTile]]:
+        """
+        Split `group` into runs of adjacent (or overlapping) meta tiles
+        within the max_meta_tiles and max_pixels limits.
+        """
+        group = sorted(group, key=lambda e: e.meta_tile.bbox[0])
+        runs = [[group[0]]]
+        for entry in group[1:]:
+            run = runs[-1]
+            bbox = entry.meta_tile.bbox
+            res = (bbox[2] - bbox[0]) / entry.meta_tile.size[0]
+            width = (bbox[2] - run[0].meta_tile.bbox[0]) / res
+            if (bbox[0] <= run[-1].meta_tile.bbox[2] + res / 2 and
+                    len(run) < self.max_meta_tiles and
+                    width * entry.meta_tile.size[1] <= self.max_pixels):
+                run.append(entry)
+            else:
+                runs.append([entry])
+        return runs
+
+    def _query_run(self, creator: TileCreator, run: list[_PendingMetaTile]) -> None:
+        try:
+            if len(run) == 1:
+                run[0].result = creator._query_sources(run[0].query)
+            else:
+                self._query_combined(creator, run)
+        except Exception:
+            exc_info = sys.exc_info()
+            for entry in run:
+                entry.exc_info = exc_info
+        finally:
+            for entry in run:
+                entry.done.set()
+
+    def _query_combined(self, creator: TileCreator, run: list[_PendingMetaTile]) -> None:
+        first = run[0].meta_tile
+        minx, miny, _maxx, maxy = first.bbox
+        res = (first.bbox[2] - minx) / first.size[0]
+        height = first.size[1]
+        offsets = [int(round((e.meta_tile.bbox[0] - minx) / res)) for e in run]
+        width = max(x + e.meta_tile.size[0] for x, e in zip(offsets, run))
+        bbox = (minx, miny, minx + width * res, maxy)
+
+        query = run[0].query
+        combined_query = MapQuery(bbox, (width, height), query.srs, query.format,
+                                  dimensions=query.dimensions)
+        result = creator._query_sources(combined_query)
+        if result is None:
+            return
+
+        if isinstance(result, BlankImageResult):
+            for entry in run:
+                entry.result = BlankImageResult(entry.meta_tile.size, result.image_opts,
+                                                cacheable=result.cacheable)
+            return
+
+        img = result.as_image()
+        for x, entry in zip(offsets, run):
+            size = entry.meta_tile.size
+            entry.result = ImageResult(img.crop((x, 0, x + size[0], size[1])),
+                                       image_opts=result.image_opts, cacheable=result.cacheable)
+
+
 def split_meta_tiles(meta_tile: BaseImageResult, tiles: list[tuple[Optional[TileCoord], tuple[int, int]]],
                      tile_size: tuple[int, int], image_opts):
     try:
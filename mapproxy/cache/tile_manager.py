@@ -1,13 +1,20 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
 from contextlib import contextmanager
 from functools import partial
 from typing import Any, cast, Optional, Union
 
-from mapproxy.cache.tile_creator import TileCreator
+from mapproxy.cache.tile_creator import MetaTileCoalescer, TileCreator
 from mapproxy.image import BaseImageResult
 from mapproxy.grid import TileCoord
 from mapproxy.image import BlankImageResult
 from mapproxy.cache.base import TileCacheBase
 from mapproxy.cache.tile import Tile, TileCollection
+from mapproxy.grid.coverage_index import CoverageTileIndex
 from mapproxy.grid.meta_grid import MetaGrid
 from mapproxy.grid.tile_grid import TileGrid
 from mapproxy.image.mask import mask_image_result_from_coverage
@@ -15,6 +22,9 @@ from mapproxy.image.opts import ImageOptions
 from mapproxy.image.tile import TiledImage
 from mapproxy.layer.map_layer import MapLayer
 from mapproxy.source import DummySource
+from mapproxy.util import async_, metrics, tracing
+
+log = logging.getLogger(__name__)
 
 # RESCALE_TILE_MISSING is a dummy image result to prevent a tile cache from loading
 # a tile that we already found out is missing.
@@ -22,6 +32,156 @@ from mapproxy.source import DummySource
 RESCALE_TILE_MISSING = BlankImageResult((256, 256), ImageOptions())
 
 
+class MissingTiles(object):
+    """
+    Remembers tiles that were not found in the cache for `ttl` seconds.
+
+    Entries are stored per level. Each level keeps up to `size` entries,
+    the oldest entries are removed first.
+    """
+
+    def __init__(self, ttl, size=16384):
+        self.ttl = ttl
+        self.size = size
+        self._levels: dict[int, dict[tuple, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(coord, dimensions):
+        if not dimensions:
+            return coord
+        return coord, tuple(sorted((k, str(v)) for k, v in dimensions.items()))
+
+    def __contains__(self, coord_dimensions):
+        coord, dimensions = coord_dimensions
+        level = self._levels.get(coord[2])
+        if not level:
+            return False
+        key = self._key(coord, dimensions)
+        expires = level.get(key)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            with self._lock:
+                level.pop(key, None)
+            return False
+        return True
+
+    def add(self, coord, dimensions=None):
+        key = self._key(coord, dimensions)
+        with self._lock:
+            level = self._levels.setdefault(coord[2], {})
+            level.pop(key, None)
+            level[key] = time.monotonic() + self.ttl
+            while len(level) > self.size:
+                del level[next(iter(level))]
+
+    def discard(self, coord, dimensions=None):
+        level = self._levels.get(coord[2])
+        if level:
+            with self._lock:
+                level.pop(self._key(coord, dimensions), None)
+
+    def clear(self):
+        with self._lock:
+            self._levels.clear()
+
+
+class StaleTileRefresher(object):
+    """
+    Re-creates stale tiles in the background.
+
+    Tiles are re-created by up to `workers` threads, the most requested
+    tiles first. Each tile (or meta tile) is queued only once. The queue
+    holds up to `size` tiles, other tiles are queued with later requests.
+    Errors are logged; the tile stays stale and is queued again with the
+    next request.
+    """
+
+    def __init__(self, tile_mgr: 'TileManager', workers=1, size=10000):
+        self.tile_mgr = tile_mgr
+        self.workers = workers
+        self.size = size
+        self._executor = async_.Executor(workers, name='mapproxy-refresh')
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # heap of (-requests, seq, key), with outdated entries for tiles
+        # that were requested again (compacted if it grows above 2*size)
+        self._queue: list[tuple[int, int, tuple]] = []
+        self._seq = itertools.count()
+        # key -> [requests, coord, dimensions]
+        self._pending: dict[tuple, list] = {}
+        self._active: set[tuple] = set()
+        self._running = 0
+
+    def __len__(self):
+        """
+        Number of queued tiles and tiles that are currently refreshed.
+        """
+        return len(self._pending) + len(self._active)
+
+    def add(self, coord: TileCoord, dimensions=None) -> None:
+        if self.tile_mgr.meta_grid:
+            coord = self.tile_mgr.meta_grid.main_tile(coord)
+        key = MissingTiles._key(coord, dimensions)
+        with self._lock:
+            if self._pid != os.getpid():
+                # workers of the parent process are not running after a fork
+                self._reset()
+            if key in self._active:
+                return
+            entry = self._pending.get(key)
+            if entry is None:
+                if len(self._pending) >= self.size:
+                    return
+                entry = self._pending[key] = [0, coord, dimensions]
+            entry[0] += 1
+            heapq.heappush(self._queue, (-entry[0], next(self._seq), key))
+            if len(self._queue) > 2 * self.size:
+                self._compact()
+            if self._running >= self.workers:
+                return
+            self._running += 1
+        self._executor.submit(self._work)
+
+    def _compact(self):
+        """
+        Rebuild the queue without outdated entries.
+        """
+        self._queue = [(-entry[0], next(self._seq), key) for key, entry in self._pending.items()]
+        heapq.heapify(self._queue)
+
+    def _next(self):
+        while self._queue:
+            requests, _, key = heapq.heappop(self._queue)
+            entry = self._pending.get(key)
+            if entry is not None and entry[0] == -requests:
+                del self._pending[key]
+                self._active.add(key)
+                return key, entry[1], entry[2]
+        return None
+
+    def _work(self):
+        while True:
+            with self._lock:
+                item = self._next()
+                if item is None:
+                    self._running -= 1
+                    return
+            key, coord, dimensions = item
+            try:
+                with self.tile_mgr.session():
+                    self.tile_mgr.creator(dimensions=dimensions).create_tiles([Tile(coord)])
+            except Exception:
+                log.warning('unable to refresh stale tile %s', coord, exc_info=True)
+            finally:
+                with self._lock:
+                    self._active.discard(key)
+
+
 class TileManager:
     """
     Manages tiles for a single grid.
@@ -36,7 +196,9 @@ class TileManager:
     def __init__(self, grid: TileGrid, cache: TileCacheBase, sources: list[MapLayer], format, locker, image_opts=None,
                  request_format=None, meta_buffer=None, meta_size=None, minimize_meta_requests=False, identifier=None,
                  pre_store_filter=None, concurrent_tile_creators=1, tile_creator_class=None,
-                 bulk_meta_tiles=False, rescale_tiles=0, cache_rescaled_tiles=False, dimensions=None
+                 bulk_meta_tiles=False, rescale_tiles=0, cache_rescaled_tiles=False, dimensions=None,
+                 missing_tile_ttl=None, coalesce_meta_tiles=None, coalesce_meta_tiles_delay=None,
+                 stale_while_revalidate=False, refresh_workers=1,
                  ):
         self.grid = grid
         self.cache = cache
@@ -57,6 +219,9 @@ class TileManager:
 
         self.rescale_tiles = rescale_tiles
         self.cache_rescaled_tiles = cache_rescaled_tiles
+        # remember missing tiles in cache_only mode, to avoid repeated
+        # requests for tiles that do not exist
+        self.missing_tiles = MissingTiles(missing_tile_ttl) if missing_tile_ttl else None
 
         if meta_buffer or (meta_size and not meta_size == [1, 1]):
             if all(source.supports_meta_tiles for source in sources):
@@ -69,6 +234,24 @@ class TileManager:
                 self.meta_grid = MetaGrid(grid, meta_size=meta_size, meta_buffer=0)
                 self.tile_creator_class = partial(self.tile_creator_class, bulk_meta_tiles=True)
 
+        # combine adjacent meta tiles from concurrent requests into a single source request
+        self.meta_tile_coalescer = None
+        if coalesce_meta_tiles and coalesce_meta_tiles > 1 and self.meta_grid:
+            coalescer_opts = {}
+            if coalesce_meta_tiles_delay is not None:
+                coalescer_opts['delay'] = coalesce_meta_tiles_delay
+            max_pixels = [s.max_output_pixels for s in sources if s.max_output_pixels]
+            if max_pixels:
+                coalescer_opts['max_pixels'] = min(max_pixels)
+            self.meta_tile_coalescer = MetaTileCoalescer(coalesce_meta_tiles, **coalescer_opts)
+
+        self._coverage_index: Optional[CoverageTileIndex] = None
+
+        # serve stale tiles and refresh them in the background
+        self.stale_tile_refresher = None
+        if stale_while_revalidate:
+            self.stale_tile_refresher = StaleTileRefresher(self, workers=refresh_workers)
+
     @contextmanager
     def session(self):
         """
@@ -86,6 +269,17 @@ class TileManager:
         if hasattr(self.cache, 'cleanup'):
             self.cache.cleanup()
 
+    def coverage_index(self) -> CoverageTileIndex:
+        """
+        Index of the tiles within the coverage of the cache.
+        """
+        coverage = self.cache.coverage
+        assert coverage is not None
+        index = self._coverage_index
+        if index is None or index.coverage is not coverage:
+            index = self._coverage_index = CoverageTileIndex(coverage, self.grid)
+        return index
+
     def load_tile_coord(self, tile_coord: TileCoord, dimensions=None, with_metadata=False) -> Tile:
         return self.load_tile_coords(
             [tile_coord], dimensions=dimensions, with_metadata=with_metadata,
@@ -110,16 +304,19 @@ class TileManager:
 
         # Remove tiles that are not in the cache coverage
         if self.cache.coverage:
-            for t in tiles.tiles:
-                if t.coord:
-                    tile_bbox = self.grid.tile_bbox(t.coord)
-                    if not self.cache.coverage.intersects(tile_bbox, self.grid.srs):
+            coord_tiles = [t for t in tiles.tiles if t.coord]
+            if coord_tiles:
+                intersects = self.coverage_index().intersects([t.coord for t in coord_tiles])
+                for t, intersection in zip(coord_tiles, intersects):
+                    if not intersection:
                         t.coord = None
 
-        tiles = self._load_tile_coords(
-            tiles, dimensions=dimensions, with_metadata=with_metadata,
-            rescale_till_zoom=rescale_till_zoom, rescaled_tiles={},
-        )
+        with tracing.span('mapproxy.load_tile_coords', cache=self.identifier,
+                          tiles=tracing.tile_coords(tile_coords)):
+            tiles = self._load_tile_coords(
+                tiles, dimensions=dimensions, with_metadata=with_metadata,
+                rescale_till_zoom=rescale_till_zoom, rescaled_tiles={},
+            )
 
         for t in tiles.tiles:
             # Clip tiles if clipping is enabled for coverage
@@ -143,9 +340,15 @@ class TileManager:
         if cache_only:
             # in cache_only mode, we already fetched the tile from cache
             return tile.is_missing()
-        else:
-            # missing or staled
-            return not self.is_cached(tile, dimensions=dimensions)
+        elif getattr(self.cache, 'supports_metadata_on_load', False):
+            # load_tiles already requested the tile and its metadata,
+            # avoid another round-trip to check if it exists
+            if tile.is_missing():
+                return True
+            if tile.timestamp is not None:
+                return self._is_expired(tile, self.expire_timestamp())
+        # missing or staled
+        return not self.is_cached(tile, dimensions=dimensions)
 
     def _load_tile_coords(self, tiles: TileCollection, dimensions=None, with_metadata=False,
                           rescale_till_zoom=None, rescaled_tiles=None
@@ -157,24 +360,56 @@ class TileManager:
                 if t.coord in rescaled_tiles:
                     t.image_result = rescaled_tiles[t.coord].image_result
 
-        # load all in batch
-        self.cache.load_tiles(tiles, with_metadata, dimensions=dimensions)
-
         # if no real source, we are running in cache_only mode
         cache_only = self.sources == [] or (len(self.sources) == 1 and isinstance(self.sources[0], DummySource))
+
+        missing_tiles = self.missing_tiles if cache_only else None
+        if missing_tiles is None:
+            # load all in batch
+            with tracing.span('mapproxy.cache.load', cache=self.identifier):
+                self.cache.load_tiles(tiles, with_metadata, dimensions=dimensions)
+        else:
+            # skip tiles that were recently missing
+            load_tiles = tiles.filtered(lambda t: t.coord is None or (t.coord, dimensions) not in missing_tiles)
+            if len(load_tiles):
+                with tracing.span('mapproxy.cache.load', cache=self.identifier):
+                    self.cache.load_tiles(load_tiles, with_metadata, dimensions=dimensions)
+            for t in load_tiles:
+                if t.coord is not None and t.is_missing():
+                    missing_tiles.add(t.coord, dimensions)
         # if no rescale_tiles and cache_only, we dont have any additional processing to do
         if self.rescale_tiles == 0 and cache_only:
+            if metrics.registry.enabled:
+                requested_tiles = [t for t in tiles if t.coord is not None]
+                missing = sum(1 for t in requested_tiles if t.is_missing())
+                self._count_tiles(hit=len(requested_tiles) - missing, miss=missing)
             return tiles
 
+        requested = stale = 0
         for tile in tiles:
+            if tile.coord is not None:
+                requested += 1
             if self._is_tile_missing(tile, cache_only, dimensions=dimensions):
-                uncached_tiles.append(tile)
+                if not tile.is_missing():
+                    stale += 1
+                if self.stale_tile_refresher is not None and not tile.is_missing():
+                    # tile is stale, but we already loaded it
+                    self.stale_tile_refresher.add(tile.coord, dimensions=dimensions)
+                else:
+                    uncached_tiles.append(tile)
+        if metrics.registry.enabled:
+            missing = len(uncached_tiles) - (0 if self.stale_tile_refresher is not None else stale)
+            self._count_tiles(hit=requested - missing - stale, miss=missing, stale=stale)
 
         if uncached_tiles:
             creator = self.creator(dimensions=dimensions)
-            created_tiles = creator.create_tiles(uncached_tiles)
+            span = tracing.span('mapproxy.create_tiles', cache=self.identifier,
+                                tiles=tracing.tile_coords(t.coord for t in uncached_tiles))
+            with metrics.timer(metrics.TILE_CREATION_DURATION, self.identifier), span:
+                created_tiles = creator.create_tiles(uncached_tiles)
             if not created_tiles and self.rescale_tiles:
-                created_tiles = [self._scaled_tile(t, rescale_till_zoom, rescaled_tiles) for t in uncached_tiles]
+                created_tiles = [self._scaled_tile(t, rescale_till_zoom, rescaled_tiles, dimensions=dimensions)
+                                 for t in uncached_tiles]
 
             for created_tile in created_tiles:
                 if created_tile.coord in tiles:
@@ -182,6 +417,11 @@ class TileManager:
 
         return tiles
 
+    def _count_tiles(self, **results):
+        for result, count in results.items():
+            if count:
+                metrics.CACHE_TILES.inc(self.identifier, result, amount=count)
+
     def remove_tile_coords(self, tile_coords: list[TileCoord]):
         tiles = TileCollection(tile_coords)
         self.cache.remove_tiles(tiles)
@@ -192,7 +432,13 @@ class TileManager:
     def lock(self, tile):
         if self.meta_grid:
             tile = Tile(self.meta_grid.main_tile(tile.coord))
-        return self.locker.lock(tile)
+        lock = self.locker.lock(tile)
+        if metrics.registry.enabled:
+            lock = metrics.TimedLock(lock, metrics.LOCK_WAIT.labels(self.identifier))
+        if tracing.enabled():
+            lock = tracing.TracedLock(lock, 'mapproxy.lock_wait', cache=self.identifier,
+                                      tiles=tracing.tile_coords([tile.coord]))
+        return lock
 
     def is_cached(self, tile: Union[Tile, TileCoord], dimensions=None) -> bool:
         """
@@ -206,14 +452,43 @@ class TileManager:
         max_mtime = self.expire_timestamp()
         if cached and max_mtime is not None:
             self.cache.load_tile_metadata(tile, dimensions=self.dimensions)
-            # file time stamp must be rounded to integer since time conversion functions
-            # mktime and timetuple strip decimals from seconds
-            assert tile.timestamp is not None
-            stale = int(tile.timestamp) <= max_mtime
-            if stale:
+            if self._is_expired(tile, max_mtime):
                 cached = False
         return cached
 
+    def uncached_tile_coords(self, tile_coords: list[Optional[TileCoord]], dimensions=None) -> list[TileCoord]:
+        """
+        Return all `tile_coords` that are not cached or expired.
+        Checks all tiles with a single call to the cache, if supported.
+        """
+        coords = [coord for coord in tile_coords if coord is not None]
+        tiles = [Tile(coord) for coord in coords]
+        if not hasattr(self.cache, 'is_cached_tiles'):
+            return [coord for coord, t in zip(coords, tiles) if not self.is_cached(t, dimensions=dimensions)]
+
+        cached = self.cache.is_cached_tiles(tiles, dimensions=dimensions)
+        max_mtime = self.expire_timestamp()
+        uncached = []
+        for coord, tile, is_cached in zip(coords, tiles, cached):
+            if is_cached and max_mtime is not None:
+                self.cache.load_tile_metadata(tile, dimensions=self.dimensions)
+                is_cached = not self._is_expired(tile, max_mtime)
+            if not is_cached:
+                uncached.append(coord)
+        return uncached
+
+    def _is_expired(self, tile: Tile, max_mtime) -> bool:
+        """
+        Return True if the timestamp of the (cached) `tile` is not newer
+        than `max_mtime`.
+        """
+        if max_mtime is None:
+            return False
+        # file time stamp must be rounded to integer since time conversion functions
+        # mktime and timetuple strip decimals from seconds
+        assert tile.timestamp is not None
+        return int(tile.timestamp) <= max_mtime
+
     def is_stale(self, tile: Tile, dimensions=None) -> bool:
         """
         Return True if tile exists _and_ is expired.
@@ -252,7 +527,7 @@ class TileManager:
             tile = img_filter(tile)
         return tile
 
-    def _scaled_tile(self, tile: Tile, stop_zoom, rescaled_tiles) -> Tile:
+    def _scaled_tile(self, tile: Tile, stop_zoom, rescaled_tiles, dimensions=None) -> Tile:
         """
         Try to load tile by loading, scaling and clipping tiles from zoom levels above or
         below. stop_zoom determines if tiles from above should be scaled up, or if tiles
@@ -288,6 +563,7 @@ class TileManager:
 
         tile_collection = self._load_tile_coords(
             affected_tiles,
+            dimensions=dimensions,
             rescale_till_zoom=stop_zoom,
             rescaled_tiles=rescaled_tiles,
         )
@@ -305,5 +581,7 @@ class TileManager:
         tile.image_result = tiled_image.transform(tile_bbox, self.grid.srs, self.grid.tile_size, self.image_opts)
 
         if self.cache_rescaled_tiles:
-            self.cache.store_tile(tile)
+            self.cache.store_tile(tile, dimensions=dimensions)
+            if self.missing_tiles is not None:
+                self.missing_tiles.discard(tile.coord, dimensions)
         return tile
@@ -0,0 +1,96 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Circuit breaker for failing upstream servers.
+"""
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+log = logging.getLogger('mapproxy.source.breaker')
+
+
+class CircuitBreaker(object):
+    """
+    Rejects requests to an upstream server after `failures` consecutive
+    failed requests.
+
+    The circuit is open for `reset_timeout` seconds. After that, a single
+    request is allowed to test the server (half-open). The circuit closes
+    if this request succeeds, otherwise it stays open for another
+    `reset_timeout` seconds.
+    """
+
+    def __init__(self, failures=5, reset_timeout=30.0):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.failed = 0
+        self.open_until = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.open_until is not None
+
+    def allow(self) -> bool:
+        """
+        Return True if a request should be sent to the server.
+        """
+        with self._lock:
+            if self.open_until is None:
+                return True
+            now = time.monotonic()
+            if now < self.open_until:
+                return False
+            # half-open: allow one request per reset_timeout
+            self.open_until = now + self.reset_timeout
+            return True
+
+    def record(self, success: bool) -> None:
+        """
+        Record the outcome of a request.
+        """
+        with self._lock:
+            if success:
+                if self.open_until is not None:
+                    log.info('closed circuit after successful request')
+                self.failed = 0
+                self.open_until = None
+                return
+            self.failed += 1
+            if self.failed >= self.failures:
+                if self.open_until is None:
+                    log.warning('opened circuit after %d failed requests', self.failed)
+                self.open_until = time.monotonic() + self.reset_timeout
+
+
+_breakers: dict[tuple, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for_url(url: str, **options) -> CircuitBreaker:
+    """
+    Return the CircuitBreaker for the server of `url`. Circuit breakers
+    are shared by all sources of the same server (within one process).
+    """
+    key = (os.getpid(), urlparse(url).netloc, tuple(sorted(options.items())))
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(**options)
+        return breaker
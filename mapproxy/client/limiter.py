@@ -0,0 +1,134 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Adaptive limit for concurrent requests to upstream servers.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+log = logging.getLogger('mapproxy.source.limiter')
+
+#: HTTP status codes of overloaded servers
+OVERLOAD_STATUS_CODES = (429, 503)
+
+
+class AdaptiveLimiter(object):
+    """
+    Limits the number of concurrent requests to an upstream server.
+
+    The limit is adjusted with AIMD (additive increase, multiplicative
+    decrease). It grows by one after `limit` successful requests and it
+    is reduced by `backoff` if the server responds with 429/503, if
+    a request times out or if the latency rises above `latency_tolerance`
+    times the lowest observed latency.
+
+    Requests that do not get a free slot within `max_wait` seconds are
+    rejected.
+    """
+
+    def __init__(self, max_requests=32, min_requests=1, max_wait=5.0, latency_tolerance=2.0,
+                 backoff=0.75):
+        self.max_requests = max_requests
+        self.min_requests = min(min_requests, max_requests)
+        self.max_wait = max_wait
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.limit = float(max_requests)
+        self.in_flight = 0
+        self.rejected = 0
+        self._baseline_latency: Optional[float] = None
+        self._latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        """
+        Wait for a free slot. Return False if no slot is available
+        within `max_wait` seconds.
+        """
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                deadline = time.monotonic() + self.max_wait
+                while self.in_flight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        """
+        Release the slot of a request that took `latency` seconds.
+        `overloaded` is True if the server responded with 429/503 or
+        the request timed out.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self._decrease()
+            else:
+                self._update_latency(latency)
+                if self._latency > self._baseline_latency * self.latency_tolerance:
+                    self._decrease()
+                elif self.limit < self.max_requests:
+                    self.limit = min(self.max_requests, self.limit + 1 / self.limit)
+            self._cond.notify()
+
+    def _update_latency(self, latency: float) -> None:
+        if self._latency is None or self._baseline_latency is None:
+            self._latency = self._baseline_latency = latency
+            return
+        self._latency += (latency - self._latency) * 0.2
+        if latency < self._baseline_latency:
+            self._baseline_latency = latency
+        else:
+            # slowly forget the lowest latency, in case it was an outlier
+            self._baseline_latency += (latency - self._baseline_latency) * 0.01
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        # requests that were started before the last decrease still
+        # see the old load, do not decrease again for their responses
+        if now - self._last_decrease < (self._latency or 0):
+            return
+        self._last_decrease = now
+        limit = max(self.min_requests, self.limit * self.backoff)
+        if int(limit) < int(self.limit):
+            log.warning('reduced concurrent requests to %d (%d in flight)', int(limit), self.in_flight)
+        self.limit = limit
+
+
+_limiters: dict[tuple, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for_url(url: str, **options) -> AdaptiveLimiter:
+    """
+    Return the AdaptiveLimiter for the server of `url`. Limiters are
+    shared by all sources of the same server (within one process).
+    """
+    key = (os.getpid(), urlparse(url).netloc, tuple(sorted(options.items())))
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveLimiter(**options)
+        return limiter
@@ -14,10 +14,16 @@
 # limitations under the License.
 
 import logging
+from urllib.parse import urlparse
+
+from mapproxy.util import metrics
+
 logger = logging.getLogger('mapproxy.source.request')
 
 
 def log_request(url, status, result=None, size=None, method='GET', duration=None):
+    if metrics.registry.enabled and duration is not None:
+        metrics.UPSTREAM_DURATION.observe(duration, _metrics_host(url, method))
     if not logger.isEnabledFor(logging.INFO):
         return
 
@@ -31,3 +37,14 @@ def log_request(url, status, result=None, size=None, method='GET', duration=None
         status = '-'
     duration = '%d' % (duration*1000) if duration else '-'
     logger.info('%s %s %s %s %s', method, url.replace(' ', ''), status, size, duration)
+
+
+def _metrics_host(url, method):
+    """
+    Return the host of HTTP `url`s, or `method` for other requests (e.g.
+    mapnik, renderd) to keep the number of metrics labels small.
+    """
+    if url.startswith(('http://', 'https://')):
+        # without user:password@
+        return urlparse(url).netloc.rpartition('@')[2]
+    return method
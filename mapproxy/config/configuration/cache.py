@@ -109,7 +109,8 @@ class CacheConfiguration(ConfigurationBase):
             link_single_color_images=link_single_color_images,
             coverage=coverage,
             directory_permissions=self.directory_permissions(),
-            file_permissions=self.file_permissions()
+            file_permissions=self.file_permissions(),
+            batch_writes=self.conf.get('cache', {}).get('batch_writes', False),
         )
 
     def _mbtiles_cache(self, grid_conf, image_opts):
@@ -202,6 +203,13 @@ class CacheConfiguration(ConfigurationBase):
         if not connection_string:
             raise ConfigurationError("no connection_string configured for Azure Blob cache %s" % self.conf['name'])
 
+        client_options = {}
+        for option in ('max_pool_connections', 'retries', 'connect_timeout', 'read_timeout'):
+            value = self.context.globals.get_value('cache.' + option, self.conf,
+                                                   global_key='cache.azureblob.' + option)
+            if value is not None:
+                client_options[option] = value
+
         directory_layout = self.conf['cache'].get('directory_layout', 'tms')
 
         base_path = self.conf['cache'].get('directory', None)
@@ -214,7 +222,8 @@ class CacheConfiguration(ConfigurationBase):
             directory_layout=directory_layout,
             container_name=container_name,
             connection_string=connection_string,
-            coverage=coverage
+            coverage=coverage,
+            **client_options
         )
 
     def _s3_cache(self, grid_conf, image_opts):
@@ -246,6 +255,13 @@ class CacheConfiguration(ConfigurationBase):
         include_grid_name = self.context.globals.get_value('cache.include_grid_name', self.conf,
                                                       global_key='cache.s3.include_grid_name')
 
+        client_options = {}
+        for option in ('max_pool_connections', 'retries', 'connect_timeout', 'read_timeout'):
+            value = self.context.globals.get_value('cache.' + option, self.conf,
+                                                   global_key='cache.s3.' + option)
+            if value is not None:
+                client_options[option] = value
+
         directory_layout = self.conf['cache'].get('directory_layout', 'tms')
 
         base_path = self.conf['cache'].get('directory', None)
@@ -266,7 +282,8 @@ class CacheConfiguration(ConfigurationBase):
             endpoint_url=endpoint_url,
             access_control_list=access_control_list,
             coverage=coverage,
-            use_http_get=use_http_get
+            use_http_get=use_http_get,
+            **client_options
         )
 
     def _sqlite_cache(self, grid_conf, image_opts):
@@ -323,7 +340,8 @@ class CacheConfiguration(ConfigurationBase):
             tile_grid=grid_conf.tile_grid(),
             md_template=md_template,
             tile_id_template=tile_id,
-            coverage=coverage
+            coverage=coverage,
+            max_pool_connections=self.conf['cache'].get('max_pool_connections', 10),
         )
 
     def _redis_cache(self, grid_conf, image_opts):
@@ -577,6 +595,19 @@ class CacheConfiguration(ConfigurationBase):
                                                                 global_key='cache.minimize_meta_requests')
         concurrent_tile_creators = self.context.globals.get_value('concurrent_tile_creators', self.conf,
                                                                   global_key='cache.concurrent_tile_creators')
+        missing_tile_ttl = self.context.globals.get_value('missing_tile_ttl', self.conf,
+                                                          global_key='cache.missing_tile_ttl')
+        coalesce_meta_tiles = self.context.globals.get_value('coalesce_meta_tiles', self.conf,
+                                                             global_key='cache.coalesce_meta_tiles')
+        coalesce_meta_tiles_delay = self.context.globals.get_value('coalesce_meta_tiles_delay', self.conf,
+                                                                   global_key='cache.coalesce_meta_tiles_delay')
+        stale_while_revalidate = self.context.globals.get_value('stale_while_revalidate', self.conf,
+                                                                global_key='cache.stale_while_revalidate')
+        refresh_workers = self.context.globals.get_value('refresh_workers', self.conf,
+                                                         global_key='cache.refresh_workers') or 1
+        if self.context.seed:
+            # seeding needs to refresh tiles synchronously
+            stale_while_revalidate = False
 
         cache_rescaled_tiles = self.conf.get('cache_rescaled_tiles')
         upscale_tiles = self.conf.get('upscale_tiles', 0)
@@ -705,6 +736,11 @@ class CacheConfiguration(ConfigurationBase):
                               bulk_meta_tiles=bulk_meta_tiles,
                               cache_rescaled_tiles=cache_rescaled_tiles,
                               rescale_tiles=rescale_tiles,
+                              missing_tile_ttl=missing_tile_ttl,
+                              coalesce_meta_tiles=coalesce_meta_tiles,
+                              coalesce_meta_tiles_delay=coalesce_meta_tiles_delay,
+                              stale_while_revalidate=stale_while_revalidate,
+                              refresh_workers=refresh_workers,
                               )
             if self.conf['name'] in self.context.caches:
                 mgr._refresh_before = self.context.caches[self.conf['name']].conf.get('refresh_before', {})
@@ -3,7 +3,7 @@ from __future__ import division
 import os
 
 from mapproxy.config import load_default_config, finish_base_config
-from mapproxy.config.configuration.base import ConfigurationBase
+from mapproxy.config.configuration.base import ConfigurationBase, ConfigurationError
 from mapproxy.config.configuration.base import dotted_dict_get
 from mapproxy.config.configuration.image_options import ImageOptionsConfiguration
 
@@ -35,6 +35,14 @@ class GlobalConfiguration(ConfigurationBase):
         self.image_options = ImageOptionsConfiguration(self.conf.get('image', {}), context)
         self.preferred_srs = preferred_srs(self.conf.get('srs', {}))
         self.renderd_address = self.get_value('renderd.address')
+        if self.get_value('tracing.enabled'):
+            self.load_tracer()
+
+    def load_tracer(self):
+        from mapproxy.util import tracing
+        if not tracing.has_opentelemetry_support():
+            raise ConfigurationError('globals.tracing requires the opentelemetry-api package')
+        tracing.set_tracer(tracing.opentelemetry_tracer())
 
     def _copy_conf_values(self, d, target):
         for k, v in d.items():
@@ -56,6 +56,9 @@ class ServiceConfiguration(ConfigurationBase):
         super().__init__(conf, context)
 
     def services(self):
+        # the metrics registry is shared by all apps of this process,
+        # only record metrics for apps with the metrics service
+        self.context.globals.base_config.metrics_enabled = 'metrics' in self.conf
         services = []
         ows_services = []
         for service_name, service_conf in self.conf.items():
@@ -289,6 +292,16 @@ class ServiceConfiguration(ConfigurationBase):
                             map_srs=map_srs,
                             default_dataset_layers=default_dataset_layers)
 
+    def metrics_service(self, conf):
+        from mapproxy.service.metrics import MetricsServer
+        from mapproxy.util import metrics
+
+        multiprocess_dir = conf.get('multiprocess_dir')
+        if multiprocess_dir:
+            multiprocess_dir = self.context.globals.abspath(multiprocess_dir)
+        metrics.registry.enable(multiprocess_dir=multiprocess_dir, flush_interval=conf.get('flush_interval'))
+        return MetricsServer()
+
     def demo_service(self, conf):
         from mapproxy.service.demo import DemoServer
         services = list(self.context.services.conf.keys())
@@ -125,10 +125,23 @@ class SourceConfiguration(ConfigurationBase):
         hide_error_details = self.context.globals.get_value('http.hide_error_details', self.conf)
         manage_cookies = self.context.globals.get_value('http.manage_cookies', self.conf)
 
+        limiter = None
+        adaptive_concurrency = self.context.globals.get_value('http.adaptive_concurrency', self.conf)
+        if adaptive_concurrency is not None:
+            from mapproxy.client.limiter import limiter_for_url
+            limiter = limiter_for_url(url, **adaptive_concurrency)
+
+        circuit_breaker = None
+        circuit_breaker_conf = self.context.globals.get_value('http.circuit_breaker', self.conf)
+        if circuit_breaker_conf is not None:
+            from mapproxy.client.breaker import breaker_for_url
+            circuit_breaker = breaker_for_url(url, **circuit_breaker_conf)
+
         http_client = HTTPClient(url, username, password, insecure=insecure,
                                  ssl_ca_certs=ssl_ca_certs, timeout=timeout,
                                  headers=headers, hide_error_details=hide_error_details,
-                                 manage_cookies=manage_cookies)
+                                 manage_cookies=manage_cookies, limiter=limiter,
+                                 circuit_breaker=circuit_breaker)
         return http_client, url
 
     @memoize
@@ -349,6 +362,10 @@ class WMSSourceConfiguration(SourceConfiguration):
 
         fwd_req_params = set(self.conf.get('forward_req_params', []))
 
+        max_output_pixels = self.conf.get('wms_opts', {}).get('max_output_pixels')
+        if isinstance(max_output_pixels, list):
+            max_output_pixels = max_output_pixels[0] * max_output_pixels[1]
+
         request = create_request(self.conf['req'], params, version=version,
                                  abspath=self.context.globals.abspath)
         http_client, request.url = self.http_client(request.url)
@@ -361,7 +378,8 @@ class WMSSourceConfiguration(SourceConfiguration):
                          supported_srs=self.supported_srs(),
                          supported_formats=supported_formats or None,
                          fwd_req_params=fwd_req_params,
-                         error_handler=self.on_error_handler())
+                         error_handler=self.on_error_handler(),
+                         max_output_pixels=max_output_pixels)
 
     def fi_source(self, params=None):
         from mapproxy.client.wms import WMSInfoClient
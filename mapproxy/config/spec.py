@@ -87,6 +87,16 @@ http_opts = {
         anything(): str()
     },
     'manage_cookies': bool(),
+    'adaptive_concurrency': {
+        'max_requests': int(),
+        'min_requests': int(),
+        'max_wait': number(),
+        'latency_tolerance': number(),
+    },
+    'circuit_breaker': {
+        'failures': int(),
+        'reset_timeout': number(),
+    },
 }
 
 mapserver_opts = {
@@ -124,6 +134,7 @@ cache_types = {
         'tile_lock_dir': str(),
         'directory_permissions': str(),
         'file_permissions': str(),
+        'batch_writes': bool(),
     }),
     'sqlite': combined(cache_commons, {
         'directory': str(),
@@ -159,6 +170,7 @@ cache_types = {
         },
         'tile_id': str(),
         'tile_lock_dir': str(),
+        'max_pool_connections': int(),
     }),
     's3': combined(cache_commons, {
         'bucket_name': str(),
@@ -171,6 +183,10 @@ cache_types = {
         'tile_lock_dir': str(),
         'use_http_get': bool(),
         'include_grid_name': bool(),
+        'max_pool_connections': int(),
+        'retries': int(),
+        'connect_timeout': number(),
+        'read_timeout': number(),
     }),
     'redis': combined(cache_commons, {
         'host': str(),
@@ -197,6 +213,10 @@ cache_types = {
         'directory_layout': str(),
         'directory': str(),
         'tile_lock_dir': str(),
+        'max_pool_connections': int(),
+        'retries': int(),
+        'connect_timeout': number(),
+        'read_timeout': number(),
     }),
 }
 
@@ -397,16 +417,29 @@ mapproxy_yaml_spec = {
             'max_tile_limit': number(),
             'minimize_meta_requests': bool(),
             'concurrent_tile_creators': int(),
+            'missing_tile_ttl': number(),
+            'coalesce_meta_tiles': int(),
+            'coalesce_meta_tiles_delay': number(),
+            'stale_while_revalidate': bool(),
+            'refresh_workers': int(),
             'link_single_color_images': one_of(bool(), 'symlink', 'hardlink'),
             's3': {
                 'bucket_name': str(),
                 'profile_name': str(),
                 'region_name': str(),
                 'endpoint_url': str(),
+                'max_pool_connections': int(),
+                'retries': int(),
+                'connect_timeout': number(),
+                'read_timeout': number(),
             },
             'azureblob': {
                 'connection_string': str(),
                 'container_name': str(),
+                'max_pool_connections': int(),
+                'retries': int(),
+                'connect_timeout': number(),
+                'read_timeout': number(),
             },
         },
         'grid': {
@@ -424,7 +457,16 @@ mapproxy_yaml_spec = {
         'mapserver': mapserver_opts,
         'renderd': {
             'address': str(),
-        }
+        },
+        'tracing': {
+            'enabled': bool(),
+        },
+        'profiler': {
+            'dir': str(),
+            'enabled': bool(),
+            'interval': number(),
+            'toggle_signal': bool(),
+        },
     },
     'grids': {
         anything(): grid_opts,
@@ -451,6 +493,11 @@ mapproxy_yaml_spec = {
             'upscale_tiles': int(),
             'downscale_tiles': int(),
             'refresh_before': time_spec,
+            'missing_tile_ttl': number(),
+            'coalesce_meta_tiles': int(),
+            'coalesce_meta_tiles_delay': number(),
+            'stale_while_revalidate': bool(),
+            'refresh_workers': int(),
             'watermark': {
                 'text': str,
                 'font_size': number(),
@@ -463,6 +510,10 @@ mapproxy_yaml_spec = {
     },
     'services': {
         'demo': {},
+        'metrics': {
+            'multiprocess_dir': str(),
+            'flush_interval': number(),
+        },
         'kml': {
             'use_grid_names': bool(),
         },
@@ -559,6 +610,7 @@ mapproxy_yaml_spec = {
                     'featureinfo_xslt': str(),
                     'featureinfo_out_format': str(),
                     'query_layers': str(),
+                    'max_output_pixels': one_of(number(), [number()]),
                 },
                 'image': combined(image_opts, {
                     'opacity': number(),
@@ -584,6 +636,7 @@ mapproxy_yaml_spec = {
                     'legendurl': str(),
                     'featureinfo_format': str(),
                     'featureinfo_xslt': str(),
+                    'max_output_pixels': one_of(number(), [number()]),
                 },
                 'image': combined(image_opts, {
                     'opacity': number(),
@@ -0,0 +1,196 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-level index of the tiles within a coverage.
+"""
+import logging
+import math
+import threading
+from typing import Optional
+
+import numpy as np
+
+from mapproxy.grid.tile_grid import TileGrid
+from mapproxy.util.coverage import Coverage
+
+log = logging.getLogger(__name__)
+
+OUTSIDE = 0
+BOUNDARY = 1
+INSIDE = 2
+
+
+class _LevelIndex(object):
+    def __init__(self, cell_range, states):
+        self.x0, self.y0, self.x1, self.y1 = cell_range
+        self.states = states
+
+    def lookup(self, cxs, cys):
+        states = np.full(len(cxs), OUTSIDE, dtype=np.uint8)
+        mask = (cxs >= self.x0) & (cxs <= self.x1) & (cys >= self.y0) & (cys <= self.y1)
+        states[mask] = self.states[cys[mask] - self.y0, cxs[mask] - self.x0]
+        return states
+
+
+class CoverageTileIndex(object):
+    """
+    Classifies the tiles of `grid` as ``INSIDE`` (contained), ``BOUNDARY``
+    (intersecting, but not contained) or ``OUTSIDE`` of `coverage`.
+
+    Cells are single tiles, or meta tiles if `meta_size` is set (with
+    coords of the main tile, see `MetaGrid`). The states of all cells of a
+    level are computed with a single vectorized coverage check when the
+    level is first accessed. Levels with more than `max_cells` cells within
+    the coverage extent are not indexed, their cells are checked against
+    the coverage for each call.
+    """
+
+    def __init__(self, coverage: Coverage, grid: TileGrid, meta_size: Optional[tuple[int, int]] = None,
+                 max_cells: int = 1 << 16):
+        self.coverage = coverage
+        self.grid = grid
+        self.meta_size = tuple(meta_size) if meta_size else (1, 1)
+        self.max_cells = max_cells
+        self._levels: dict[int, Optional[_LevelIndex]] = {}
+        self._lock = threading.Lock()
+        try:
+            self._coverage_bbox = coverage.extent.bbox_for(grid.srs)
+        except Exception:
+            log.debug('unable to transform coverage extent, indexing complete grid', exc_info=True)
+            self._coverage_bbox = grid.bbox
+
+    def _cell_size(self, level: int) -> tuple[int, int]:
+        grid_size = self.grid.grid_sizes[level]
+        return min(self.meta_size[0], grid_size[0]), min(self.meta_size[1], grid_size[1])
+
+    def _cell_range(self, level: int) -> Optional[tuple[int, int, int, int]]:
+        """
+        Range of all cells that can intersect the coverage extent (plus one
+        cell as margin for transformation inaccuracies).
+        """
+        grid_width, grid_height = self.grid.grid_sizes[level]
+        cell_width, cell_height = self._cell_size(level)
+        minx, miny, maxx, maxy = self._coverage_bbox
+        tx0, ty0, _ = self.grid.tile_coord_for_point(minx, miny, level)
+        tx1, ty1, _ = self.grid.tile_coord_for_point(maxx, maxy, level)
+        if tx0 > tx1:
+            tx0, tx1 = tx1, tx0
+        if ty0 > ty1:
+            ty0, ty1 = ty1, ty0
+        if tx1 < 0 or ty1 < 0 or tx0 >= grid_width or ty0 >= grid_height:
+            return None
+        max_cx = math.ceil(grid_width / cell_width) - 1
+        max_cy = math.ceil(grid_height / cell_height) - 1
+        return (
+            max(0, tx0 // cell_width - 1),
+            max(0, ty0 // cell_height - 1),
+            min(max_cx, tx1 // cell_width + 1),
+            min(max_cy, ty1 // cell_height + 1),
+        )
+
+    def _cell_edges(self, level: int, cxs, cys):
+        """
+        Return the x and y edges for the cell columns `cxs` and rows `cys`.
+        Uses `TileGrid.tile_bbox` for identical results with MetaGrid bboxes.
+        """
+        cell_width, cell_height = self._cell_size(level)
+        x_edges = []
+        for cx in cxs:
+            bbox0 = self.grid.tile_bbox((cx * cell_width, 0, level))
+            bbox1 = self.grid.tile_bbox((cx * cell_width + cell_width - 1, 0, level))
+            x_edges.append((min(bbox0[0], bbox1[0]), max(bbox0[2], bbox1[2])))
+        y_edges = []
+        for cy in cys:
+            bbox0 = self.grid.tile_bbox((0, cy * cell_height, level))
+            bbox1 = self.grid.tile_bbox((0, cy * cell_height + cell_height - 1, level))
+            y_edges.append((min(bbox0[1], bbox1[1]), max(bbox0[3], bbox1[3])))
+        return np.array(x_edges, dtype=float).reshape(-1, 2), np.array(y_edges, dtype=float).reshape(-1, 2)
+
+    def _classify(self, bboxes) -> np.ndarray:
+        states = np.full(len(bboxes), OUTSIDE, dtype=np.uint8)
+        if not len(bboxes):
+            return states
+        intersects = self.coverage.intersects_bboxes(bboxes, self.grid.srs)
+        states[intersects] = BOUNDARY
+        if intersects.any():
+            contains = self.coverage.contains_bboxes(bboxes[intersects], self.grid.srs)
+            states[np.flatnonzero(intersects)[contains]] = INSIDE
+        return states
+
+    def _build_level(self, level: int) -> Optional[_LevelIndex]:
+        cell_range = self._cell_range(level)
+        if cell_range is None:
+            return _LevelIndex((0, 0, -1, -1), np.zeros((0, 0), dtype=np.uint8))
+        x0, y0, x1, y1 = cell_range
+        cols, rows = x1 - x0 + 1, y1 - y0 + 1
+        if cols * rows > self.max_cells:
+            return None
+        x_edges, y_edges = self._cell_edges(level, range(x0, x1 + 1), range(y0, y1 + 1))
+        bboxes = np.empty((rows, cols, 4), dtype=float)
+        bboxes[:, :, 0] = x_edges[:, 0]
+        bboxes[:, :, 2] = x_edges[:, 1]
+        bboxes[:, :, 1] = y_edges[:, 0, None]
+        bboxes[:, :, 3] = y_edges[:, 1, None]
+        states = self._classify(bboxes.reshape(-1, 4)).reshape(rows, cols)
+        return _LevelIndex(cell_range, states)
+
+    def level_index(self, level: int) -> Optional[_LevelIndex]:
+        """
+        Return the index for `level`, or None if the level is not indexed.
+        """
+        try:
+            return self._levels[level]
+        except KeyError:
+            pass
+        with self._lock:
+            if level not in self._levels:
+                self._levels[level] = self._build_level(level)
+            return self._levels[level]
+
+    def states(self, tile_coords) -> np.ndarray:
+        """
+        Return the state of the cell of each tile in `tile_coords`.
+        """
+        if not len(tile_coords):
+            return np.zeros(0, dtype=np.uint8)
+        levels = set(c[2] for c in tile_coords)
+        if len(levels) > 1:
+            states = np.empty(len(tile_coords), dtype=np.uint8)
+            for level in levels:
+                idx = [i for i, c in enumerate(tile_coords) if c[2] == level]
+                states[idx] = self.states([tile_coords[i] for i in idx])
+            return states
+
+        level = tile_coords[0][2]
+        cell_width, cell_height = self._cell_size(level)
+        coords = np.array([c[:2] for c in tile_coords], dtype=np.int64).reshape(-1, 2)
+        cxs = coords[:, 0] // cell_width
+        cys = coords[:, 1] // cell_height
+
+        index = self.level_index(level)
+        if index is not None:
+            return index.lookup(cxs, cys)
+
+        x_edges, y_edges = self._cell_edges(level, cxs, cys)
+        bboxes = np.column_stack([x_edges[:, 0], y_edges[:, 0], x_edges[:, 1], y_edges[:, 1]])
+        return self._classify(bboxes)
+
+    def intersects(self, tile_coords) -> np.ndarray:
+        """
+        Return a boolean array, True for each tile of `tile_coords` that
+        intersects the coverage.
+        """
+        return self.states(tile_coords) != OUTSIDE
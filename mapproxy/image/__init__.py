@@ -17,6 +17,7 @@
 Image and tile manipulation (transforming, merging, etc).
 """
 import io
+import time
 from abc import ABC, abstractmethod
 from io import BytesIO
 from typing import Optional, Union, IO, cast, Any
@@ -26,6 +27,7 @@ from PIL.TiffImagePlugin import ImageFileDirectory_v2, TiffTags
 from mapproxy.image.opts import create_image, ImageFormat
 from mapproxy.config import base_config
 from mapproxy.srs import make_lin_transf, get_epsg_num
+from mapproxy.util import metrics, tracing
 
 import logging
 from functools import reduce
@@ -176,7 +178,11 @@ class ImageResult(BaseImageResult):
             log.debug('file(%s) -> image', self._fname or buf)
 
             try:
-                img = Image.open(buf)
+                with metrics.timer(metrics.IMAGE_DECODE_DURATION):
+                    img = Image.open(buf)
+                    if metrics.registry.enabled:
+                        # decode now to include it in the observed duration
+                        img.load()
             except Exception:
                 self.close_buffers()
                 raise
@@ -359,6 +365,12 @@ def img_has_transparency(img: Image.Image) -> bool:
 
 
 def img_to_buf(img: Image.Image, image_opts, georef=None) -> BytesIO:
+    with tracing.span('mapproxy.encode', format=image_opts.format.ext):
+        return _img_to_buf(img, image_opts, georef=georef)
+
+
+def _img_to_buf(img: Image.Image, image_opts, georef=None) -> BytesIO:
+    start = time.perf_counter()
     defaults: dict[str, Any] = {}
     image_opts = image_opts.copy()
 
@@ -421,6 +433,8 @@ def img_to_buf(img: Image.Image, image_opts, georef=None) -> BytesIO:
 
     img.save(buf, format, **defaults)
     buf.seek(0)
+    if metrics.registry.enabled:
+        metrics.IMAGE_ENCODE_DURATION.observe(time.perf_counter() - start, format)
     return buf
 
 
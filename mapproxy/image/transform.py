@@ -19,6 +19,7 @@ from PIL import Image
 
 from mapproxy.image import ImageResult, image_filter
 from mapproxy.srs import make_lin_transf, _SRS
+from mapproxy.util import tracing
 from mapproxy.util.bbox import bbox_equals, BBOX
 
 
@@ -84,11 +85,12 @@ class ImageTransformer:
         if self._no_transformation_needed(src_img.size, src_bbox, dst_size, dst_bbox):
             return src_img
 
-        if self.src_srs == self.dst_srs:
-            result = self._transform_simple(src_img, src_bbox, dst_size, dst_bbox,
-                                            image_opts)
-        else:
-            result = self._transform(src_img, src_bbox, dst_size, dst_bbox, image_opts)
+        with tracing.span('mapproxy.transform', src_srs=self.src_srs.srs_code, dst_srs=self.dst_srs.srs_code):
+            if self.src_srs == self.dst_srs:
+                result = self._transform_simple(src_img, src_bbox, dst_size, dst_bbox,
+                                                image_opts)
+            else:
+                result = self._transform(src_img, src_bbox, dst_size, dst_bbox, image_opts)
 
         result.cacheable = src_img.cacheable
         return result
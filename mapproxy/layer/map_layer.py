@@ -18,6 +18,9 @@ class MapLayer(ABC):
 
     coverage: Optional[Coverage] = None
 
+    # max number of pixels the layer can return with a single get_map call
+    max_output_pixels: Optional[int] = None
+
     def __init__(self, image_opts=None):
         self.image_opts = image_opts or ImageOptions()
 
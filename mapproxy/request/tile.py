@@ -48,27 +48,35 @@ class TileRequest(object):
         self.format = None
         self.http = request
         self._init_request()
-        self.origin = self.http.args.get('origin')
-        if self.origin not in ('sw', 'nw', None):
-            self.origin = None
-
-    def _init_request(self):
+        self.origin = None
+        # only parse the query string if it can contain the origin
+        query = request.environ.get('QUERY_STRING')
+        if query and 'origin' in query.lower():
+            self.origin = self.http.args.get('origin')
+            if self.origin not in ('sw', 'nw'):
+                self.origin = None
+
+    def _init_request(self, match=None):
         """
         Initialize tile request. Sets ``tile`` and ``layer``.
+        :param match: the match of ``tile_req_re`` for the path, if the
+            path was already matched
         :raise RequestError: if the format is not ``/layer/z/x/y.format``
         """
-        match = self.tile_req_re.search(self.http.path)
+        if match is None:
+            match = self.tile_req_re.match(self.http.path)
         if not match or match.group('begin') != self.req_prefix:
             raise RequestError('invalid request (%s)' % (self.http.path), request=self)
 
-        self.layer = match.group('layer')
+        groups = match.groupdict()
+        self.layer = groups['layer']
         self.dimensions = {}
-        if match.group('layer_spec') is not None:
-            self.dimensions['_layer_spec'] = match.group('layer_spec')
+        if groups['layer_spec'] is not None:
+            self.dimensions['_layer_spec'] = groups['layer_spec']
         if not self.tile:
-            self.tile = tuple([int(match.group(v)) for v in ['x', 'y', 'z']])
+            self.tile = int(groups['x']), int(groups['y']), int(groups['z'])
         if not self.format:
-            self.format = match.group('format')
+            self.format = groups['format']
 
     @property
     def exception_handler(self):
@@ -94,8 +102,14 @@ class TMSRequest(TileRequest):
         self.tile = None
         self.format = None
         self.http = request
-        cap_match = self.capabilities_re.match(request.path)
-        root_match = self.root_request_re.match(request.path)
+        path = request.path
+        # tile requests are the most frequent, match them first
+        match = self.tile_req_re.match(path)
+        if match and match.group('begin') == self.req_prefix:
+            self._init_request(match)
+            return
+        cap_match = self.capabilities_re.match(path)
+        root_match = self.root_request_re.match(path)
         if cap_match:
             if cap_match.group('layer') is not None:
                 self.layer = cap_match.group('layer')
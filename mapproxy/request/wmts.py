@@ -24,6 +24,7 @@ from mapproxy.request.request_params import RequestParams
 from mapproxy.request.tile import TileRequest
 from mapproxy.exception import XMLExceptionHandler
 from mapproxy.template import template_loader
+from mapproxy.util.py import cached_property
 
 import mapproxy.service
 get_template = template_loader(mapproxy.service.__package__, 'templates')
@@ -341,10 +342,13 @@ class WMTS100RestTileRequest(TileRequest):
 
     def __init__(self, request, req_vars, url_converter=None):
         self.http = request
-        self.url = request.base_url
         self.req_vars = req_vars
         self.url_converter = url_converter
 
+    @cached_property
+    def url(self):
+        return self.http.base_url
+
     def make_request(self):
         """
         Initialize tile request. Sets ``tile`` and ``layer`` and ``format``.
@@ -373,10 +377,13 @@ class WMTS100RestFeatureInfoRequest(TileRequest):
 
     def __init__(self, request, req_vars, url_converter=None):
         self.http = request
-        self.url = request.base_url
         self.req_vars = req_vars
         self.url_converter = url_converter
 
+    @cached_property
+    def url(self):
+        return self.http.base_url
+
     def make_request(self):
         """
         Initialize tile request. Sets ``tile`` and ``layer`` and ``format``.
@@ -419,17 +426,15 @@ class WMTS100RestCapabilitiesRequest(object):
 
 
 def wmts_rest_request_parser(url_converter, fi_url_converter, req):
-    tile_req_re = url_converter.regexp()
-    fi_req_re = fi_url_converter.regexp()
-
-    if req.path.endswith(RESTFUL_CAPABILITIES_PATH):
+    path = req.path
+    if path.endswith(RESTFUL_CAPABILITIES_PATH):
         return WMTS100RestCapabilitiesRequest(req)
 
-    match = tile_req_re.search(req.path)
+    match = url_converter.regexp().search(path)
     if not match:
-        match = fi_req_re.search(req.path)
+        match = fi_url_converter.regexp().search(path)
         if not match:
-            raise RequestError('invalid request (%s)' % (req.path))
+            raise RequestError('invalid request (%s)' % (path))
 
         req_vars = match.groupdict()
         return WMTS100RestFeatureInfoRequest(req, req_vars, fi_url_converter)
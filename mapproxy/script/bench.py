@@ -0,0 +1,640 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Load test for MapProxy configurations.
+
+Replays a request log or a synthetic mix of TMS, WMTS and WMS requests
+against the application (in-process or over HTTP) and reports the
+throughput, latency percentiles and cache hit rates.
+"""
+import http.client
+import json
+import logging
+import math
+import optparse
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from io import StringIO
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from mapproxy.config.configuration.base import ConfigurationError
+from mapproxy.grid.tile_grid import tile_grid
+from mapproxy.srs import SRS
+from mapproxy.util import metrics
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LEVELS = '0..12'
+
+SERVICES = ('tms', 'wmts', 'wms')
+
+
+def parse_weights(spec):
+    """
+    Parse a comma separated list of names with optional weights.
+
+    >>> sorted(parse_weights('tms:2, wms').items())
+    [('tms', 2.0), ('wms', 1.0)]
+    """
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition(':')
+        weights[name] = float(weight) if weight else 1.0
+    return weights
+
+
+def parse_level_weights(spec):
+    """
+    Parse a comma separated list of levels or level ranges with
+    optional weights.
+
+    >>> parse_level_weights('0..2, 5:3')
+    {0: 1.0, 1: 1.0, 2: 1.0, 5: 3.0}
+    """
+    weights = {}
+    for part, weight in parse_weights(spec).items():
+        if re.match(r'\d+\.\.\d+$', part):
+            from_level, to_level = part.split('..')
+            levels = range(int(from_level), int(to_level) + 1)
+        else:
+            levels = [int(part)]
+        for level in levels:
+            weights[level] = weight
+    return weights
+
+
+def request_service(path):
+    """
+    Return the service of a request path.
+
+    >>> request_service('/tms/1.0.0/osm/EPSG3857/1/0/0.png')
+    'tms'
+    >>> request_service('/service?SERVICE=WMTS&REQUEST=GetTile')
+    'wmts'
+    >>> request_service('/service?REQUEST=GetMap&LAYERS=osm')
+    'wms'
+    """
+    split = urlsplit(path)
+    handler = split.path.lstrip('/').split('/', 1)[0]
+    if handler in ('tms', 'tiles'):
+        return 'tms'
+    if handler in ('service', 'ows', 'wms'):
+        args = dict((k.lower(), v) for k, v in parse_qsl(split.query))
+        return args.get('service', 'wms').lower()
+    return handler or 'other'
+
+
+_log_request_re = re.compile(r'"GET (\S+) HTTP/[\d.]+"')
+
+
+def parse_request_log(lines):
+    """
+    Return the request paths of GET requests from access log `lines`
+    (common or combined log format), or from lines with a path or URL.
+
+    >>> list(parse_request_log([
+    ...     '127.0.0.1 - - [01/Jan/2025:00:00:00 +0000] "GET /tms/1.0.0/osm/EPSG3857/1/0/0.png HTTP/1.1" 200 512',
+    ...     '127.0.0.1 - - [01/Jan/2025:00:00:00 +0000] "POST /service HTTP/1.1" 200 512',
+    ...     'http://localhost:8080/wmts/osm/webmercator/1/0/0.png',
+    ...     '# comment',
+    ... ]))
+    ['/tms/1.0.0/osm/EPSG3857/1/0/0.png', '/wmts/osm/webmercator/1/0/0.png']
+    """
+    for line in lines:
+        line = line.strip()
+        match = _log_request_re.search(line)
+        if match:
+            path = match.group(1)
+        elif line.startswith('/'):
+            path = line
+        elif line.startswith(('http://', 'https://')):
+            split = urlsplit(line)
+            path = split.path + ('?' + split.query if split.query else '')
+        else:
+            continue
+        yield path
+
+
+class Target(object):
+    """
+    A layer of a service. Requests for the layer are generated from tiles
+    of `grid` within `bbox`.
+    """
+    service: str = ''
+
+    def __init__(self, name, grid, bbox):
+        self.name = name
+        self.grid = grid
+        self.bbox = bbox
+
+    def path(self, tile_coord) -> Optional[str]:
+        """
+        Return the request path for `tile_coord` or None if the tile is not
+        available for this service.
+        """
+        raise NotImplementedError
+
+
+class TMSTarget(Target):
+    service = 'tms'
+
+    def __init__(self, tile_layer):
+        Target.__init__(self, tile_layer.name, tile_layer.grid.grid, tile_layer.extent.bbox)
+        self.tile_layer = tile_layer
+
+    def path(self, tile_coord):
+        if self.grid.origin not in ('ll', 'sw', None):
+            tile_coord = self.grid.flip_tile_coord(tile_coord)
+        x, y, z = self.tile_layer.grid.external_tile_coord(tile_coord, use_profiles=True)
+        if z < 0 or self.tile_layer.grid.internal_level(z) != tile_coord[2]:
+            return None
+        return '/tms/1.0.0/%s/%d/%d/%d.%s' % (
+            '/'.join(self.tile_layer.md['name_path']), z, x, y, self.tile_layer.format)
+
+
+class WMTSTarget(Target):
+    """
+    WMTS layer for the RESTful service with `template` or for the KVP
+    service if `template` is None.
+    """
+    service = 'wmts'
+
+    def __init__(self, tile_layer, template=None):
+        Target.__init__(self, tile_layer.name, tile_layer.grid.grid, tile_layer.extent.bbox)
+        self.tile_layer = tile_layer
+        self.template = template
+
+    def path(self, tile_coord):
+        if self.grid.origin not in ('ul', 'nw'):
+            tile_coord = self.grid.flip_tile_coord(tile_coord)
+        x, y, z = tile_coord
+        if self.template is None:
+            return '/service?' + urlencode([
+                ('SERVICE', 'WMTS'), ('REQUEST', 'GetTile'), ('VERSION', '1.0.0'),
+                ('LAYER', self.name), ('STYLE', 'default'), ('TILEMATRIXSET', self.grid.name),
+                ('TILEMATRIX', z), ('TILEROW', y), ('TILECOL', x),
+                ('FORMAT', self.tile_layer.format_mime_type),
+            ])
+        values = {
+            'Layer': self.name, 'TileMatrixSet': self.grid.name, 'TileMatrix': z,
+            'TileCol': x, 'TileRow': y, 'Format': self.tile_layer.format, 'Style': 'default',
+        }
+        # dimensions use the default value
+        return '/wmts' + re.sub(r'\{(\w+)\}', lambda m: str(values.get(m.group(1), 'default')),
+                                self.template.replace('{{', '{').replace('}}', '}'))
+
+
+class WMSTarget(Target):
+    service = 'wms'
+
+    def path(self, tile_coord):
+        bbox = self.grid.tile_bbox(tile_coord)
+        width, height = self.grid.tile_size
+        return '/service?' + urlencode([
+            ('SERVICE', 'WMS'), ('REQUEST', 'GetMap'), ('VERSION', '1.1.1'),
+            ('LAYERS', self.name), ('STYLES', ''), ('SRS', self.grid.srs.srs_code),
+            ('BBOX', ','.join(repr(float(v)) for v in bbox)),
+            ('WIDTH', width), ('HEIGHT', height), ('FORMAT', 'image/png'),
+        ])
+
+
+def _wms_grid(wms_server):
+    for srs in ('EPSG:3857', 'EPSG:900913'):
+        if srs in wms_server.srs:
+            return tile_grid(srs)
+    return None
+
+
+def request_targets(app):
+    """
+    Return the `Target` lists of all configured tile and WMS services of
+    `app` by service.
+    """
+    targets: dict[str, list[Target]] = defaultdict(list)
+    tms = app.handlers.get('tms')
+    if tms is not None:
+        targets['tms'] = [TMSTarget(layer) for layer in tms.layers.values()]
+
+    ows = app.handlers.get('service')
+    ows_services = ows.services if ows is not None else {}
+
+    wmts = app.handlers.get('wmts') or ows_services.get('wmts')
+    if wmts is not None:
+        template = getattr(wmts, 'template', None)
+        for wmts_layer in wmts.layers.values():
+            for tile_layer in wmts_layer.layers.values():
+                targets['wmts'].append(WMTSTarget(tile_layer, template=template))
+
+    wms = ows_services.get('wms')
+    if wms is not None:
+        default_grid = _wms_grid(wms)
+        for name, layer in wms.layers.items():
+            if default_grid is not None:
+                grid = default_grid
+            else:
+                srs = SRS(next(iter(wms.srs)))
+                grid = tile_grid(srs, bbox=layer.extent.bbox_for(srs), bbox_srs=srs)
+            targets['wms'].append(WMSTarget(name, grid, layer.extent.bbox_for(grid.srs)))
+    return dict((service, t) for service, t in targets.items() if t)
+
+
+class RequestMix(object):
+    """
+    Generates a synthetic request mix as random walk over the tiles of the
+    `targets`. With a probability of `locality`, the next request is for
+    a neighbour of the last tile (same level or one level up or down),
+    otherwise for a random tile of a random target.
+
+    :param targets: `Target` lists by service
+    :param service_weights: the weight of each service in `targets`
+    :param level_weights: the weight of each level
+    """
+
+    def __init__(self, targets, service_weights, level_weights, locality=0.8, seed=None):
+        self.targets = targets
+        self.services = [s for s in service_weights if s in targets]
+        self.service_weights = [service_weights[s] for s in self.services]
+        self.level_weights = level_weights
+        self.locality = locality
+        self.random = random.Random(seed)
+        self._current = None
+
+    def _levels(self, grid):
+        return [level for level in self.level_weights if level < grid.levels]
+
+    def _random_tile(self):
+        service = self.random.choices(self.services, self.service_weights)[0]
+        target = self.random.choice(self.targets[service])
+        levels = self._levels(target.grid)
+        if not levels:
+            return target, None
+        weights = [self.level_weights[lvl] for lvl in levels]
+        level = self.random.choices(levels, weights)[0]
+        minx, miny, maxx, maxy = target.bbox
+        x = self.random.uniform(minx, maxx)
+        y = self.random.uniform(miny, maxy)
+        return target, target.grid.limit_tile(target.grid.tile_coord_for_point(x, y, level))
+
+    def _neighbour_tile(self):
+        target, (x, y, z) = self._current
+        grid = target.grid
+        if self.random.random() < 0.25:
+            # zoom to a random point of the current tile
+            level = z + self.random.choice((-1, 1))
+            if level not in self.level_weights or not 0 <= level < grid.levels:
+                return target, None
+            minx, miny, maxx, maxy = grid.tile_bbox((x, y, z))
+            px = self.random.uniform(minx, maxx)
+            py = self.random.uniform(miny, maxy)
+            return target, grid.limit_tile(grid.tile_coord_for_point(px, py, level))
+        dx, dy = self.random.choice([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+        return target, grid.limit_tile((x + dx, y + dy, z))
+
+    def next_path(self):
+        for _ in range(100):
+            if self._current is not None and self.random.random() < self.locality:
+                target, tile_coord = self._neighbour_tile()
+            else:
+                target, tile_coord = self._random_tile()
+            path = target.path(tile_coord) if tile_coord is not None else None
+            if path is not None:
+                self._current = target, tile_coord
+                return path
+            self._current = None
+        raise ValueError('unable to generate requests for the configured levels')
+
+
+class WSGIClient(object):
+    """
+    Sends requests to the WSGI `app` in-process.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def fetch(self, path):
+        split = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': split.path,
+            'QUERY_STRING': split.query,
+            'wsgi.errors': StringIO(),
+        }
+        setup_testing_defaults(environ)
+        status: list[int] = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split(' ', 1)[0]))
+
+        resp = self.app(environ, start_response)
+        try:
+            body = b''.join(resp)
+        finally:
+            if hasattr(resp, 'close'):
+                resp.close()
+        return status[0], body
+
+
+class HTTPClient(object):
+    """
+    Sends requests to a MapProxy at `url` with one keep-alive connection
+    for each thread.
+    """
+
+    def __init__(self, url, timeout=60):
+        split = urlsplit(url)
+        self.scheme = split.scheme
+        self.netloc = split.netloc
+        self.prefix = split.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            conn = self._local.conn = conn_class(self.netloc, timeout=self.timeout)
+        return conn
+
+    def fetch(self, path):
+        conn = self._connection()
+        try:
+            conn.request('GET', self.prefix + path)
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        except (OSError, http.client.HTTPException) as ex:
+            log.debug('request for %s failed: %s', path, ex)
+            conn.close()
+            self._local.conn = None
+            return 0, b''
+
+
+def percentile(sorted_values, p):
+    """
+    Return the `p` percentile (nearest-rank) of `sorted_values`.
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4], 99)
+    4
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def run_requests(client, next_paths, num_requests, concurrency):
+    """
+    Send `num_requests` requests with `concurrency` threads. `next_paths`
+    is a list with a function for each thread that returns the next
+    request path, or None if there are no more requests.
+
+    :returns: the duration and a list with service, duration, status and
+        size of each request
+    """
+    records: list[tuple] = []
+    remaining = [num_requests]
+    lock = threading.Lock()
+
+    def worker(next_path):
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                path = next_path()
+            if path is None:
+                return
+            start = time.perf_counter()
+            status, body = client.fetch(path)
+            records.append((request_service(path), time.perf_counter() - start, status, len(body)))
+
+    threads = [threading.Thread(target=worker, args=(next_paths[i], )) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, records
+
+
+def cache_tiles_state():
+    """
+    Return the cache tile counts of this process by cache and result.
+    """
+    return dict((tuple(json.loads(labels)), value) for labels, value in metrics.CACHE_TILES.state().items())
+
+
+_cache_tiles_sample_re = re.compile(
+    r'^%s\{cache="((?:[^"\\]|\\.)*)",result="(\w+)"\} (\S+)$' % metrics.CACHE_TILES.name)
+
+
+def parse_cache_tiles(text):
+    """
+    Return the cache tile counts by cache and result from the output of
+    the metrics service.
+
+    >>> parse_cache_tiles('mapproxy_cache_tiles_total{cache="osm",result="hit"} 12\\n')
+    {('osm', 'hit'): 12.0}
+    """
+    result = {}
+    for line in text.splitlines():
+        match = _cache_tiles_sample_re.match(line)
+        if match:
+            cache = match.group(1).replace('\\"', '"').replace('\\\\', '\\')
+            result[(cache, match.group(2))] = float(match.group(3))
+    return result
+
+
+def summarize(duration, records, cache_tiles=None):
+    """
+    Return throughput, latency percentiles (in milliseconds) by service
+    and the cache hit rates by cache.
+    """
+    by_service: dict[str, list] = defaultdict(list)
+    for record in records:
+        by_service[record[0]].append(record)
+    by_service['all'] = records
+
+    services = {}
+    for service, service_records in by_service.items():
+        durations = sorted(r[1] * 1000 for r in service_records)
+        services[service] = {
+            'requests': len(service_records),
+            'errors': sum(1 for r in service_records if not 200 <= r[2] < 400),
+            'bytes': sum(r[3] for r in service_records),
+            'requests_per_second': len(service_records) / duration if duration else 0.0,
+            'latency_ms': dict(
+                ('p%d' % p, round(percentile(durations, p), 3)) for p in (50, 90, 95, 99)
+            ),
+        }
+        services[service]['latency_ms']['max'] = round(durations[-1], 3) if durations else 0.0
+
+    summary = {'duration': duration, 'services': services}
+    if cache_tiles is not None:
+        caches = defaultdict(lambda: {'hit': 0, 'miss': 0, 'stale': 0})
+        for (cache, result), count in cache_tiles.items():
+            if count:
+                caches[cache][result] = int(count)
+        for counts in caches.values():
+            total = counts['hit'] + counts['miss'] + counts['stale']
+            counts['hit_rate'] = counts['hit'] / total if total else 0.0
+        summary['caches'] = dict(sorted(caches.items()))
+    return summary
+
+
+def format_summary(summary):
+    lines = []
+    all_requests = summary['services']['all']
+    lines.append('%d requests in %.2fs, %.1f requests/s, %d errors' % (
+        all_requests['requests'], summary['duration'], all_requests['requests_per_second'],
+        all_requests['errors']))
+    lines.append('')
+    lines.append('%-8s %8s %8s %10s %10s %10s %10s %10s' % (
+        'service', 'requests', 'errors', 'p50 ms', 'p90 ms', 'p95 ms', 'p99 ms', 'max ms'))
+    for service, s in sorted(summary['services'].items(), key=lambda x: (x[0] == 'all', x[0])):
+        lat = s['latency_ms']
+        lines.append('%-8s %8d %8d %10.1f %10.1f %10.1f %10.1f %10.1f' % (
+            service, s['requests'], s['errors'], lat['p50'], lat['p90'], lat['p95'], lat['p99'], lat['max']))
+    if summary.get('caches'):
+        lines.append('')
+        lines.append('%-30s %8s %8s %8s %9s' % ('cache', 'hit', 'miss', 'stale', 'hit rate'))
+        for cache, c in summary['caches'].items():
+            lines.append('%-30s %8d %8d %8d %8.1f%%' % (cache, c['hit'], c['miss'], c['stale'], c['hit_rate'] * 100))
+    return '\n'.join(lines)
+
+
+def bench_command(args=None):
+    parser = optparse.OptionParser("%prog bench [options] mapproxy_conf")
+    parser.add_option("-f", "--mapproxy-conf", dest="mapproxy_conf",
+                      help="MapProxy configuration")
+    parser.add_option("-n", "--requests", type="int", default=1000,
+                      help="number of requests [1000]")
+    parser.add_option("-c", "--concurrency", type="int", default=4,
+                      help="number of concurrent requests [4]")
+    parser.add_option("--url",
+                      help="base URL of a running MapProxy, requests are handled in-process otherwise")
+    parser.add_option("--log", dest="request_log",
+                      help="replay the GET requests of this access log or file with request paths")
+    parser.add_option("--services",
+                      help="services and weights of the synthetic request mix, e.g. tms:2,wmts,wms "
+                      "[all configured services]")
+    parser.add_option("--levels", default=DEFAULT_LEVELS,
+                      help="levels and weights of the synthetic request mix, e.g. 0..10,11..14:2 [%s]"
+                      % DEFAULT_LEVELS)
+    parser.add_option("--locality", type="float", default=0.8,
+                      help="probability that a synthetic request is for a neighbour of the last tile [0.8]")
+    parser.add_option("--seed", type="int", default=1,
+                      help="random seed of the synthetic request mix [1]")
+    parser.add_option("--json", dest="json_file",
+                      help="write results as JSON to this file")
+
+    from mapproxy.script.util import setup_logging
+    setup_logging(logging.WARN)
+
+    if args:
+        args = args[1:]  # remove script name
+
+    (options, args) = parser.parse_args(args)
+
+    if not options.mapproxy_conf:
+        if len(args) != 1:
+            parser.print_help()
+            sys.exit(1)
+        else:
+            options.mapproxy_conf = args[0]
+
+    if options.concurrency < 1 or options.requests < 1:
+        print('ERROR: --requests and --concurrency need to be positive', file=sys.stderr)
+        sys.exit(1)
+
+    from mapproxy.wsgiapp import make_wsgi_app
+    try:
+        app = make_wsgi_app(options.mapproxy_conf)
+    except IOError as e:
+        print('ERROR: ', "%s: '%s'" % (e.strerror, e.filename), file=sys.stderr)
+        sys.exit(2)
+    except ConfigurationError:
+        print('ERROR: invalid configuration (see above)', file=sys.stderr)
+        sys.exit(2)
+
+    if options.request_log:
+        with open(options.request_log) as f:
+            paths = iter(list(parse_request_log(f)))
+        next_paths = [lambda: next(paths, None)] * options.concurrency
+    else:
+        targets = request_targets(app)
+        if options.services:
+            service_weights = parse_weights(options.services)
+            unknown = set(service_weights) - set(SERVICES)
+            if unknown:
+                print('ERROR: unknown services: %s' % ', '.join(sorted(unknown)), file=sys.stderr)
+                sys.exit(1)
+        else:
+            service_weights = dict.fromkeys(SERVICES, 1.0)
+        if not any(s in targets for s in service_weights):
+            print('ERROR: found no layers for services: %s' % ', '.join(sorted(service_weights)), file=sys.stderr)
+            sys.exit(2)
+        level_weights = parse_level_weights(options.levels)
+        next_paths = [
+            RequestMix(targets, service_weights, level_weights, locality=options.locality,
+                       seed=options.seed + i).next_path
+            for i in range(options.concurrency)
+        ]
+
+    if options.url:
+        client = HTTPClient(options.url)
+    else:
+        client = WSGIClient(app)
+        # record cache hits, even without the metrics service
+        app.base_config.metrics_enabled = True
+        if not metrics.registry.enabled:
+            metrics.registry.enable()
+
+    def cache_tiles():
+        if not options.url:
+            return cache_tiles_state()
+        if 'metrics' not in app.handlers:
+            return None
+        # from the metrics service of the running MapProxy
+        status, body = client.fetch('/metrics')
+        if status != 200:
+            print('WARN: unable to get cache hit rates from metrics service (status %d)' % status,
+                  file=sys.stderr)
+            return None
+        return parse_cache_tiles(body.decode('utf-8'))
+
+    before = cache_tiles()
+    duration, records = run_requests(client, next_paths, options.requests, options.concurrency)
+    after = cache_tiles()
+
+    cache_tiles_diff = None
+    if before is not None and after is not None:
+        cache_tiles_diff = dict((key, value - before.get(key, 0)) for key, value in after.items())
+
+    summary = summarize(duration, records, cache_tiles_diff)
+    summary['concurrency'] = options.concurrency
+    print(format_summary(summary))
+
+    if options.json_file:
+        with open(options.json_file, 'w') as f:
+            json.dump(summary, f, indent=2)
@@ -20,6 +20,7 @@ import optparse
 import os.path
 import re
 import sys
+import time
 from collections import OrderedDict
 
 from mapproxy.cache.compact import CompactCacheV1, CompactCacheV2
@@ -27,6 +28,8 @@ from mapproxy.cache.tile import Tile
 from mapproxy.config import local_base_config
 from mapproxy.config.loader import load_configuration
 from mapproxy.config.configuration.base import ConfigurationError
+from mapproxy.seed.util import ProgressStore
+from mapproxy.util.lock import FileLock
 
 import logging
 log = logging.getLogger('mapproxy.defrag')
@@ -51,6 +54,16 @@ def defrag_command(args=None):
     parser.add_option("--caches", dest="cache_names", metavar='cache1,cache2,...',
                       help="only defragment the named caches")
 
+    parser.add_option("--online", action="store_true", default=False,
+                      help="Lock each bundle while it is rewritten, so that MapProxy can use the cache concurrently"
+                           " (version 2 caches only)")
+
+    parser.add_option("--max-mb-per-sec", type=float, default=None,
+                      help="Limit the rewrite rate to reduce the I/O load")
+
+    parser.add_option("--progress-file", dest="progress_file", default=None,
+                      help="Store the progress in this file to continue an interrupted defragmentation")
+
     from mapproxy.script.util import setup_logging
     import logging
     setup_logging(logging.INFO, format="[%(asctime)s] %(msg)s")
@@ -91,17 +104,28 @@ def defrag_command(args=None):
         else:
             defrag_caches = None
 
+        progress_store = None
+        if options.progress_file:
+            progress_store = ProgressStore(options.progress_file)
+
         for name, caches in available_caches.items():
             if defrag_caches and name not in defrag_caches:
                 continue
             for cache in caches:
                 logger = DefragLog(name)
-                defrag_compact_cache(cache,
-                                     min_percent=options.min_percent/100,
-                                     min_bytes=options.min_mb*1024*1024,
-                                     dry_run=options.dry_run,
-                                     log_progress=logger,
-                                     )
+                max_bytes_per_sec = None
+                if options.max_mb_per_sec:
+                    max_bytes_per_sec = options.max_mb_per_sec*1024*1024
+                level_stats = defrag_compact_cache(cache,
+                                                   min_percent=options.min_percent/100,
+                                                   min_bytes=options.min_mb*1024*1024,
+                                                   dry_run=options.dry_run,
+                                                   log_progress=logger,
+                                                   online=options.online,
+                                                   max_bytes_per_sec=max_bytes_per_sec,
+                                                   progress_store=progress_store,
+                                                   )
+                logger.log_levels(level_stats)
 
 
 def bundle_offset(fname):
@@ -118,6 +142,16 @@ def bundle_offset(fname):
         return c, r
 
 
+def bundle_level(fname):
+    """
+    >>> bundle_level("path/to/L05/R0000C0000.bundle")
+    5
+    """
+    match = re.search(r'L(\d{2,})[/\\]R[A-F0-9]{4,}C[A-F0-9]{4,}.bundle$', fname, re.IGNORECASE)
+    if match:
+        return int(match.group(1))
+
+
 class DefragLog(object):
     def __init__(self, cache_name):
         self.cache_name = cache_name
@@ -132,18 +166,64 @@ class DefragLog(object):
             msg += " - skipping"
         log.info(msg)
 
+    def log_levels(self, level_stats):
+        for level, stats in sorted(level_stats.items()):
+            log.info("%s: level %2d: %d bundles, %dkb, fragmentation %dkb, %dkb reclaimed" % (
+                self.cache_name, level, stats['bundles'], stats['size']/1024,
+                stats['fragmentation_bytes']/1024, stats['reclaimed_bytes']/1024,
+            ))
+
+
+def defrag_compact_cache(cache, min_percent=0.1, min_bytes=1024*1024, log_progress=None, dry_run=False,
+                         online=False, max_bytes_per_sec=None, progress_store=None):
+    """
+    Defragment all bundle files of the compact `cache`.
+
+    With `online`, each bundle is rewritten while holding the bundle lock,
+    so that the cache can be used concurrently. This is only supported for
+    version 2 caches, as readers of version 1 caches do not lock the bundle
+    and could read the new bundle file with the old index file. `max_bytes_per_sec` limits
+    the rewrite rate and `progress_store` (a ProgressStore) records the last
+    processed bundle to continue an interrupted run.
+
+    Returns fragmentation statistics for each level as a dict with
+    ``bundles``, ``size``, ``fragmentation_bytes`` and ``reclaimed_bytes``.
+    """
+    if online and isinstance(cache, CompactCacheV1):
+        log.warning('skipping %s: online defragmentation is only supported for version 2 compact caches',
+                    cache.cache_dir)
+        return {}
+
+    bundles = sorted(glob.glob(os.path.join(cache.cache_dir, 'L??', 'R????C????.bundle')))
+
+    progress_id = 'defrag-' + cache.cache_dir
+    last_bundle = None
+    if progress_store is not None:
+        last_bundle = progress_store.get(progress_id)
 
-def defrag_compact_cache(cache, min_percent=0.1, min_bytes=1024*1024, log_progress=None, dry_run=False):
-    bundles = glob.glob(os.path.join(cache.cache_dir, 'L??', 'R????C????.bundle'))
+    level_stats = {}
+    start_time = time.time()
+    rewritten_bytes = 0
 
     for i, bundle_file in enumerate(bundles):
+        if last_bundle is not None and bundle_file <= last_bundle:
+            continue
+
         offset = bundle_offset(bundle_file)
-        b = cache.bundle_class(bundle_file.rstrip('.bundle'), offset)
+        base_filename = bundle_file[:-len('.bundle')]
+        b = cache.bundle_class(base_filename, offset)
         size, file_size = b.size()
 
         defrag = 1 - float(size) / file_size
         defrag_bytes = file_size - size
 
+        stats = level_stats.setdefault(bundle_level(bundle_file), {
+            'bundles': 0, 'size': 0, 'fragmentation_bytes': 0, 'reclaimed_bytes': 0,
+        })
+        stats['bundles'] += 1
+        stats['size'] += file_size
+        stats['fragmentation_bytes'] += defrag_bytes
+
         skip = False
         if defrag < min_percent or defrag_bytes < min_bytes:
             skip = True
@@ -157,32 +237,73 @@ def defrag_compact_cache(cache, min_percent=0.1, min_bytes=1024*1024, log_progre
                 defrag=not skip,
             )
 
-        if skip or dry_run:
-            continue
-
-        tmp_bundle = os.path.join(cache.cache_dir, 'tmp_defrag')
-        defb = cache.bundle_class(tmp_bundle, offset)
-        stored_tiles = False
-
-        for y in range(128):
-            tiles = [Tile((x, y, 0)) for x in range(128)]
-            b.load_tiles(tiles)
-            tiles = [t for t in tiles if t.image_result]
-            if tiles:
-                stored_tiles = True
-                defb.store_tiles(tiles)
-
-        # remove first
-        # - in case bundle is empty
-        # - windows does not support rename to existing files
-        if os.path.exists(bundle_file):
-            os.remove(bundle_file)
-        if os.path.exists(bundle_file[:-1] + 'x'):
-            os.remove(bundle_file[:-1] + 'x')
-
-        if stored_tiles:
-            os.rename(tmp_bundle + '.bundle', bundle_file)
-            if os.path.exists(tmp_bundle + '.bundlx'):
-                os.rename(tmp_bundle + '.bundlx', bundle_file[:-1] + 'x')
-            if os.path.exists(tmp_bundle + '.lck'):
-                os.unlink(tmp_bundle + '.lck')
+        if not skip and not dry_run:
+            if online:
+                with FileLock(b.lock_filename, directory_permissions=cache.directory_permissions,
+                              file_permissions=cache.file_permissions, remove_on_unlock=True):
+                    new_size = _defrag_bundle(cache, b, base_filename, offset,
+                                              tmp_bundle=base_filename + '.defrag-tmp')
+            else:
+                new_size = _defrag_bundle(cache, b, base_filename, offset,
+                                          tmp_bundle=os.path.join(cache.cache_dir, 'tmp_defrag'))
+            stats['reclaimed_bytes'] += max(0, file_size - new_size)
+            rewritten_bytes += new_size
+
+        if progress_store is not None and not dry_run:
+            progress_store.add(progress_id, bundle_file)
+            progress_store.write()
+
+        if max_bytes_per_sec and rewritten_bytes:
+            # sleep until we are below the rate limit
+            wait = rewritten_bytes / max_bytes_per_sec - (time.time() - start_time)
+            if wait > 0:
+                time.sleep(wait)
+
+    if progress_store is not None and not dry_run:
+        # cache is complete, do not skip any bundles on the next run
+        progress_store.status.pop(progress_id, None)
+        progress_store.write()
+
+    return level_stats
+
+
+def _defrag_bundle(cache, b, base_filename, offset, tmp_bundle):
+    """
+    Copy all tiles from bundle `b` into `tmp_bundle` and replace the
+    original bundle files. Returns the size of the new bundle file.
+    """
+    bundle_file = base_filename + '.bundle'
+    index_file = base_filename + '.bundlx'
+    defb = cache.bundle_class(tmp_bundle, offset)
+    stored_tiles = False
+
+    for y in range(128):
+        tiles = [Tile((x, y, 0)) for x in range(128)]
+        b.load_tiles(tiles)
+        tiles = [t for t in tiles if t.image_result]
+        if tiles:
+            stored_tiles = True
+            defb.store_tiles(tiles)
+
+    if not stored_tiles:
+        # remove empty bundle
+        for fname in (bundle_file, index_file):
+            if os.path.exists(fname):
+                os.remove(fname)
+        return 0
+
+    if sys.platform == 'win32':
+        # windows does not support rename to existing files
+        for fname in (bundle_file, index_file):
+            if os.path.exists(fname):
+                os.remove(fname)
+
+    # version 2 bundles are self-indexed and replaced with a single atomic rename,
+    # readers with open bundles keep reading the old file
+    os.replace(tmp_bundle + '.bundle', bundle_file)
+    if os.path.exists(tmp_bundle + '.bundlx'):
+        os.replace(tmp_bundle + '.bundlx', index_file)
+    if os.path.exists(tmp_bundle + '.lck'):
+        os.unlink(tmp_bundle + '.lck')
+
+    return os.path.getsize(bundle_file)
@@ -32,6 +32,8 @@ from mapproxy.config.configuration.grid import GridConfiguration
 from mapproxy.util.coverage import BBOXCoverage
 from mapproxy.seed.util import ProgressLog, format_bbox
 from mapproxy.seed.seeder import SeedTask, seed_task
+from mapproxy.seed.transfer import TileTransfer, cache_tile_coords
+from mapproxy.source.tile import CacheSource
 from mapproxy.config import spec as conf_spec
 from mapproxy.util.ext.dictspec.validator import validate, ValidationError
 
@@ -115,6 +117,36 @@ def supports_tiled_access(mgr):
     return False
 
 
+def same_tile_coords(grid, other, levels):
+    """
+    Return ``True`` if the tile coordinates of `grid` and `other` address
+    the same tiles for all `levels`.
+    """
+    if (grid.srs != other.srs or grid.tile_size != other.tile_size
+            or grid.origin != other.origin or grid.bbox != other.bbox):
+        return False
+    if levels[-1] >= other.levels:
+        return False
+    return all(grid.resolution(level) == other.resolution(level) for level in levels)
+
+
+def bulk_transfer_cache(mgr, levels):
+    """
+    Return the cache of the source tile manager if the tiles of `mgr` can
+    be copied from the source cache as they are, or ``None``.
+    """
+    if len(mgr.sources) != 1 or not isinstance(mgr.sources[0], CacheSource):
+        return None
+    src_mgr = mgr.sources[0].tile_manager
+    if src_mgr.format != mgr.format:
+        return None
+    if src_mgr.rescale_tiles or src_mgr.dimensions or src_mgr.cache.coverage:
+        return None
+    if not same_tile_coords(mgr.grid, src_mgr.grid, levels):
+        return None
+    return src_mgr.cache
+
+
 def format_export_task(task, custom_grid):
     info = []
     if custom_grid:
@@ -160,6 +192,10 @@ def export_command(args=None):
                       action='store_true', default=False,
                       help="if missing tiles should be fetched from the sources")
 
+    parser.add_option("--bulk",
+                      action='store_true', default=False,
+                      help="copy the stored tiles directly from the source cache")
+
     parser.add_option("--force",
                       action='store_true', default=False,
                       help="overwrite/append to existing --dest files/directories")
@@ -330,9 +366,31 @@ def export_command(args=None):
     print(format_export_task(task, custom_grid=custom_grid))
 
     logger = ProgressLog(verbose=options.quiet == 0, silent=options.quiet >= 2)
+
+    src_cache = None
+    if options.bulk:
+        if not options.fetch_missing_tiles:
+            src_cache = bulk_transfer_cache(mgr, levels)
+        if src_cache is None:
+            print('ERROR: --bulk requires a cache as --source with the same grid and format'
+                  ' and without --fetch-missing-tiles', file=sys.stderr)
+            sys.exit(2)
+
     try:
-        seed_task(task, progress_logger=logger, dry_run=options.dry_run,
-                  concurrency=options.concurrency)
+        if src_cache is not None:
+            # copy the stored tiles without going through the tile manager
+            transfer = TileTransfer(src_cache, mgr.cache, readers=options.concurrency,
+                                    writers=options.concurrency, dry_run=options.dry_run)
+            result = transfer.transfer(cache_tile_coords(src_cache, tile_grid, levels, seed_coverage),
+                                       progress_logger=logger if options.quiet == 0 else None)
+            if options.quiet < 2:
+                print('copied %d tiles' % (result.copied, ))
+            if result.failed:
+                print('ERROR: unable to store %d tiles' % (result.failed, ), file=sys.stderr)
+                sys.exit(1)
+        else:
+            seed_task(task, progress_logger=logger, dry_run=options.dry_run,
+                      concurrency=options.concurrency)
     except KeyboardInterrupt:
         print('stopping...', file=sys.stderr)
         sys.exit(2)
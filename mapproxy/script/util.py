@@ -26,6 +26,7 @@ import logging
 from logging.config import fileConfig
 
 from mapproxy.config.loader import load_plugins
+from mapproxy.script.bench import bench_command
 from mapproxy.script.conf.app import config_command
 from mapproxy.script.defrag import defrag_command
 from mapproxy.script.export import export_command
@@ -58,6 +59,11 @@ def serve_develop_command(args):
                       dest="debug",
                       help="Enable debug mode")
     parser.add_option("--log-config", dest="log_config", help="Path to a log config file")
+    parser.add_option("--profile", default=False, action='store_true',
+                      dest="profile",
+                      help="Sample request threads and write collapsed stacks and speedscope files")
+    parser.add_option("--profile-dir", dest="profile_dir", default='profiles',
+                      help="Output directory for --profile [./profiles]")
     options, args = parser.parse_args(args)
 
     if len(args) != 2:
@@ -93,6 +99,12 @@ def serve_develop_command(args):
 
     extra_files = app.config_files.keys()
 
+    if options.profile:
+        from mapproxy.util import profiler
+        profile_dir = os.path.abspath(options.profile_dir)
+        profiler.configure(profile_dir, start=True, all_apps=True)
+        print('Writing profiles to %s' % profile_dir)
+
     if options.debug:
         try:
             from repoze.profile import ProfileMiddleware
@@ -330,6 +342,10 @@ commands = {
         'func': gridconf_from_ogcapitilematrixset_command,
         'help': 'Export OGC API TileMatrixSet as MapProxy grid configuration.'
     },
+    'bench': {
+        'func': bench_command,
+        'help': 'Load test a configuration with recorded or synthetic requests.'
+    },
 }
 
 
@@ -0,0 +1,98 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Select popular tiles from tile access logs (see ``mapproxy.service.log``).
+"""
+import re
+from collections import Counter, defaultdict
+
+TILE_ACCESS_RE = re.compile(r'(?P<identifier>\S+) (?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\s*$')
+
+
+def read_tile_access_logs(filenames):
+    """
+    Count the requests for each tile.
+    Returns a dict with the tile counts for each tile manager identifier.
+    The tile counts are a dict with a Counter of (x, y, z) coords for each level.
+    """
+    identifiers = defaultdict(lambda: defaultdict(Counter))
+    for filename in filenames:
+        with open(filename, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                m = TILE_ACCESS_RE.search(line)
+                if not m:
+                    continue
+                z = int(m.group('z'))
+                identifiers[m.group('identifier')][z][int(m.group('x')), int(m.group('y')), z] += 1
+    return dict((identifier, dict(levels)) for identifier, levels in identifiers.items())
+
+
+def popular_tiles(tile_counts, levels, traffic_share=0.95):
+    """
+    Return the most requested tiles that account for `traffic_share` of all
+    requests to the `levels`, ordered by the number of requests.
+
+    >>> counts = {1: Counter({(0, 0, 1): 8, (1, 0, 1): 1, (0, 1, 1): 1}), 2: Counter({(0, 0, 2): 10})}
+    >>> popular_tiles(counts, [1, 2], traffic_share=0.9)
+    [((0, 0, 2), 10), ((0, 0, 1), 8)]
+    >>> popular_tiles(counts, [1], traffic_share=0.9)
+    [((0, 0, 1), 8), ((1, 0, 1), 1)]
+    """
+    counts = Counter()
+    for level in levels:
+        counts.update(tile_counts.get(level, {}))
+    total = sum(counts.values())
+    tiles = []
+    requests = 0
+    for coord, hits in counts.most_common():
+        if requests >= total * traffic_share:
+            break
+        tiles.append((coord, hits))
+        requests += hits
+    return tiles
+
+
+def seed_tile_coords(tiles, tile_mgr, levels, child_levels=0, coverage=None):
+    """
+    Return the tile coords to seed for the popular `tiles` (list of
+    (coord, hits)), including `child_levels` levels of children.
+    Coords are ordered by popularity, children inherit the share of the
+    requests of their parent. Returns the main tile for meta tiles.
+    """
+    grid = tile_mgr.grid
+    levels = set(levels)
+    scores = Counter()
+    for coord, hits in tiles:
+        scores[coord] += hits
+        parent_bbox = grid.tile_bbox(coord)
+        for level in range(coord[2] + 1, coord[2] + 1 + child_levels):
+            if level not in levels or level >= grid.levels:
+                continue
+            _bbox, _size, children = grid.get_affected_level_tiles(parent_bbox, level)
+            children = [child for child in children if child is not None]
+            for child in children:
+                scores[child] += hits / len(children)
+
+    meta_scores = Counter()
+    for coord, score in scores.items():
+        if coord[2] not in levels:
+            continue
+        if coverage and not coverage.intersects(grid.tile_bbox(coord), grid.srs):
+            continue
+        if tile_mgr.meta_grid and not tile_mgr.rescale_tiles:
+            coord = tile_mgr.meta_grid.main_tile(coord)
+        meta_scores[coord] += score
+    return [coord for coord, _score in meta_scores.most_common()]
@@ -16,15 +16,23 @@
 from __future__ import print_function
 
 import os
+import time
+from functools import lru_cache
 from itertools import zip_longest
 
+from mapproxy.cache import path
+from mapproxy.grid.meta_grid import MetaGrid
 from mapproxy.seed.util import format_cleanup_task
-from mapproxy.util.fs import cleanup_directory
+from mapproxy.util.bbox import bbox_contains, bbox_intersects, merge_bbox
+from mapproxy.util.fs import DirectoryCleanup
 from mapproxy.seed.seeder import (
     TileWorkerPool, TileWalker, TileCleanupWorker,
-    SeedProgress,
+    SeedProgress, NONE, CONTAINS, INTERSECTS,
 )
 
+# directory layouts where simple_cleanup can select the tiles of a coverage
+LOCATION_FILTER_LAYOUTS = ('tc', 'mp', 'tms', 'arcgis', 'quadkey')
+
 
 def cleanup(tasks, concurrency=2, dry_run=False, skip_geoms_for_last_levels=0,
             verbose=True, progress_logger=None):
@@ -44,13 +52,17 @@ def cleanup(tasks, concurrency=2, dry_run=False, skip_geoms_for_last_levels=0,
             seed_progress = SeedProgress(old_progress_identifier=start_progress)
             cleanup_progress = DirectoryCleanupProgress(old_dir=start_progress)
 
+        cache = task.tile_manager.cache
+        if callable(getattr(cache, 'level_location', None)) and (
+                task.complete_extent or getattr(cache, 'directory_layout', None) in LOCATION_FILTER_LAYOUTS):
+            simple_cleanup(task, dry_run=dry_run, progress_logger=progress_logger,
+                           cleanup_progress=cleanup_progress, concurrency=concurrency,
+                           skip_geoms_for_last_levels=skip_geoms_for_last_levels)
+            task.tile_manager.cleanup()
+            continue
+
         if task.complete_extent:
-            if callable(getattr(task.tile_manager.cache, 'level_location', None)):
-                simple_cleanup(task, dry_run=dry_run, progress_logger=progress_logger,
-                               cleanup_progress=cleanup_progress)
-                task.tile_manager.cleanup()
-                continue
-            elif callable(getattr(task.tile_manager.cache, 'remove_level_tiles_before', None)):
+            if callable(getattr(cache, 'remove_level_tiles_before', None)):
                 cache_cleanup(task, dry_run=dry_run, progress_logger=progress_logger)
                 task.tile_manager.cleanup()
                 continue
@@ -63,18 +75,46 @@ def cleanup(tasks, concurrency=2, dry_run=False, skip_geoms_for_last_levels=0,
         task.tile_manager.cleanup()
 
 
-def simple_cleanup(task, dry_run, progress_logger=None, cleanup_progress=None):
+def simple_cleanup(task, dry_run, progress_logger=None, cleanup_progress=None,
+                   concurrency=1, skip_geoms_for_last_levels=0):
     """
     Cleanup cache level on file system level.
+
+    Only removes tiles within the coverage of the `task` if the coverage
+    does not cover the complete extent. Requires a cache with one of the
+    `LOCATION_FILTER_LAYOUTS` in that case.
     """
+    cache = task.tile_manager.cache
+    layout = getattr(cache, 'directory_layout', None)
 
-    for level in task.levels:
-        level_dir = task.tile_manager.cache.level_location(level)
-        if dry_run:
-            def file_handler(filename):
-                print('removing ' + filename)
-        else:
-            file_handler = None
+    if layout == 'quadkey':
+        # all levels are stored in a single directory
+        level_dirs = [(cache.cache_dir, None)]
+    elif layout is not None:
+        level_dirs = [(os.path.join(cache.cache_dir, path.level_dir_part(layout, level)), level)
+                      for level in task.levels]
+    else:
+        level_dirs = [(cache.level_location(level), level) for level in task.levels]
+
+    if dry_run:
+        def file_handler(filename):
+            print('removing ' + filename)
+    else:
+        file_handler = None
+
+    bbox_only_levels = set()
+    if skip_geoms_for_last_levels > 0:
+        bbox_only_levels = set(task.levels[-skip_geoms_for_last_levels:])
+
+    for level_dir, level in level_dirs:
+        dir_filter = file_filter = None
+        if not task.complete_extent or layout == 'quadkey':
+            tile_filter = TileLocationFilter(task, layout, cache.file_ext, level=level,
+                                             bbox_only_levels=bbox_only_levels)
+            dir_filter, file_filter = tile_filter.dir_filter, tile_filter.file_filter
+
+        checkpoint = None
+        skip_dir = None
         if progress_logger:
             progress_logger.log_message('removing old tiles in ' + normpath(level_dir))
             if progress_logger.progress_store:
@@ -87,8 +127,149 @@ def simple_cleanup(task, dry_run, progress_logger=None, cleanup_progress=None):
                 )
                 progress_logger.progress_store.write()
 
-        cleanup_directory(level_dir, task.remove_timestamp, task.remove_all,
-                          file_handler=file_handler, remove_empty_dirs=True)
+                skip_dir = SkipProcessedDirs(cleanup_progress.old_dir)
+                checkpoint = CleanupCheckpoint(task.id, cleanup_progress, progress_logger.progress_store)
+
+        dir_cleanup = DirectoryCleanup(task.remove_timestamp, task.remove_all,
+                                       file_handler=file_handler, concurrency=concurrency,
+                                       dir_filter=dir_filter, file_filter=file_filter)
+        dir_cleanup.run(level_dir, skip_dir=skip_dir, progress=checkpoint)
+
+        if progress_logger and not dry_run:
+            progress_logger.log_message('removed %d tiles in %s' % (dir_cleanup.removed, normpath(level_dir)))
+
+
+class SkipProcessedDirs(object):
+    def __init__(self, old_dir):
+        self.old_dir = old_dir
+
+    def __call__(self, subtree):
+        return DirectoryCleanupProgress.can_skip(self.old_dir, subtree)
+
+
+class CleanupCheckpoint(object):
+    """
+    Stores the next directory of a running `simple_cleanup` in the
+    `progress_store`, at most every `interval` seconds.
+    """
+
+    def __init__(self, task_id, cleanup_progress, progress_store, interval=10):
+        self.task_id = task_id
+        self.cleanup_progress = cleanup_progress
+        self.progress_store = progress_store
+        self.interval = interval
+        self._last_write = time.time()
+
+    def __call__(self, next_dir):
+        if next_dir is None:
+            return
+        self.cleanup_progress.step_dir(next_dir)
+        if self._last_write + self.interval < time.time():
+            self._last_write = time.time()
+            self.progress_store.add(self.task_id, self.cleanup_progress.current_progress_identifier())
+            self.progress_store.write()
+
+
+class TileLocationFilter(object):
+    """
+    Directory and file filters for `DirectoryCleanup` that select the tiles
+    of `task` by their location in a file cache with the directory `layout`.
+
+    Directories are mapped back to the range of tiles they can contain and
+    directories outside of the coverage are skipped without reading them.
+    Tiles are only checked individually in directories that intersect the
+    coverage. Like `tilewalker_cleanup`, all tiles of a meta tile are
+    selected if the meta tile intersects the coverage.
+
+    :param level: the level of the cleaned directory, or ``None`` for
+        layouts without level directories (quadkey)
+    :param bbox_only_levels: only check against the coverage BBOX for
+        these levels (see ``skip_geoms_for_last_levels``)
+    """
+
+    def __init__(self, task, layout, file_ext, level=None, bbox_only_levels=()):
+        self.task = task
+        self.grid = task.grid
+        self.layout = layout
+        self.file_ext = file_ext
+        self.level = level
+        self.levels = set(task.levels)
+        self.bbox_only_levels = bbox_only_levels
+        self.check_coverage = bool(task.coverage) and not task.complete_extent
+        meta_grid = task.tile_manager.meta_grid
+        self.meta_grid = MetaGrid(self.grid, meta_size=meta_grid.meta_size if meta_grid else (1, 1))
+        self.coverage_bbox = None
+        if self.check_coverage:
+            self.coverage_bbox = task.coverage.extent.bbox_for(self.grid.srs)
+        self._dir_intersection = lru_cache(maxsize=4096)(self._dir_intersection)
+        self._meta_tile_intersection = lru_cache(maxsize=4096)(self._meta_tile_intersection)
+
+    def dir_filter(self, parts):
+        if self.level is None:
+            # all tiles are in the top directory
+            return False
+        return self._dir_intersection(tuple(parts)) != NONE
+
+    def file_filter(self, parts):
+        if self.level is None:
+            coord = self._quadkey_coord(parts[-1])
+        else:
+            intersection = self._dir_intersection(tuple(parts[:-1]))
+            if intersection != INTERSECTS:
+                return intersection == CONTAINS
+            coord = path.parse_tile_location(self.layout, parts, self.level, self.file_ext)
+        if coord is None:
+            return False
+        return self._meta_tile_intersection(self.meta_grid.main_tile(coord)) != NONE
+
+    def _meta_tile_intersection(self, main_tile):
+        return self._intersection(self.meta_grid.meta_tile(main_tile).bbox, main_tile[2])
+
+    def _quadkey_coord(self, filename):
+        ext = '.' + self.file_ext
+        if not filename.endswith(ext):
+            return None
+        quadkey = filename[:-len(ext)]
+        if len(quadkey) not in self.levels:
+            return None
+        return path.quadkey_to_tile_coord(quadkey, len(quadkey))
+
+    def _dir_intersection(self, parts):
+        if not self.check_coverage:
+            return CONTAINS
+        tile_range = path.location_tile_range(self.layout, parts)
+        if tile_range is None:
+            # not a tile directory, check each file
+            return INTERSECTS
+        bbox = self._tile_range_bbox(tile_range)
+        if bbox is None:
+            return NONE
+        return self._intersection(bbox, self.level)
+
+    def _tile_range_bbox(self, tile_range):
+        width, height = self.grid.grid_sizes[self.level]
+        meta_width, meta_height = self.meta_grid._meta_size(self.level)
+        minx, miny, maxx, maxy = tile_range
+        # extend to complete meta tiles
+        minx = 0 if minx is None else minx // meta_width * meta_width
+        miny = 0 if miny is None else miny // meta_height * meta_height
+        maxx = width - 1 if maxx is None else min((maxx // meta_width + 1) * meta_width - 1, width - 1)
+        maxy = height - 1 if maxy is None else min((maxy // meta_height + 1) * meta_height - 1, height - 1)
+        if minx > maxx or miny > maxy:
+            return None
+        return merge_bbox(self.grid.tile_bbox((minx, miny, self.level)),
+                          self.grid.tile_bbox((maxx, maxy, self.level)))
+
+    def _intersection(self, bbox, level):
+        if not self.check_coverage:
+            return CONTAINS
+        if level in self.bbox_only_levels:
+            if bbox_contains(self.coverage_bbox, bbox):
+                return CONTAINS
+            if bbox_intersects(self.coverage_bbox, bbox):
+                return INTERSECTS
+            return NONE
+        return self.task.intersects(bbox)
 
 
 def cache_cleanup(task, dry_run, progress_logger=None):
@@ -26,6 +26,7 @@ from mapproxy.config import abspath
 from mapproxy.config.coverage import load_coverage
 from mapproxy.config.configuration.base import ConfigurationError
 from mapproxy.seed.util import bidict
+from mapproxy.seed.access_log import read_tile_access_logs, popular_tiles, seed_tile_coords
 from mapproxy.seed.seeder import SeedTask, CleanupTask
 from mapproxy.seed.spec import validate_seed_conf
 from mapproxy.util.bbox import TransformationError
@@ -215,6 +216,39 @@ class SeedConfiguration(ConfigurationBase):
         else:
             self.refresh_all = True
 
+        self.access_log = self.conf.get('access_log')
+        self._tile_counts = None
+
+    def _access_log_tile_counts(self, identifier):
+        """
+        Return the tile counts of `identifier` from the access logs.
+        The logs are read once for all caches and grids.
+        """
+        if self._tile_counts is None:
+            filenames = [abspath(f) for f in self.access_log['files']]
+            try:
+                self._tile_counts = read_tile_access_logs(filenames)
+            except IOError as ex:
+                raise SeedConfigurationError('%s: unable to read access log: %s' % (self.name, ex))
+        return self._tile_counts.get(identifier, {})
+
+    def _popular_tiles(self, tile_manager, levels, coverage):
+        """
+        Return the most requested tiles from the access logs.
+        """
+        access_log = self.access_log
+        tile_counts = self._access_log_tile_counts(tile_manager.identifier)
+        tiles = popular_tiles(tile_counts, levels, traffic_share=access_log.get('traffic_share', 0.95))
+        return seed_tile_coords(tiles, tile_manager, levels, child_levels=access_log.get('child_levels', 0),
+                                coverage=coverage)
+
+    def _seed_task(self, md, tile_manager, levels, coverage):
+        if not self.access_log or coverage is False:
+            return SeedTask(md, tile_manager, levels, self.refresh_timestamp, self.refresh_all, coverage)
+        return SeedTask(md, tile_manager, levels, self.refresh_timestamp, self.refresh_all, coverage,
+                        tiles=self._popular_tiles(tile_manager, levels, coverage),
+                        time_budget=self.access_log.get('time_budget'))
+
     def seed_tasks(self):
         for grid_name in self.grids:
             for cache_name, cache in self.caches.items():
@@ -247,9 +281,9 @@ class SeedConfiguration(ConfigurationBase):
                     if tile_manager.rescale_tiles > 0:
                         levels = levels[::-1]
                     for level in levels:
-                        yield SeedTask(md, tile_manager, [level], self.refresh_timestamp, self.refresh_all, coverage)
+                        yield self._seed_task(md, tile_manager, [level], coverage)
                 else:
-                    yield SeedTask(md, tile_manager, levels, self.refresh_timestamp, self.refresh_all, coverage)
+                    yield self._seed_task(md, tile_manager, levels, coverage)
 
 
 class CleanupConfiguration(ConfigurationBase):
@@ -16,6 +16,7 @@
 from __future__ import print_function, division
 
 import sys
+import time
 from collections import deque
 from contextlib import contextmanager
 from itertools import zip_longest
@@ -23,6 +24,7 @@ from itertools import zip_longest
 import queue
 
 from mapproxy.config import base_config
+from mapproxy.grid.coverage_index import CoverageTileIndex, OUTSIDE, BOUNDARY, INSIDE
 from mapproxy.grid.meta_grid import MetaGrid
 from mapproxy.source import SourceError
 from mapproxy.config import local_base_config
@@ -40,6 +42,12 @@ NONE = 0
 CONTAINS = -1
 INTERSECTS = 1
 
+INDEX_INTERSECTIONS = {
+    OUTSIDE: NONE,
+    BOUNDARY: INTERSECTS,
+    INSIDE: CONTAINS,
+}
+
 # Decide whether to use multiprocessing or threading. multiprocessing should be faster but
 # it is not well supported on all platforms. Especially regarding lambdas and anonymous
 # function/classes which are used in proj.py for example.
@@ -300,6 +308,7 @@ class TileWalker(object):
         meta_size = self.tile_mgr.meta_grid.meta_size if self.tile_mgr.meta_grid else (1, 1)
         self.tiles_per_metatile = meta_size[0] * meta_size[1]
         self.grid = MetaGrid(self.tile_mgr.grid, meta_size=meta_size, meta_buffer=0)
+        self.coverage_index = CoverageTileIndex(task.coverage, self.tile_mgr.grid, meta_size=meta_size)
         self.count = 0
         self.seed_progress = seed_progress or SeedProgress()
 
@@ -399,9 +408,7 @@ class TileWalker(object):
                 handle_tiles = [t for t in handle_tiles if
                                 t is not None]
             elif self.handle_uncached:
-                handle_tiles = [t for t in handle_tiles if
-                                t is not None and
-                                not self.tile_mgr.is_cached(t)]
+                handle_tiles = self.tile_mgr.uncached_tile_coords(handle_tiles)
             elif self.handle_stale:
                 handle_tiles = [t for t in handle_tiles if
                                 t is not None and
@@ -429,23 +436,76 @@ class TileWalker(object):
         Yields (None, None, None) for non-intersecting tiles,
         otherwise (subtile, subtile_bbox, intersection).
         """
+        subtiles = list(subtiles)
+        coords = [subtile for subtile in subtiles if subtile is not None]
+        if all_subtiles or not coords:
+            intersections = iter([CONTAINS] * len(coords))
+        else:
+            intersections = (INDEX_INTERSECTIONS[state] for state in self.coverage_index.states(coords))
         for subtile in subtiles:
             if subtile is None:
                 yield None, None, None
             else:
-                sub_bbox = self.grid.meta_tile(subtile).bbox
-                if all_subtiles:
-                    intersection = CONTAINS
-                else:
-                    intersection = self.task.intersects(sub_bbox)
+                intersection = next(intersections)
                 if intersection:
-                    yield subtile, sub_bbox, intersection
+                    yield subtile, self.grid.meta_tile(subtile).bbox, intersection
                 else:
                     yield None, None, None
 
 
+class TileListWalker(TileWalker):
+    """
+    TileListWalker calls worker_pool.process for each (meta) tile in
+    `task.tiles`, in the given order. It stops after `task.time_budget`
+    seconds.
+    """
+
+    def walk(self):
+        assert self.handle_stale or self.handle_uncached
+        deadline = None
+        if self.task.time_budget:
+            deadline = time.monotonic() + self.task.time_budget
+        tiles = self.task.tiles
+        for i, tile in enumerate(tiles):
+            with self.seed_progress.step_down(i, len(tiles)):
+                if not self.seed_progress.already_processed():
+                    if deadline and time.monotonic() > deadline:
+                        log.info('time budget of %ss exceeded, stopping', self.task.time_budget)
+                        break
+                    if not self.seed_progress.running():
+                        break
+                    self._process(tile)
+                    self.report_progress(tile[2], self.tile_mgr.grid.tile_bbox(tile))
+                self.seed_progress.step_forward()
+        self.tile_mgr.cleanup()
+        self.report_progress(self.task.levels[0], self.task.coverage.bbox)
+
+    def _process(self, tile):
+        if not self.work_on_metatiles:
+            handle_tiles = [tile]
+        else:
+            handle_tiles = [self.grid.main_tile(tile)]
+
+        if self.handle_all:
+            pass
+        elif self.handle_uncached:
+            handle_tiles = self.tile_mgr.uncached_tile_coords(handle_tiles)
+        elif self.handle_stale:
+            handle_tiles = [t for t in handle_tiles if self.tile_mgr.is_stale(t)]
+        if handle_tiles:
+            self.count += 1
+            self.worker_pool.process(handle_tiles, self.seed_progress)
+
+
 class SeedTask(object):
-    def __init__(self, md, tile_manager, levels, refresh_timestamp, refresh_all, coverage):
+    """
+    :param tiles: list of tile coords to seed in this order, instead of
+                  all tiles of `levels` within `coverage`
+    :param time_budget: stop seeding `tiles` after this many seconds
+    """
+
+    def __init__(self, md, tile_manager, levels, refresh_timestamp, refresh_all, coverage,
+                 tiles=None, time_budget=None):
         self.md = md
         self.tile_manager = tile_manager
         self.grid = tile_manager.grid
@@ -453,6 +513,8 @@ class SeedTask(object):
         self.refresh_timestamp = refresh_timestamp
         self.refresh_all = refresh_all
         self.coverage = coverage
+        self.tiles = tiles
+        self.time_budget = time_budget
 
     @property
     def id(self):
@@ -541,11 +603,12 @@ def seed_task(task, concurrency=2, dry_run=False, skip_geoms_for_last_levels=0,
     handle_stale = skip_uncached
     handle_uncached = not skip_uncached
     handle_all = task.refresh_all
-    tile_walker = TileWalker(task, tile_worker_pool, handle_uncached=handle_uncached, handle_stale=handle_stale,
-                             handle_all=handle_all, skip_geoms_for_last_levels=skip_geoms_for_last_levels,
-                             progress_logger=progress_logger, seed_progress=seed_progress,
-                             work_on_metatiles=work_on_metatiles,
-                             )
+    walker_class = TileWalker if task.tiles is None else TileListWalker
+    tile_walker = walker_class(task, tile_worker_pool, handle_uncached=handle_uncached, handle_stale=handle_stale,
+                               handle_all=handle_all, skip_geoms_for_last_levels=skip_geoms_for_last_levels,
+                               progress_logger=progress_logger, seed_progress=seed_progress,
+                               work_on_metatiles=work_on_metatiles,
+                               )
     try:
         tile_walker.walk()
     except KeyboardInterrupt:
@@ -38,6 +38,13 @@ from_to_spec = {
     'to': number(),
 }
 
+access_log_spec = {
+    required('files'): [str()],
+    'traffic_share': number(),
+    'child_levels': int(),
+    'time_budget': number(),
+}
+
 seed_yaml_spec = {
     'coverages': {
         anything(): coverage,
@@ -50,6 +57,7 @@ seed_yaml_spec = {
             'refresh_before': time_spec,
             'levels': one_off([int()], from_to_spec),
             'resolutions': one_off([int()], from_to_spec),
+            'access_log': access_log_spec,
         },
     },
     'cleanups': {
@@ -0,0 +1,228 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2026 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bulk transfer of tiles between two caches.
+"""
+
+from __future__ import print_function, division
+
+import queue
+import sys
+import threading
+import time
+
+from mapproxy.cache.tile import Tile
+from mapproxy.config import base_config, local_base_config
+
+import logging
+log = logging.getLogger(__name__)
+
+
+def grid_tile_coords(grid, levels, coverage=None, batch_size=256):
+    """
+    Yield lists with up to `batch_size` tile coordinates for all `levels`
+    of `grid`, limited to tiles that intersect `coverage`.
+    """
+    if coverage:
+        bbox = coverage.extent.bbox_for(grid.srs)
+    else:
+        bbox = grid.bbox
+
+    for level in levels:
+        _bbox, _size, coords = grid.get_affected_level_tiles(bbox, level)
+        batch = []
+        for coord in coords:
+            if coord is None:
+                continue
+            if coverage and not coverage.intersects(grid.tile_bbox(coord), grid.srs):
+                continue
+            batch.append(coord)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def cache_tile_coords(cache, grid, levels, coverage=None, batch_size=256):
+    """
+    Like `grid_tile_coords`, but only yield the tile coordinates that are
+    stored in `cache`. Falls back to `grid_tile_coords` for caches that do
+    not support tile iteration.
+    """
+    if not cache.supports_tile_iteration:
+        for batch in grid_tile_coords(grid, levels, coverage=coverage, batch_size=batch_size):
+            yield batch
+        return
+
+    for level in levels:
+        batch = []
+        for tile in cache.iter_tiles(level):
+            if coverage and not coverage.intersects(grid.tile_bbox(tile.coord), grid.srs):
+                continue
+            batch.append(tile.coord)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class TransferResult(object):
+    def __init__(self):
+        self.batches = 0
+        self.checked = 0
+        self.copied = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def add(self, checked, copied, failed=0):
+        with self._lock:
+            self.batches += 1
+            self.checked += checked
+            self.copied += copied
+            self.failed += failed
+
+
+class TileTransfer(object):
+    """
+    Copy tiles from `source_cache` to `dest_cache`.
+
+    Tiles are loaded in batches with ``load_tiles`` by `readers` threads
+    and stored with ``store_tiles`` by `writers` threads. The encoded tile
+    data is passed through as-is, so both caches need to use the same
+    image format.
+    """
+
+    def __init__(self, source_cache, dest_cache, readers=2, writers=2, dry_run=False):
+        self.source_cache = source_cache
+        self.dest_cache = dest_cache
+        self.readers = max(1, readers)
+        self.writers = max(1, writers)
+        self.dry_run = dry_run
+
+    def transfer(self, coord_batches, progress_logger=None):
+        """
+        Copy all cached tiles from the iterable `coord_batches` (lists of
+        tile coordinates). Missing tiles are skipped. Tiles that could not
+        be stored in `dest_cache` are logged and counted as failed.
+
+        :returns: TransferResult with the number of checked, copied and
+            failed tiles
+        """
+        result = TransferResult()
+        coords_queue = queue.Queue(self.readers * 2)
+        tiles_queue = queue.Queue(self.writers * 2)
+        errors = []
+        conf = base_config()
+
+        def run(func, *args):
+            with local_base_config(conf):
+                try:
+                    func(*args)
+                except Exception:
+                    log.exception('error during tile transfer')
+                    errors.append(sys.exc_info())
+                    # drain queue so that the other threads do not block
+                    _drain(args[0])
+
+        readers = [threading.Thread(target=run, args=(self._read, coords_queue, tiles_queue))
+                   for _ in range(self.readers)]
+        writers = [threading.Thread(target=run, args=(self._write, tiles_queue, result))
+                   for _ in range(self.writers)]
+        for t in readers + writers:
+            t.daemon = True
+            t.start()
+
+        last_log = time.time()
+        try:
+            for coords in coord_batches:
+                if errors:
+                    break
+                coords_queue.put(coords)
+                if progress_logger and last_log + 5 < time.time():
+                    last_log = time.time()
+                    progress_logger.log_message('copied %d of %d checked tiles' % (result.copied, result.checked))
+        finally:
+            for _ in readers:
+                coords_queue.put(None)
+            for t in readers:
+                t.join()
+            for _ in writers:
+                tiles_queue.put(None)
+            for t in writers:
+                t.join()
+
+        if errors:
+            _exc_class, exc, tb = errors[0]
+            raise exc.with_traceback(tb)
+
+        return result
+
+    def _read(self, coords_queue, tiles_queue):
+        try:
+            while True:
+                coords = coords_queue.get()
+                if coords is None:
+                    return
+                tiles = [Tile(coord) for coord in coords]
+                self.source_cache.load_tiles(tiles)
+                # new tiles, as caches store their location in the tile
+                loaded = [Tile(t.coord, t.image_result) for t in tiles if t.image_result is not None]
+                tiles_queue.put((len(tiles), loaded))
+        finally:
+            _cleanup(self.source_cache)
+
+    def _write(self, tiles_queue, result):
+        try:
+            while True:
+                item = tiles_queue.get()
+                if item is None:
+                    return
+                checked, tiles = item
+                failed = 0
+                # caches without result raise an exception if storing failed
+                if tiles and not self.dry_run and self.dest_cache.store_tiles(tiles) is False:
+                    failed = self._store_single_tiles(tiles)
+                result.add(checked, len(tiles) - failed, failed)
+        finally:
+            _cleanup(self.dest_cache)
+
+    def _store_single_tiles(self, tiles):
+        """
+        Store `tiles` one by one, after ``store_tiles`` failed for some
+        of them. Returns the number of tiles that could not be stored.
+        """
+        failed = 0
+        for tile in tiles:
+            if self.dest_cache.store_tile(tile) is False:
+                log.warning('unable to store tile %s', tile.coord)
+                failed += 1
+        return failed
+
+
+def _drain(q):
+    """
+    Consume `q` until the None-sentinel arrives.
+    """
+    while q.get() is not None:
+        pass
+
+
+def _cleanup(cache):
+    # close thread-local connections of connection based caches
+    if hasattr(cache, 'cleanup'):
+        cache.cleanup()
@@ -225,6 +225,10 @@ def format_seed_task(task):
     else:
         info.append('   Complete grid: %s (EPSG:4326)' % (format_bbox(map_extent_from_grid(task.grid).llbbox), ))
     info.append('    Levels: %s' % (task.levels, ))
+    if task.tiles is not None:
+        info.append('    Popular tiles from access log: %d' % (len(task.tiles), ))
+        if task.time_budget:
+            info.append('    Time budget: %ss' % (task.time_budget, ))
 
     if task.refresh_all:
         info.append('    Overwriting: all tiles')
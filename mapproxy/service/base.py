@@ -18,6 +18,7 @@ Service handler (WMS, TMS, etc.).
 """
 
 from mapproxy.exception import RequestError
+from mapproxy.util import tracing
 
 
 class Server:
@@ -28,7 +29,9 @@ class Server:
         try:
             parsed_req = self.parse_request(req)
             handler = getattr(self, parsed_req.request_handler_name)
-            return handler(parsed_req)
+            with tracing.span('mapproxy.service', service=self.names[0] if self.names else None,
+                              request=parsed_req.request_handler_name):
+                return handler(parsed_req)
         except RequestError as e:
             return e.render()
 
@@ -0,0 +1,146 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache for rendered capabilities documents.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from typing import Optional
+
+from mapproxy.response import Response
+from mapproxy.util.lru import LRU
+
+
+def authorization_key(result):
+    """
+    Return a hashable key for the result of an authorize callback, or None
+    if the result contains values that can't be serialized reliably.
+
+    >>> authorization_key({'authorized': 'partial', 'layers': {'b': {}, 'a': {'map': True}}})
+    '{"authorized": "partial", "layers": {"a": {"map": true}, "b": {}}}'
+    >>> authorization_key({'authorized': 'partial', 'layers': {}, 'limited_to': object()}) is None
+    True
+    """
+    def default(obj):
+        if hasattr(obj, 'wkb_hex'):  # shapely geometries
+            return obj.wkb_hex
+        raise TypeError
+    try:
+        return json.dumps(result, sort_keys=True, default=default)
+    except (TypeError, ValueError):
+        return None
+
+
+class CachedDocument(object):
+    def __init__(self, doc: bytes):
+        self.doc = doc
+        self.etag = hashlib.new('md5', doc, usedforsecurity=False).hexdigest()
+        self._gzip_doc: Optional[bytes] = None
+
+    @property
+    def gzip_doc(self) -> bytes:
+        if self._gzip_doc is None:
+            self._gzip_doc = gzip.compress(self.doc, mtime=0)
+        return self._gzip_doc
+
+
+class CapabilitiesCache(object):
+    """
+    LRU cache for rendered capabilities documents of a service.
+
+    Documents are cached for the lifetime of the service. Services are
+    recreated when the configuration is reloaded (see ``ReloaderApp``),
+    so changed configurations always result in new documents.
+    """
+
+    def __init__(self, size=64):
+        self._docs = LRU(size)
+        self._lock = threading.Lock()
+
+    def document(self, key, render) -> CachedDocument:
+        """
+        Return the cached document for `key`. Calls `render` to create
+        the document if it is not cached. Documents with a `key` of None
+        are not cached.
+        """
+        if key is not None:
+            with self._lock:
+                if key in self._docs:
+                    return self._docs[key]
+        doc = render()
+        if isinstance(doc, str):
+            doc = doc.encode('utf-8')
+        cached = CachedDocument(doc)
+        if key is not None:
+            with self._lock:
+                self._docs[key] = cached
+        return cached
+
+    def response(self, key, render, req, mimetype) -> Response:
+        """
+        Return a response for the (cached) document with ETag and a gzip
+        encoded variant for clients that accept it. Returns
+        ``304 Not Modified`` for matching ``If-None-Match`` headers.
+        """
+        cached = self.document(key, render)
+        if accepts_gzip(req.environ.get('HTTP_ACCEPT_ENCODING', '')):
+            resp = Response(cached.gzip_doc, mimetype=mimetype)
+            resp.headers['Content-Encoding'] = 'gzip'
+            resp.etag = cached.etag + '-gzip'
+        else:
+            resp = Response(cached.doc, mimetype=mimetype)
+            resp.etag = cached.etag
+        vary = resp.headers.get('Vary')
+        resp.headers['Vary'] = vary + ', Accept-Encoding' if vary else 'Accept-Encoding'
+        resp.make_conditional(req)
+        return resp
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Return whether the `accept_encoding` header accepts gzip, i.e. gzip
+    (or ``*`` if gzip is not listed) has a q-value above 0.
+
+    >>> accepts_gzip('gzip, deflate, br')
+    True
+    >>> accepts_gzip('deflate')
+    False
+    >>> accepts_gzip('gzip;q=0, deflate')
+    False
+    >>> accepts_gzip('br, *;q=0.1')
+    True
+    >>> accepts_gzip('*, gzip;q=0')
+    False
+    """
+    qualities = {}
+    for coding in accept_encoding.lower().split(','):
+        name, _, params = coding.partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[name.strip()] = q
+    if 'gzip' in qualities:
+        return qualities['gzip'] > 0
+    if 'x-gzip' in qualities:
+        return qualities['x-gzip'] > 0
+    return qualities.get('*', 0) > 0
@@ -0,0 +1,27 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+logger = logging.getLogger('mapproxy.tile.access')
+
+
+def log_tile_access(identifier, tile_coord):
+    """
+    Log the access to a tile of the tile manager with `identifier`
+    (the cache name and the grid name), e.g. ``osm_cache_webmercator 4/8/5``.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info('%s %d/%d/%d', identifier, tile_coord[2], tile_coord[0], tile_coord[1])
@@ -0,0 +1,47 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Metrics service for Prometheus.
+"""
+from mapproxy.exception import RequestError
+from mapproxy.response import Response
+from mapproxy.service.base import Server
+from mapproxy.util import metrics
+
+
+class MetricsServer(Server):
+    names = ('metrics',)
+
+    def __init__(self, registry=None):
+        super().__init__()
+        self.registry = registry or metrics.registry
+
+    def handle(self, req):
+        try:
+            authorized = self.authorized_metrics(req.environ)
+        except RequestError as ex:
+            return ex.render()
+        if not authorized:
+            return Response('forbidden', content_type='text/plain', status=403)
+        return Response(self.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+    def authorized_metrics(self, environ):
+        if 'mapproxy.authorize' in environ:
+            result = environ['mapproxy.authorize']('metrics', [], environ=environ)
+            if result['authorized'] == 'unauthenticated':
+                raise RequestError('unauthorized', status=401)
+            return result['authorized'] == 'full'
+        return True
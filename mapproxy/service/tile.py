@@ -23,10 +23,13 @@ from mapproxy.template import template_loader, bunch
 import math
 import time
 from collections import OrderedDict
+from functools import partial
 
 from mapproxy.response import Response
 from mapproxy.exception import RequestError
 from mapproxy.service.base import Server
+from mapproxy.service.capabilities_cache import CapabilitiesCache
+from mapproxy.service.log import log_tile_access
 from mapproxy.request.tile import tile_request
 from mapproxy.request.base import split_mime_type
 from mapproxy.source import SourceError
@@ -36,6 +39,7 @@ from mapproxy.image import BlankImageResult
 from mapproxy.image.opts import ImageOptions
 from mapproxy.image.mask import mask_image_result_from_coverage
 from mapproxy.util.coverage import load_limited_to, Coverage
+from mapproxy.util import metrics, profiler
 
 import logging
 log = logging.getLogger(__name__)
@@ -65,6 +69,7 @@ class TileServer(Server):
         self.max_tile_age = max_tile_age
         self.use_dimension_layers = use_dimension_layers
         self.origin = origin
+        self.capabilities_cache = CapabilitiesCache()
 
     def parse_request(self, req):
         return tile_request(req)
@@ -174,12 +179,14 @@ class TileServer(Server):
         service = self._service_md(tms_request)
         if hasattr(tms_request, 'layer'):
             layer, limit_to = self.layer(tms_request)
-            result = self._render_layer_template(layer, service)
+            key = ('layer', service['url'], tms_request.layer, tms_request.dimensions.get('_layer_spec'))
+            render = partial(self._render_layer_template, layer, service)
         else:
             layers = self.authorized_tile_layers(tms_request.http.environ)
-            result = self._render_template(layers, service)
+            key = ('layers', service['url'], tuple(layers.keys()))
+            render = partial(self._render_template, layers, service)
 
-        return Response(result, mimetype='text/xml')
+        return self.capabilities_cache.response(key, render, tms_request.http, 'text/xml')
 
     def tms_root_resource(self, tms_request):
         """
@@ -187,8 +194,8 @@ class TileServer(Server):
         :rtype: Response
         """
         service = self._service_md(tms_request)
-        result = self._render_root_resource_template(service)
-        return Response(result, mimetype='text/xml')
+        render = partial(self._render_root_resource_template, service)
+        return self.capabilities_cache.response(('root', service['url']), render, tms_request.http, 'text/xml')
 
     def _service_md(self, map_request):
         md = dict(self.md)
@@ -313,9 +320,11 @@ class TileLayer(object):
                 return self.empty_response()
 
         dimensions = self.checked_dimensions(tile_request)
+        log_tile_access(self.tile_manager.identifier, tile_coord)
+        profiler.set_layer(self.name)
 
         try:
-            with self.tile_manager.session():
+            with self.tile_manager.session(), metrics.timer(metrics.TILE_LAYER_DURATION, self.name):
                 tile = self.tile_manager.load_tile_coord(tile_coord,
                                                          dimensions=dimensions, with_metadata=True)
             if tile.image_result is None:
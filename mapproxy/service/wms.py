@@ -33,6 +33,7 @@ from mapproxy.request.wms import (wms_request, WMS111LegendGraphicRequest,
                                   mimetype_from_infotype, infotype_from_mimetype, switch_bbox_epsg_axis_order)
 from mapproxy.srs import SRS
 from mapproxy.service.base import Server
+from mapproxy.service.capabilities_cache import CapabilitiesCache, authorization_key
 from mapproxy.response import Response
 from mapproxy.source import SourceError
 from mapproxy.exception import RequestError
@@ -42,11 +43,11 @@ from mapproxy.image.opts import ImageOptions
 from mapproxy.image.message import attribution_image, message_image
 from mapproxy.layer import BlankImageError, MapError, MapBBOXError, merge_layer_res_ranges
 from mapproxy.query import MapQuery, InfoQuery, LegendQuery
-from mapproxy.util import async_
+from mapproxy.util import async_, profiler, tracing
 from mapproxy.util.bbox import TransformationError
 from mapproxy.util.py import cached_property, reraise
 from mapproxy.util.coverage import load_limited_to, Coverage
-from mapproxy.template import template_loader, bunch, recursive_bunch
+from mapproxy.template import template_loader, bunch, recursive_bunch, strip_blank_lines
 from mapproxy.service import template_helper
 from mapproxy.extent import MapExtent, DefaultMapExtent, merge_layer_extents
 
@@ -85,12 +86,14 @@ class WMSServer(Server):
         self.max_output_pixels = max_output_pixels
         self.max_tile_age = max_tile_age
         self.inspire_md = inspire_md
+        self.capabilities_cache = CapabilitiesCache()
 
     def parse_request(self, req):
         return wms_request(req, strict=self.strict, versions=self.versions)
 
     def map(self, map_request):
         self.check_map_request(map_request)
+        profiler.set_layer(','.join(map_request.params.layers))
 
         params = map_request.params
         query = MapQuery(params.bbox, params.size, SRS(params.srs), params.format, dimensions=map_request.dimensions)
@@ -151,8 +154,9 @@ class WMSServer(Server):
         img_opts = self.image_formats[params.format_mime_type].copy()
         img_opts.bgcolor = params.bgcolor
         img_opts.transparent = params.transparent
-        result = merger.merge(size=query.size, image_opts=img_opts,
-                              bbox=query.bbox, bbox_srs=params.srs, coverage=coverage)
+        with tracing.span('mapproxy.merge', layers=len(merger.layers)):
+            result = merger.merge(size=query.size, image_opts=img_opts,
+                                  bbox=query.bbox, bbox_srs=params.srs, coverage=coverage)
 
         if query != orig_query:
             result = sub_image_result(result, size=orig_query.size, offset=offset, image_opts=img_opts)
@@ -190,7 +194,8 @@ class WMSServer(Server):
         #     layers = [layer for name, layer in self.layers.items()
         #               if name != '__debug__']
 
-        if map_request.params.get('tiled', 'false').lower() == 'true':
+        tiled = map_request.params.get('tiled', 'false').lower() == 'true'
+        if tiled:
             tile_layers = self.tile_layers.values()
         else:
             tile_layers = []
@@ -204,11 +209,21 @@ class WMSServer(Server):
         elif self.fi_transformers:
             info_types = list(self.fi_transformers.keys())
         info_formats = [mimetype_from_infotype(map_request.version, info_type) for info_type in info_types]
-        result = Capabilities(service, root_layer, tile_layers,
-                              self.image_formats, info_formats, srs=self.srs, srs_extents=self.srs_extents,
-                              inspire_md=self.inspire_md, max_output_pixels=self.max_output_pixels
-                              ).render(map_request)
-        return Response(result, mimetype=map_request.mime_type)
+
+        def render():
+            return Capabilities(service, root_layer, tile_layers,
+                                self.image_formats, info_formats, srs=self.srs, srs_extents=self.srs_extents,
+                                inspire_md=self.inspire_md, max_output_pixels=self.max_output_pixels
+                                ).render(map_request)
+
+        if isinstance(root_layer, FilteredRootLayer):
+            auth_key = root_layer.cache_key
+        else:
+            auth_key = 'full'
+        key = None
+        if auth_key is not None:
+            key = (map_request.capabilities_template, service['url'], tiled, auth_key)
+        return self.capabilities_cache.response(key, render, map_request.http, map_request.mime_type)
 
     def featureinfo(self, request):
         infos = []
@@ -388,17 +403,20 @@ class WMSServer(Server):
                     coverage = load_limited_to(limited_to)
                 else:
                     coverage = None
-                return FilteredRootLayer(self.root_layer, result['layers'], coverage=coverage)
+                return FilteredRootLayer(self.root_layer, result['layers'], coverage=coverage,
+                                         cache_key=authorization_key(result))
             raise RequestError('forbidden', status=403)
         else:
             return self.root_layer
 
 
 class FilteredRootLayer(object):
-    def __init__(self, root_layer, permissions, coverage: Optional[Coverage] = None):
+    def __init__(self, root_layer, permissions, coverage: Optional[Coverage] = None, cache_key=None):
         self.root_layer = root_layer
         self.permissions = permissions
         self.coverage = coverage
+        # identifies the permissions for cached capabilities, None if not cacheable
+        self.cache_key = cache_key
 
     def __getattr__(self, name):
         return getattr(self.root_layer, name)
@@ -554,7 +572,7 @@ class Capabilities(object):
             output_width = output_height = int(sqrt(self.max_output_pixels))
             max_output_size = (output_width, output_height)
 
-        doc = template.substitute(
+        chunks = template.generate(
             service=bunch(default='', **self.service),
             layers=self.layers,
             formats=self.image_formats,
@@ -567,9 +585,7 @@ class Capabilities(object):
             max_output_size=max_output_size,
             escape=escape,
         )
-        # strip blank lines
-        doc = '\n'.join(x for x in doc.split('\n') if x.rstrip())
-        return doc
+        return '\n'.join(strip_blank_lines(chunks))
 
 
 def limit_llbbox(bbox):
@@ -664,7 +680,8 @@ class LayerRenderer:
 
     def _render_layer(self, layer: MapLayer) -> tuple[MapLayer, Optional[BaseImageResult]]:
         try:
-            layer_img = layer.get_map(self.query)
+            with tracing.span('mapproxy.get_map', source=type(layer).__name__):
+                layer_img = layer.get_map(self.query)
 
             return layer, layer_img
         except SourceError:
@@ -32,11 +32,12 @@ from mapproxy.request.wmts import (
 from mapproxy.query import InfoQuery
 from mapproxy.featureinfo import combine_docs
 from mapproxy.service.base import Server
+from mapproxy.service.capabilities_cache import CapabilitiesCache
 from mapproxy.response import Response
 from mapproxy.exception import RequestError
 from mapproxy.util.coverage import load_limited_to
 
-from mapproxy.template import template_loader, bunch
+from mapproxy.template import template_loader, bunch, strip_blank_lines
 
 env = {'bunch': bunch}
 get_template = template_loader(__package__, 'templates', namespace=env)
@@ -52,6 +53,7 @@ class WMTSServer(Server):
         self.max_tile_age = max_tile_age
         self.layers, self.matrix_sets = self._matrix_sets(layers)
         self.capabilities_class = Capabilities
+        self.capabilities_cache = CapabilitiesCache()
         self.fi_transformers = None
         self.info_formats = info_formats or {}
 
@@ -82,9 +84,12 @@ class WMTSServer(Server):
         service = self._service_md(request)
         layers = self.authorized_tile_layers(request.http.environ)
 
-        result = self.capabilities_class(service, layers, self.matrix_sets,
-                                         info_formats=self.info_formats).render(request)
-        return Response(result, mimetype='application/xml')
+        def render():
+            return self.capabilities_class(service, layers, self.matrix_sets,
+                                           info_formats=self.info_formats).render(request)
+
+        key = (service['url'], tuple(layer.name for layer in layers))
+        return self.capabilities_cache.response(key, render, request.http, 'application/xml')
 
     def tile(self, request):
         self.check_request(request)
@@ -302,10 +307,8 @@ class Capabilities(object):
 
     def _render_template(self, template):
         template = get_template(template)
-        doc = template.substitute(**self.template_context())
-        # strip blank lines
-        doc = '\n'.join(x for x in doc.split('\n') if x.rstrip())
-        return doc
+        chunks = template.generate(**self.template_context())
+        return '\n'.join(strip_blank_lines(chunks))
 
 
 class RestfulCapabilities(Capabilities):
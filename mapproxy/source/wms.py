@@ -152,7 +152,7 @@ class WMSSource(WMSLikeSource):
     def __init__(self, client, image_opts=None, coverage: Optional[Coverage] = None, res_range=None,
                  transparent_color=None, transparent_color_tolerance=None,
                  supported_srs: Optional[SupportedSRS] = None, supported_formats=None, fwd_req_params=None,
-                 error_handler=None):
+                 error_handler=None, max_output_pixels=None):
         super().__init__(image_opts=image_opts, coverage=coverage,
                          res_range=res_range, transparent_color=transparent_color,
                          transparent_color_tolerance=transparent_color_tolerance,
@@ -161,6 +161,7 @@ class WMSSource(WMSLikeSource):
 
         self.client = client
         self.fwd_req_params = fwd_req_params or set()
+        self.max_output_pixels = max_output_pixels
 
     def _retrieve(self, query, format):
         return self.client.retrieve(query, format)
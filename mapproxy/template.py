@@ -24,12 +24,19 @@ import os
 from mapproxy.util.ext.tempita import Template, bunch
 from mapproxy.config.config import base_config
 
-__all__ = ['Template', 'bunch', 'template_loader']
+__all__ = ['Template', 'bunch', 'template_loader', 'strip_blank_lines']
 
 
 def template_loader(module_name, location='templates', namespace={}):
+    """
+    Return a function that loads templates by name. Templates are parsed
+    once per process and reloaded when the template file changes.
+    """
 
     class loader(object):
+        def __init__(self):
+            self._templates = {}
+
         def __call__(self, name, from_template=None, default_inherit=None):
             if os.path.isabs(name):
                 template_file = name
@@ -37,11 +44,41 @@ def template_loader(module_name, location='templates', namespace={}):
                 template_file = os.path.join(base_config().template_dir, name)
             else:
                 template_file = importlib_resources.files(module_name).joinpath(location).joinpath(name)
-            return Template.from_filename(template_file, namespace=namespace, encoding='utf-8',
-                                          default_inherit=default_inherit, get_template=self)
+
+            key = str(template_file), default_inherit
+            try:
+                mtime = os.stat(template_file).st_mtime
+            except (OSError, TypeError):
+                mtime = None  # e.g. packaged as zip
+            cached = self._templates.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            template = Template.from_filename(template_file, namespace=namespace, encoding='utf-8',
+                                              default_inherit=default_inherit, get_template=self)
+            self._templates[key] = mtime, template
+            return template
     return loader()
 
 
+def strip_blank_lines(chunks):
+    """
+    Return the non-blank lines of the text `chunks` (e.g. from
+    `Template.generate`), without line endings.
+
+    >>> list(strip_blank_lines(['<a>\\n  ', '\\n  <b/>', '\\n\\n</a>\\n']))
+    ['<a>', '  <b/>', '</a>']
+    """
+    rest = ''
+    for chunk in chunks:
+        lines = (rest + chunk).split('\n')
+        rest = lines.pop()
+        for line in lines:
+            if line.rstrip():
+                yield line
+    if rest.rstrip():
+        yield rest
+
+
 class recursive_bunch(bunch):
 
     def __getitem__(self, key):
@@ -0,0 +1,95 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fixtures for the benchmarks. All fixtures are synthetic and deterministic,
+so results of different runs are comparable.
+
+Benchmarks require pytest-benchmark and are not collected without it.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler
+from io import BytesIO
+from urllib.parse import parse_qsl, urlparse
+
+import pytest
+from PIL import Image
+
+from mapproxy.test.http import HTTPServer
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    collect_ignore_glob = ['test_*.py']
+
+
+def synthetic_image(size, mode='RGBA'):
+    """
+    Return an image with gradients in all bands, as a stand-in for
+    rendered map tiles that is neither blank nor random.
+    """
+    gradient = Image.linear_gradient('L').resize(size)
+    radial = Image.radial_gradient('L').resize(size)
+    bands = [gradient, radial, gradient.transpose(Image.Transpose.ROTATE_90)]
+    if mode == 'RGBA':
+        bands.append(radial.transpose(Image.Transpose.FLIP_TOP_BOTTOM))
+    return Image.merge(mode, bands)
+
+
+def image_data(size, format='png', mode='RGB'):
+    buf = BytesIO()
+    synthetic_image(size, mode=mode).save(buf, format)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope='session')
+def tile_data():
+    return image_data((256, 256))
+
+
+class StandInWMSHandler(BaseHTTPRequestHandler):
+    """
+    Answers every request with a PNG image in the requested size.
+    """
+    images: dict = {}
+
+    def do_GET(self):
+        query = dict((k.lower(), v) for k, v in parse_qsl(urlparse(self.path).query))
+        size = int(query.get('width', 256)), int(query.get('height', 256))
+        image = self.images.get(size)
+        if image is None:
+            image = self.images[size] = image_data(size)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(image)))
+        self.end_headers()
+        self.wfile.write(image)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='session')
+def stand_in_wms():
+    """
+    Local WMS that returns PNG images for all requests, running until
+    the end of the session. Returns the base URL.
+    """
+    httpd = HTTPServer(('127.0.0.1', 0), StandInWMSHandler)
+    t = threading.Thread(target=httpd.serve_forever, daemon=True)
+    t.start()
+    yield 'http://127.0.0.1:%d/service' % httpd.socket.getsockname()[1]
+    httpd.shutdown()
+    httpd.server_close()
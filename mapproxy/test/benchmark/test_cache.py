@@ -0,0 +1,90 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Benchmarks for loading tiles from caches, for cached tiles (hit) and
+missing tiles (miss).
+"""
+import os
+from io import BytesIO
+
+import pytest
+
+from mapproxy.cache.compact import CompactCacheV1, CompactCacheV2
+from mapproxy.cache.file import FileCache
+from mapproxy.cache.geopackage import GeopackageCache
+from mapproxy.cache.mbtiles import MBTilesCache
+from mapproxy.cache.tile import Tile
+from mapproxy.grid.tile_grid import tile_grid
+from mapproxy.image import ImageResult
+from mapproxy.image.opts import ImageOptions
+
+CACHED_COORD = (3009, 589, 12)
+MISSING_COORD = (3010, 589, 12)
+
+
+def make_file_cache(cache_dir):
+    return FileCache(os.path.join(cache_dir, 'file'), 'png')
+
+
+def make_mbtiles_cache(cache_dir):
+    return MBTilesCache(os.path.join(cache_dir, 'cache.mbtiles'))
+
+
+def make_geopackage_cache(cache_dir):
+    return GeopackageCache(os.path.join(cache_dir, 'cache.gpkg'),
+                           tile_grid=tile_grid(3857, name='global-webmercator'), table_name='tiles')
+
+
+def make_compact_v1_cache(cache_dir):
+    return CompactCacheV1(os.path.join(cache_dir, 'compact_v1'))
+
+
+def make_compact_v2_cache(cache_dir):
+    return CompactCacheV2(os.path.join(cache_dir, 'compact_v2'))
+
+
+@pytest.fixture(params=[
+    make_file_cache,
+    make_mbtiles_cache,
+    make_geopackage_cache,
+    make_compact_v1_cache,
+    make_compact_v2_cache,
+], ids=['file', 'mbtiles', 'geopackage', 'compact_v1', 'compact_v2'])
+def cache(request, tmpdir, tile_data):
+    cache = request.param(tmpdir.strpath)
+    tile = Tile(CACHED_COORD, ImageResult(BytesIO(tile_data), image_opts=ImageOptions(format='image/png')))
+    cache.store_tile(tile)
+    assert cache.is_cached(Tile(CACHED_COORD))
+    yield cache
+    if hasattr(cache, 'cleanup'):
+        cache.cleanup()
+
+
+def load_tile(cache, coord):
+    tile = Tile(coord)
+    cache.load_tile(tile)
+    return tile
+
+
+def test_load_tile_hit(benchmark, cache):
+    tile = benchmark(load_tile, cache, CACHED_COORD)
+    assert not tile.is_missing()
+
+
+def test_load_tile_miss(benchmark, cache):
+    tile = benchmark(load_tile, cache, MISSING_COORD)
+    assert tile.is_missing()
@@ -0,0 +1,86 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Benchmarks for coverage checks and for walking the tiles of a seed task.
+"""
+import math
+
+import pytest
+import shapely
+
+from mapproxy.cache.dummy import DummyCache, DummyLocker
+from mapproxy.cache.tile_manager import TileManager
+from mapproxy.grid.tile_grid import tile_grid
+from mapproxy.seed.seeder import SeedTask, TileWalker
+from mapproxy.source.tile import TiledSource
+from mapproxy.srs import SRS
+from mapproxy.util.coverage import GeomCoverage
+
+
+def star_polygon(center, radius, points=500):
+    """
+    Return a star-shaped polygon with `points` outer vertices, as a
+    stand-in for detailed administrative boundaries.
+    """
+    coords = []
+    for i in range(points * 2):
+        r = radius if i % 2 == 0 else radius * 0.8
+        angle = math.pi * i / points
+        coords.append((center[0] + r * math.cos(angle), center[1] + r * math.sin(angle)))
+    return shapely.Polygon(coords)
+
+
+@pytest.fixture(scope='module')
+def coverage():
+    return GeomCoverage(star_polygon((10, 51), 4), SRS(4326))
+
+
+@pytest.mark.parametrize('bbox', [
+    (9.9, 50.9, 10.1, 51.1),
+    (13.5, 50.9, 14.5, 51.1),
+    (20, 50, 21, 51),
+], ids=['inside', 'boundary', 'outside'])
+def test_geom_coverage_intersects(benchmark, coverage, bbox):
+    benchmark(coverage.intersects, bbox, SRS(4326))
+
+
+def test_geom_coverage_intersects_transformed(benchmark, coverage):
+    benchmark(coverage.intersects, (1100000, 6600000, 1200000, 6700000), SRS(3857))
+
+
+class CountingPool(object):
+    def __init__(self):
+        self.tiles = 0
+
+    def process(self, tiles, progress):
+        self.tiles += len(tiles)
+
+
+def test_tile_walker_walk(benchmark, coverage):
+    grid = tile_grid(3857, name='global-webmercator')
+    tile_mgr = TileManager(grid, DummyCache(), [TiledSource(grid, None)], 'png',
+                           locker=DummyLocker(), meta_size=(4, 4))
+    md = dict(name='bench', cache_name='bench', grid_name='webmercator')
+
+    def walk():
+        pool = CountingPool()
+        task = SeedTask(md, tile_mgr, list(range(11)), refresh_timestamp=None, refresh_all=False,
+                        coverage=coverage)
+        TileWalker(task, pool, handle_uncached=True).walk()
+        return pool.tiles
+
+    assert benchmark(walk) > 500
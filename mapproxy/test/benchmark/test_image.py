@@ -0,0 +1,78 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Benchmarks for merging, transforming and encoding images.
+"""
+import pytest
+
+from mapproxy.image import ImageResult, img_to_buf
+from mapproxy.image.merge import LayerMerger
+from mapproxy.image.opts import ImageOptions
+from mapproxy.image.transform import ImageTransformer, transform_meshes
+from mapproxy.srs import SRS
+from mapproxy.test.benchmark.conftest import synthetic_image
+
+SIZE = (512, 512)
+
+
+def test_layer_merger_merge(benchmark):
+    layers = [
+        ImageResult(synthetic_image(SIZE), image_opts=ImageOptions(transparent=True))
+        for _ in range(3)
+    ]
+    image_opts = ImageOptions(format='image/png', transparent=True)
+
+    def merge():
+        merger = LayerMerger()
+        for layer in layers:
+            merger.add(layer)
+        return merger.merge(image_opts=image_opts, size=SIZE)
+
+    result = benchmark(merge)
+    assert result.size == SIZE
+
+
+def test_transform_meshes(benchmark):
+    src_srs, dst_srs = SRS(4326), SRS(3857)
+    meshes = benchmark(transform_meshes,
+                       src_size=SIZE, src_bbox=(5, 45, 15, 55), src_srs=src_srs,
+                       dst_size=SIZE, dst_bbox=(556597, 5621521, 1669792, 7361866), dst_srs=dst_srs)
+    assert len(meshes) > 1
+
+
+def test_image_transformer(benchmark):
+    transformer = ImageTransformer(SRS(4326), SRS(3857))
+    src_img = ImageResult(synthetic_image(SIZE), image_opts=ImageOptions(transparent=True))
+    image_opts = ImageOptions(format='image/png', transparent=True, resampling='bicubic')
+
+    result = benchmark(transformer.transform, src_img, (5, 45, 15, 55), SIZE,
+                       (556597, 5621521, 1669792, 7361866), image_opts)
+    assert result.size == SIZE
+
+
+@pytest.mark.parametrize('image_opts', [
+    ImageOptions(format='image/png'),
+    ImageOptions(format='image/png', colors=256, transparent=True),
+    ImageOptions(format='image/jpeg'),
+    ImageOptions(format='image/webp'),
+    ImageOptions(format='image/tiff'),
+    ImageOptions(format='mixed'),
+], ids=['png', 'png8', 'jpeg', 'webp', 'tiff', 'mixed'])
+def test_img_to_buf(benchmark, image_opts):
+    img = synthetic_image((256, 256))
+    buf = benchmark(img_to_buf, img, image_opts)
+    assert len(buf.getvalue()) > 0
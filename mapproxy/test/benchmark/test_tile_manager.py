@@ -0,0 +1,78 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Benchmarks for `TileManager.load_tile_coords` with cached tiles and with
+tiles that are created from a source.
+"""
+import pytest
+
+from mapproxy.cache.base import TileLocker
+from mapproxy.cache.dummy import DummyCache
+from mapproxy.cache.file import FileCache
+from mapproxy.cache.tile_manager import TileManager
+from mapproxy.grid.tile_grid import tile_grid
+from mapproxy.image import ImageResult
+from mapproxy.image.opts import ImageOptions
+from mapproxy.layer.map_layer import MapLayer
+from mapproxy.test.benchmark.conftest import synthetic_image
+
+LEVEL = 8
+
+
+class SyntheticSource(MapLayer):
+    def __init__(self):
+        super().__init__()
+        self.image = synthetic_image((256, 256))
+
+    def get_map(self, query):
+        return ImageResult(self.image.resize(query.size), image_opts=ImageOptions(format='image/png'))
+
+
+def tile_coords(num_tiles):
+    width = int(num_tiles ** 0.5)
+    return [(100 + x, 100 + y, LEVEL) for y in range(width) for x in range(width)]
+
+
+def make_tile_mgr(cache, tmpdir):
+    return TileManager(
+        tile_grid(3857, name='global-webmercator'), cache, [SyntheticSource()], 'png',
+        image_opts=ImageOptions(format='image/png'),
+        locker=TileLocker(tmpdir.join('lock').strpath, 10, 'bench'),
+        identifier='bench_cache',
+    )
+
+
+@pytest.mark.parametrize('num_tiles', [1, 64])
+def test_load_tile_coords_cached(benchmark, tmpdir, num_tiles):
+    tile_mgr = make_tile_mgr(FileCache(tmpdir.join('cache').strpath, 'png'), tmpdir)
+    coords = tile_coords(num_tiles)
+    tile_mgr.load_tile_coords(coords)  # create all tiles
+
+    tiles = benchmark(tile_mgr.load_tile_coords, coords)
+    assert len(tiles) == num_tiles
+    assert all(not t.is_missing() for t in tiles)
+
+
+@pytest.mark.parametrize('num_tiles', [1, 64])
+def test_load_tile_coords_created(benchmark, tmpdir, num_tiles):
+    # DummyCache does not store tiles, all tiles are created for each call
+    tile_mgr = make_tile_mgr(DummyCache(), tmpdir)
+    coords = tile_coords(num_tiles)
+
+    tiles = benchmark(tile_mgr.load_tile_coords, coords)
+    assert len(tiles) == num_tiles
+    assert all(t.image_result is not None for t in tiles)
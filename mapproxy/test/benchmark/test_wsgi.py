@@ -0,0 +1,88 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+End-to-end benchmarks of the MapProxy WSGI application with a local
+stand-in WMS as source.
+"""
+import pytest
+import yaml
+from webtest import TestApp
+
+from mapproxy.wsgiapp import make_wsgi_app
+
+
+def mapproxy_conf(wms_url, cache_dir):
+    return {
+        'services': {'wms': {'srs': ['EPSG:3857', 'EPSG:4326']}, 'tms': {}, 'wmts': {}},
+        'globals': {'cache': {'base_dir': cache_dir}},
+        'layers': [
+            {'name': 'direct', 'title': 'Direct', 'sources': ['wms_source']},
+            {'name': 'cached', 'title': 'Cached', 'sources': ['cache']},
+            {'name': 'uncached', 'title': 'Not stored', 'sources': ['cache_no_storage']},
+        ],
+        'caches': {
+            'cache': {'grids': ['webmercator'], 'sources': ['wms_source']},
+            'cache_no_storage': {'grids': ['webmercator'], 'sources': ['wms_source'], 'disable_storage': True},
+        },
+        'sources': {
+            'wms_source': {
+                'type': 'wms',
+                'req': {'url': wms_url, 'layers': 'bench', 'transparent': True},
+            },
+        },
+        'grids': {'webmercator': {'base': 'GLOBAL_WEBMERCATOR'}},
+    }
+
+
+@pytest.fixture(scope='module')
+def app(tmpdir_factory, stand_in_wms):
+    base_dir = tmpdir_factory.mktemp('wsgi_bench')
+    conf_file = base_dir.join('mapproxy.yaml')
+    conf_file.write(yaml.safe_dump(mapproxy_conf(stand_in_wms, base_dir.join('cache_data').strpath)))
+    return TestApp(make_wsgi_app(conf_file.strpath))
+
+
+def get(app, url):
+    resp = app.get(url)
+    assert resp.status_code == 200
+    return resp
+
+
+def test_tms_tile_cached(benchmark, app):
+    get(app, '/tms/1.0.0/cached/EPSG3857/5/16/20.png')
+    benchmark(get, app, '/tms/1.0.0/cached/EPSG3857/5/16/20.png')
+
+
+def test_tms_tile_created(benchmark, app):
+    benchmark(get, app, '/tms/1.0.0/uncached/EPSG3857/5/16/20.png')
+
+
+@pytest.mark.parametrize('layer', ['direct', 'cached'])
+def test_wms_get_map(benchmark, app, layer):
+    url = ('/service?SERVICE=WMS&VERSION=1.1.1&REQUEST=GetMap&LAYERS=%s&STYLES='
+           '&SRS=EPSG:4326&BBOX=5,45,15,55&WIDTH=512&HEIGHT=512&FORMAT=image/png' % layer)
+    get(app, url)
+    benchmark(get, app, url)
+
+
+def test_wms_capabilities(benchmark, app):
+    benchmark(get, app, '/service?SERVICE=WMS&VERSION=1.1.1&REQUEST=GetCapabilities')
+
+
+def test_wmts_rest_tile_cached(benchmark, app):
+    get(app, '/wmts/cached/webmercator/05/16/11.png')
+    benchmark(get, app, '/wmts/cached/webmercator/05/16/11.png')
@@ -139,6 +139,29 @@ class TestWMSAuth(SysTest):
         assert float(limited_bbox.attrib["maxx"]) == 0.0
         assert float(limited_bbox.attrib["maxy"]) == 5.0
 
+    def test_capabilities_authorize_partial_cached(self, app):
+
+        def auth(geometry):
+            def auth(service, layers, **kw):
+                return {
+                    "authorized": "partial",
+                    "layers": {
+                        "layer2": {
+                            "map": True,
+                            "limited_to": {"srs": "EPSG:4326", "geometry": geometry},
+                        },
+                        "layer2b": {"map": True},
+                        "layer2b1": {"map": True},
+                    },
+                }
+            return auth
+
+        # capabilities are cached for each set of permissions
+        for geometry in ([-40.0, -50.0, 0.0, 5.0], [-30.0, -50.0, 0.0, 5.0], [-40.0, -50.0, 0.0, 5.0]):
+            resp = app.get(CAPABILITIES_REQ, extra_environ={"mapproxy.authorize": auth(geometry)})
+            limited_bbox = resp.lxml.xpath("//Layer/LatLonBoundingBox")[1]
+            assert float(limited_bbox.attrib["minx"]) == geometry[0]
+
     def test_capabilities_authorize_partial_global_limited(self, app):
 
         def auth(service, layers, **kw):
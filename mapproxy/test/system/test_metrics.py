@@ -0,0 +1,75 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from mapproxy.test.image import tmp_image
+from mapproxy.test.http import mock_httpd
+from mapproxy.test.system import SysTest
+from mapproxy.util import metrics
+
+
+@pytest.fixture(scope="module")
+def config_file():
+    return "metrics.yaml"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def disable_metrics():
+    yield
+    metrics.registry.disable()
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    for metric in metrics.registry.metrics:
+        metric.clear()
+
+
+class TestMetrics(SysTest):
+
+    def test_metrics(self, app):
+        with tmp_image((256, 256), format="png") as img:
+            expected_req = (
+                {"path": r"/tiles/01/000/000/000/000/000/001.png"},
+                {"body": img.read(), "headers": {"content-type": "image/png"}},
+            )
+            with mock_httpd(("localhost", 42423), [expected_req]):
+                resp = app.get("/tiles/1.0.0/tiles/EPSG900913/1/0/1.png")
+                assert resp.content_type == "image/png"
+        # second request from cache
+        resp = app.get("/tiles/1.0.0/tiles/EPSG900913/1/0/1.png")
+        tile_size = len(resp.body)
+
+        resp = app.get("/metrics")
+        assert resp.content_type == "text/plain"
+        assert resp.headers["Content-type"] == metrics.CONTENT_TYPE
+        lines = resp.text.split("\n")
+        assert 'mapproxy_request_duration_seconds_count{service="tiles"} 2' in lines
+        assert 'mapproxy_response_bytes_total{service="tiles"} %d' % (tile_size * 2) in lines
+        assert 'mapproxy_tile_layer_duration_seconds_count{layer="tiles"} 2' in lines
+        assert 'mapproxy_cache_tiles_total{cache="tiles_cache_GLOBAL_MERCATOR",result="hit"} 1' in lines
+        assert 'mapproxy_cache_tiles_total{cache="tiles_cache_GLOBAL_MERCATOR",result="miss"} 1' in lines
+        assert 'mapproxy_tile_creation_duration_seconds_count{cache="tiles_cache_GLOBAL_MERCATOR"} 1' in lines
+        assert 'mapproxy_tile_lock_wait_seconds_count{cache="tiles_cache_GLOBAL_MERCATOR"} 1' in lines
+        assert 'mapproxy_upstream_duration_seconds_count{host="localhost:42423"} 1' in lines
+        assert "# TYPE mapproxy_request_duration_seconds histogram" in lines
+
+    def test_metrics_unauthorized(self, app):
+        def auth(service, layers, **kw):
+            assert service == "metrics"
+            return {"authorized": "none"}
+
+        app.get("/metrics", extra_environ={"mapproxy.authorize": auth}, status=403)
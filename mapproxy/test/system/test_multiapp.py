@@ -24,6 +24,7 @@ import pytest
 from mapproxy.multiapp import make_wsgi_app
 
 from mapproxy.test.system import SysTest, WSGITestApp
+from mapproxy.util import metrics
 
 
 class TestMultiapp(SysTest):
@@ -81,6 +82,42 @@ class TestMultiapp(SysTest):
         assert "demo" in resp
 
 
+class TestMultiappMetrics(SysTest):
+
+    @pytest.fixture(scope="class")
+    def app(self, base_dir):
+        app = make_wsgi_app(base_dir.strpath, allow_listing=False)
+        yield WSGITestApp(app, use_unicode=False)
+        metrics.registry.disable()
+
+    @pytest.fixture(scope="class")
+    def base_dir(self, tmpdir_factory):
+        dir = tmpdir_factory.mktemp("base_dir")
+
+        fixture_dir = os.path.join(os.path.dirname(__file__), "fixture")
+        shutil.copy(os.path.join(fixture_dir, "metrics.yaml"), dir.strpath)
+        shutil.copy(os.path.join(fixture_dir, "multiapp1.yaml"), dir.strpath)
+
+        return dir
+
+    @pytest.fixture(autouse=True)
+    def clear_metrics(self):
+        for metric in metrics.registry.metrics:
+            metric.clear()
+
+    def test_metrics_only_for_apps_with_metrics_service(self, app):
+        app.get("/metrics/tms/1.0.0/")
+        # loading an app without metrics service does not disable
+        # the metrics of other apps
+        app.get("/multiapp1/tms/1.0.0/")
+        app.get("/metrics/tms/1.0.0/")
+
+        resp = app.get("/metrics/metrics")
+        assert 'mapproxy_request_duration_seconds_count{service="tms"} 2' in resp
+        # multiapp1 is not configured with the metrics service
+        app.get("/multiapp1/metrics", status=404)
+
+
 def replace_text_in_file(filename, old, new, ts_delta=2):
     text = io.open(filename, encoding="utf-8").read()
     text = text.replace(old, new)
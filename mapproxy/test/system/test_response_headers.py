@@ -30,20 +30,20 @@ class TestResponseHeaders(SysTest):
 
     def test_tms(self, app):
         resp = app.get('http://localhost/tms')
-        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto')
+        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto', 'Accept-Encoding')
 
     def test_wms(self, app):
         resp = app.get('http://localhost/service?SERVICE=WMS&REQUEST=GetCapabilities'
                        '&VERSION=1.1.0')
-        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto')
+        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto', 'Accept-Encoding')
 
     def test_wmts(self, app):
         resp = app.get('http://localhost/service?SERVICE=WMTS&REQUEST=GetCapabilities')
-        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto')
+        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto', 'Accept-Encoding')
 
     def test_restful_wmts(self, app):
         resp = app.get('http://localhost/wmts/1.0.0/WMTSCapabilities.xml')
-        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto')
+        assert resp.vary == ('X-Script-Name', 'X-Forwarded-Host', 'X-Forwarded-Proto', 'Accept-Encoding')
 
     def test_no_endpoint(self, app):
         resp = app.get('http://localhost/service?', expect_errors=True)
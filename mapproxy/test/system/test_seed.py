@@ -18,13 +18,18 @@ import time
 import shutil
 import tempfile
 
+import pytest
+
 from mapproxy.config.loader import load_configuration
 from mapproxy.cache.tile import Tile
 from mapproxy.image import ImageResult
 from mapproxy.image.opts import ImageOptions
+from mapproxy.seed import access_log
+from mapproxy.seed import config as seed_config
 from mapproxy.seed.seeder import seed
 from mapproxy.seed.cleanup import cleanup
-from mapproxy.seed.config import load_seed_tasks_conf
+from mapproxy.seed.config import load_seed_tasks_conf, SeedConfigurationError
+from mapproxy.seed.util import format_seed_task
 from mapproxy.config import local_base_config
 from mapproxy.util.fs import ensure_directory
 
@@ -412,6 +417,54 @@ class TestSeed(SeedTestBase):
         assert not os.path.exists(t000)
 
 
+class TestSeedAccessLog(SeedTestEnvironment):
+    seed_conf_name = 'seed_access_log.yaml'
+    mapproxy_conf_name = 'seed_mapproxy.yaml'
+    empty_ogrdata = 'empty_ogrdata.geojson'
+
+    def test_seed_access_log(self):
+        with open(os.path.join(self.dir, 'tile_access.log'), 'w') as f:
+            f.write('one_GLOBAL_GEODETIC 0/0/0\n' * 3)
+            f.write('one_GLOBAL_GEODETIC 1/1/0\n')
+            f.write('one_GLOBAL_GEODETIC 3/0/0\n')
+            f.write('mbtile_cache_GLOBAL_GEODETIC 1/1/0\n' * 10)
+        with local_base_config(self.mapproxy_conf.base_config):
+            seed_conf = load_seed_tasks_conf(self.seed_conf_file, self.mapproxy_conf)
+            tasks = seed_conf.seeds(['popular'])
+            assert len(tasks) == 1
+            # level 1 meta tile includes the children of 0/0/0
+            assert tasks[0].tiles == [(0, 0, 1), (0, 0, 0)]
+            assert tasks[0].time_budget == 60
+            assert 'Popular tiles from access log: 2' in format_seed_task(tasks[0])
+            seed(tasks, dry_run=True)
+
+    def test_seed_access_log_multiple_caches(self, monkeypatch):
+        with open(os.path.join(self.dir, 'tile_access.log'), 'w') as f:
+            f.write('one_GLOBAL_GEODETIC 0/0/0\n')
+            f.write('mbtile_cache_GLOBAL_GEODETIC 1/1/0\n')
+        calls = []
+
+        def read_tile_access_logs(filenames):
+            calls.append(filenames)
+            return access_log.read_tile_access_logs(filenames)
+        monkeypatch.setattr(seed_config, 'read_tile_access_logs', read_tile_access_logs)
+
+        with local_base_config(self.mapproxy_conf.base_config):
+            seed_conf = load_seed_tasks_conf(self.seed_conf_file, self.mapproxy_conf)
+            tasks = seed_conf.seeds(['popular_multiple_caches'])
+            assert [t.md['cache_name'] for t in tasks] == ['one', 'mbtile_cache']
+            assert tasks[0].tiles == [(0, 0, 0), (0, 0, 1)]
+            assert tasks[1].tiles == [(0, 0, 1)]
+        # logs are read once for all tasks
+        assert len(calls) == 1
+
+    def test_seed_access_log_missing(self):
+        with local_base_config(self.mapproxy_conf.base_config):
+            seed_conf = load_seed_tasks_conf(self.seed_conf_file, self.mapproxy_conf)
+            with pytest.raises(SeedConfigurationError):
+                seed_conf.seeds(['popular'])
+
+
 class TestConcurrentRequestsSeed(SeedTestEnvironment):
     seed_conf_name = 'seed_timeouts.yaml'
     mapproxy_conf_name = 'seed_timeouts_mapproxy.yaml'
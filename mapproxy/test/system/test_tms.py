@@ -15,6 +15,7 @@
 
 import os
 import hashlib
+import logging
 
 from io import BytesIO
 
@@ -48,6 +49,14 @@ class TestTMS(SysTest):
         resp2 = app.get("/tms/1.0.0")
         assert resp.body == resp2.body
 
+    def test_tms_capabilities_cached(self, app):
+        for url in ["/tms/1.0.0/", "/tms/1.0.0/wms_cache", "/tms"]:
+            resp = app.get(url)
+            etag = resp.headers["ETag"]
+            assert app.get(url).headers["ETag"] == etag
+            app.get(url, headers={"If-None-Match": etag}, status=304)
+        assert app.get("/tms/1.0.0/wms_cache_multi").headers["ETag"] != app.get("/tms/1.0.0/wms_cache").headers["ETag"]
+
     def test_tms_layer_capabilities(self, app):
         resp = app.get("/tms/1.0.0/wms_cache")
         assert "WMS Cache Layer" in resp
@@ -99,6 +108,13 @@ class TestTMS(SysTest):
         data = BytesIO(resp.body)
         assert is_jpeg(data)
 
+    def test_get_cached_tile_access_log(self, app, fixture_cache_data, caplog):
+        with caplog.at_level(logging.INFO, logger="mapproxy.tile.access"):
+            app.get("/tms/1.0.0/wms_cache/0/0/1.jpeg")
+        assert [r.getMessage() for r in caplog.records if r.name == "mapproxy.tile.access"] == [
+            "wms_cache_GLOBAL_MERCATOR 1/0/1"
+        ]
+
     def test_get_tile(self, app, cache_dir):
         with tmp_image((256, 256), format="jpeg") as img:
             expected_req = (
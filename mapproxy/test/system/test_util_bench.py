@@ -0,0 +1,115 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import os
+import shutil
+
+import pytest
+
+from mapproxy.script.bench import RequestMix, bench_command, request_targets
+from mapproxy.test.helper import capture
+from mapproxy.util import metrics
+from mapproxy.wsgiapp import make_wsgi_app
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixture")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def disable_metrics():
+    yield
+    metrics.registry.disable()
+
+
+class TestUtilBench(object):
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.dir = tmpdir.strpath
+        shutil.copy(os.path.join(FIXTURE_DIR, "util_bench.yaml"), self.dir)
+        self.mapproxy_conf_file = os.path.join(self.dir, "util_bench.yaml")
+        self.json_file = os.path.join(self.dir, "bench.json")
+        self.args = ["command_dummy", "-f", self.mapproxy_conf_file, "--json", self.json_file]
+
+    def bench(self, *args):
+        with capture() as (out, err):
+            bench_command(self.args + list(args))
+        with open(self.json_file) as f:
+            return out.getvalue(), json.load(f)
+
+    def test_config_not_found(self):
+        self.args = ["command_dummy", "-f", "foo.bar"]
+        with capture() as (out, err):
+            with pytest.raises(SystemExit) as ex:
+                bench_command(self.args)
+        assert ex.value.code != 0
+        assert err.getvalue().startswith("ERROR:")
+
+    def test_synthetic(self):
+        out, result = self.bench("-n", "60", "-c", "2", "--levels", "0..4")
+        assert "60 requests in" in out
+        services = result["services"]
+        assert set(services) == {"tms", "wmts", "wms", "all"}
+        assert services["all"]["requests"] == 60
+        assert services["all"]["errors"] == 0
+        assert services["all"]["latency_ms"]["p50"] <= services["all"]["latency_ms"]["p99"]
+        cache = result["caches"]["debug_cache_GLOBAL_WEBMERCATOR"]
+        assert cache["hit"] + cache["miss"] > 0
+
+    def test_services(self):
+        out, result = self.bench("-n", "20", "--services", "wms")
+        assert set(result["services"]) == {"wms", "all"}
+        assert result["services"]["wms"]["errors"] == 0
+
+    def test_unknown_service(self):
+        with capture() as (out, err):
+            with pytest.raises(SystemExit):
+                bench_command(self.args + ["--services", "tms,wfs"])
+        assert "unknown services: wfs" in err.getvalue()
+
+    def test_log(self):
+        log_file = os.path.join(self.dir, "access.log")
+        with open(log_file, "w") as f:
+            for _ in range(5):
+                f.write('127.0.0.1 - - [01/Jan/2025:00:00:00 +0000] '
+                        '"GET /tms/1.0.0/cached/EPSG3857/1/0/0.png HTTP/1.1" 200 512\n')
+                # same tile with nw origin
+                f.write('/wmts/cached/GLOBAL_WEBMERCATOR/2/0/3.png\n')
+        out, result = self.bench("--log", log_file, "-c", "1")
+        assert result["services"]["tms"]["requests"] == 5
+        assert result["services"]["wmts"]["requests"] == 5
+        assert result["caches"]["debug_cache_GLOBAL_WEBMERCATOR"] == {
+            "hit": 9, "miss": 1, "stale": 0, "hit_rate": 0.9,
+        }
+
+
+def test_request_mix():
+    app = make_wsgi_app(os.path.join(FIXTURE_DIR, "util_bench.yaml"))
+    targets = request_targets(app)
+    assert sorted(targets) == ["tms", "wms", "wmts"]
+
+    def paths(seed):
+        mix = RequestMix(targets, {"tms": 1, "wms": 1}, {3: 1, 4: 1}, seed=seed)
+        return [mix.next_path() for _ in range(20)]
+
+    assert paths(1) == paths(1)
+    assert paths(1) != paths(2)
+    for path in paths(1):
+        assert path.startswith(("/tms/1.0.0/cached/", "/tms/1.0.0/direct/", "/service?SERVICE=WMS"))
+        if path.startswith("/tms"):
+            # TMS levels of the global profiles start one level below
+            assert path.split("/")[5] in ("2", "3")
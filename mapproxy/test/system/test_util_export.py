@@ -16,9 +16,11 @@
 import os
 import tempfile
 import shutil
+import sqlite3
 import contextlib
 
 import pytest
+from mapproxy.cache.mbtiles import MBTilesCache
 from mapproxy.grid import TileCoord
 
 from mapproxy.script.export import export_command
@@ -209,3 +211,66 @@ class TestUtilExport(object):
         assert os.path.exists(os.path.join(self.dest, "0", "0", "0.png"))
         assert os.path.exists(os.path.join(self.dest, "1", "1", "1.png"))
         assert os.path.exists(os.path.join(self.dest, "2", "2", "2.png"))
+
+    def test_bulk(self):
+        self.args += [
+            "--grid",
+            "GLOBAL_MERCATOR",
+            "--levels",
+            "0,1",
+            "--source",
+            "tms_cache",
+        ]
+        # fill tms_cache
+        with tile_server([(0, 0, 0), (0, 0, 1), (0, 1, 1), (1, 0, 1), (1, 1, 1)]):
+            with capture() as (out, err):
+                export_command(self.args + ["--dest", self.dest, "--fetch-missing-tiles"])
+
+        dest = os.path.join(self.dir, "bulk.mbtiles")
+        with capture() as (out, err):
+            export_command(self.args + ["--dest", dest, "--type", "mbtile", "--bulk", "-c", "2"])
+        assert "copied 5 tiles" in out.getvalue()
+
+        with sqlite3.connect(dest) as db:
+            assert db.execute("SELECT count(*) FROM tiles").fetchone()[0] == 5
+
+    def test_bulk_failed_store(self, monkeypatch):
+        self.args += [
+            "--grid",
+            "GLOBAL_MERCATOR",
+            "--levels",
+            "0,1",
+            "--source",
+            "tms_cache",
+        ]
+        with tile_server([(0, 0, 0), (0, 0, 1), (0, 1, 1), (1, 0, 1), (1, 1, 1)]):
+            with capture() as (out, err):
+                export_command(self.args + ["--dest", self.dest, "--fetch-missing-tiles"])
+
+        monkeypatch.setattr(MBTilesCache, "store_tiles", lambda self, tiles, dimensions=None: False)
+        monkeypatch.setattr(MBTilesCache, "store_tile", lambda self, tile, dimensions=None: tile.coord[2] == 0)
+        dest = os.path.join(self.dir, "bulk.mbtiles")
+        with capture() as (out, err):
+            with pytest.raises(SystemExit) as exc:
+                export_command(self.args + ["--dest", dest, "--type", "mbtile", "--bulk"])
+        assert exc.value.code == 1
+        assert "copied 1 tiles" in out.getvalue()
+        assert "unable to store 4 tiles" in err.getvalue()
+
+    def test_bulk_fetch_missing_tiles(self):
+        self.args += [
+            "--grid",
+            "GLOBAL_MERCATOR",
+            "--dest",
+            self.dest,
+            "--levels",
+            "0",
+            "--source",
+            "tms_cache",
+            "--bulk",
+            "--fetch-missing-tiles",
+        ]
+        with capture() as (out, err):
+            with pytest.raises(SystemExit):
+                export_command(self.args)
+        assert "--bulk" in err.getvalue()
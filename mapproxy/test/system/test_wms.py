@@ -205,6 +205,38 @@ class TestWMS111(SysTest):
 
         assert validate_with_dtd(xml, dtd_name="wms/1.1.1/WMS_MS_Capabilities.dtd")
 
+    def test_wms_capabilities_cached(self, app):
+        req = WMS111CapabilitiesRequest(url="/service?").copy_with_request_params(
+            self.common_req
+        )
+        resp = app.get(req)
+        etag = resp.headers["ETag"]
+        assert "Accept-Encoding" in resp.headers["Vary"]
+
+        resp2 = app.get(req)
+        assert resp2.headers["ETag"] == etag
+        assert resp2.body == resp.body
+
+        app.get(req, headers={"If-None-Match": etag}, status=304)
+
+        # tiled capabilities and other URLs are cached separately
+        resp = app.get(str(req) + "&tiled=true")
+        assert resp.headers["ETag"] != etag
+        resp = app.get(req, extra_environ={"HTTP_X_SCRIPT_NAME": "/foo"})
+        assert resp.headers["ETag"] != etag
+        assert b"http://localhost/foo/service?" in resp.body
+
+    def test_wms_capabilities_gzip(self, app):
+        req = WMS111CapabilitiesRequest(url="/service?").copy_with_request_params(
+            self.common_req
+        )
+        resp = app.get(req)
+        resp_gzip = app.get(req, headers={"Accept-Encoding": "gzip, deflate"})
+        # webtest decodes the gzip content
+        assert resp_gzip.content_type == "application/vnd.ogc.wms_xml"
+        assert resp_gzip.headers["ETag"] == resp.headers["ETag"] + "-gzip"
+        assert resp_gzip.body == resp.body
+
     def test_invalid_layer(self, app):
         self.common_map_req.params["layers"] = "invalid"
         resp = app.get(self.common_map_req, expect_errors=True)
@@ -133,6 +133,16 @@ class TestWMTS(SysTest):
                 xml, xsd_name="wmts/1.0/wmtsGetCapabilities_response.xsd"
             )
 
+    def test_capabilities_cached(self, app):
+        req = str(self.common_cap_req)
+        resp = app.get(req)
+        etag = resp.headers["ETag"]
+        assert app.get(req).headers["ETag"] == etag
+        app.get(req, headers={"If-None-Match": etag}, status=304)
+        resp_gzip = app.get(req, headers={"Accept-Encoding": "gzip"})
+        assert resp_gzip.headers["ETag"] == etag + "-gzip"
+        assert resp_gzip.body == resp.body
+
     def test_capabilities(self, app):
         req = str(self.common_cap_req)
         resp = app.get(req)
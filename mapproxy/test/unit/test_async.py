@@ -18,7 +18,7 @@ from __future__ import print_function
 import time
 import threading
 
-from mapproxy.util.async_ import ThreadPool, imap
+from mapproxy.util.async_ import Executor, ThreadPool, imap
 
 
 class TestThreaded(object):
@@ -240,3 +240,62 @@ class TestThreadedExecutorException(object):
                                                'soon (exec_count should be 7+(max(3)))'
         else:
             assert False, 'expected DummyException'
+
+
+class TestExecutor(object):
+    def test_map(self):
+        executor = Executor(4)
+        threads = set()
+
+        def func(x):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.01)
+            return x * 2
+        assert executor.map(func, range(20)) == list(range(0, 40, 2))
+        assert len(threads) > 1
+        # threads are reused
+        pool = executor._executor()
+        executor.map(func, range(20))
+        assert executor._executor() is pool
+
+    def test_single_item(self):
+        executor = Executor(4)
+        assert executor.map(lambda x: threading.current_thread(), [1]) == [threading.current_thread()]
+        assert executor._pool is None
+
+    def test_base_config(self):
+        from mapproxy.config import base_config
+        from mapproxy.config import local_base_config
+        from copy import deepcopy
+
+        conf = deepcopy(base_config())
+        conf.conf = 42
+        executor = Executor(4)
+        with local_base_config(conf):
+            assert executor.map(lambda x: base_config().conf, range(10)) == [42] * 10
+
+    def test_submit(self):
+        from mapproxy.config import base_config
+        from mapproxy.config import local_base_config
+        from copy import deepcopy
+
+        conf = deepcopy(base_config())
+        conf.conf = 42
+        executor = Executor(1)
+        with local_base_config(conf):
+            future = executor.submit(lambda x: (x, base_config().conf, threading.current_thread()), 1)
+        x, conf, thread = future.result()
+        assert (x, conf) == (1, 42)
+        assert thread is not threading.current_thread()
+
+    def test_exception(self):
+        def func(x):
+            if x == 5:
+                raise DummyException()
+            return x
+        try:
+            Executor(4).map(func, range(10))
+        except DummyException:
+            pass
+        else:
+            assert False, 'exception expected'
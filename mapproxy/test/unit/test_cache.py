@@ -31,7 +31,7 @@ import pytest
 from mapproxy.cache.base import TileLocker
 from mapproxy.cache.file import FileCache
 from mapproxy.cache.tile import Tile
-from mapproxy.cache.tile_manager import TileManager
+from mapproxy.cache.tile_manager import MissingTiles, TileManager
 from mapproxy.client.http import HTTPClient
 from mapproxy.client.wms import WMSClient
 from PIL import Image
@@ -208,6 +208,153 @@ class TestTileManagerStaleTiles(object):
         tile_mgr._expire_timestamp = time.time()
         assert tile_mgr.is_stale(Tile((0, 0, 1)))
 
+    def test_uncached_tile_coords(self, tile_mgr, file_cache):
+        create_cached_tile(Tile((0, 0, 1)), file_cache, timestamp=time.time()-3600)
+        create_cached_tile(Tile((1, 0, 1)), file_cache)
+        coords = [(0, 0, 1), None, (1, 0, 1), (0, 1, 1)]
+        assert tile_mgr.uncached_tile_coords(coords) == [(0, 1, 1)]
+        tile_mgr._expire_timestamp = time.time() - 60
+        assert tile_mgr.uncached_tile_coords(coords) == [(0, 0, 1), (0, 1, 1)]
+
+
+class TestTileManagerStaleWhileRevalidate(object):
+
+    @pytest.fixture
+    def tile_client(self):
+        return MockTileClient()
+
+    @pytest.fixture
+    def tile_mgr(self, file_cache, tile_locker, tile_client):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        source = TiledSource(grid, tile_client)
+        tile_mgr = TileManager(grid, file_cache, [source], 'png', locker=tile_locker,
+                               image_opts=ImageOptions(format='image/png'),
+                               stale_while_revalidate=True)
+        return tile_mgr
+
+    def wait_for_refresh(self, tile_mgr):
+        for _ in range(100):
+            if not len(tile_mgr.stale_tile_refresher):
+                return
+            time.sleep(0.01)
+        assert False, 'tile not refreshed'
+
+    def test_serve_stale_tile(self, tile_mgr, file_cache, tile_client):
+        create_cached_tile(Tile((0, 0, 1)), file_cache, timestamp=time.time()-3600)
+        tile_mgr._expire_timestamp = time.time() - 60
+
+        tile = tile_mgr.load_tile_coord((0, 0, 1))
+        assert tile.image_result_buffer().read() == b'foo'
+
+        self.wait_for_refresh(tile_mgr)
+        assert tile_client.requested_tiles == [(0, 0, 1)]
+        assert tile_mgr.is_cached(Tile((0, 0, 1)))
+        tile = tile_mgr.load_tile_coord((0, 0, 1))
+        assert is_png(tile.image_result_buffer())
+
+    def test_create_missing_tile(self, tile_mgr, tile_client):
+        tile = tile_mgr.load_tile_coord((0, 0, 1))
+        assert is_png(tile.image_result_buffer())
+        assert tile_client.requested_tiles == [(0, 0, 1)]
+        assert not len(tile_mgr.stale_tile_refresher)
+
+    def test_refresh_once(self, tile_mgr, file_cache, tile_client):
+        create_cached_tile(Tile((0, 0, 1)), file_cache, timestamp=time.time()-3600)
+        tile_mgr._expire_timestamp = time.time() - 60
+        get_tile = tile_client.get_tile
+
+        def slow_get_tile(tile_coord, format=None):
+            time.sleep(0.1)
+            return get_tile(tile_coord, format=format)
+        tile_client.get_tile = slow_get_tile
+
+        for _ in range(3):
+            tile_mgr.load_tile_coord((0, 0, 1))
+        self.wait_for_refresh(tile_mgr)
+        assert tile_client.requested_tiles == [(0, 0, 1)]
+
+    def test_refresh_error(self, tile_mgr, file_cache, tile_client):
+        create_cached_tile(Tile((0, 0, 1)), file_cache, timestamp=time.time()-3600)
+        tile_mgr._expire_timestamp = time.time() - 60
+
+        def get_tile(tile_coord, format=None):
+            tile_client.requested_tiles.append(tile_coord)
+            raise SourceError('failed')
+        tile_client.get_tile = get_tile
+
+        tile = tile_mgr.load_tile_coord((0, 0, 1))
+        assert tile.image_result_buffer().read() == b'foo'
+        self.wait_for_refresh(tile_mgr)
+        assert tile_client.requested_tiles == [(0, 0, 1)]
+        assert tile_mgr.is_stale(Tile((0, 0, 1)))
+
+    def test_most_requested_first(self, tile_mgr, file_cache, tile_client):
+        coords = [(0, 0, 2), (1, 0, 2), (2, 0, 2), (3, 0, 2)]
+        for coord in coords:
+            create_cached_tile(Tile(coord), file_cache, timestamp=time.time()-3600)
+        tile_mgr._expire_timestamp = time.time() - 60
+        get_tile = tile_client.get_tile
+        blocked = threading.Event()
+
+        def blocking_get_tile(tile_coord, format=None):
+            blocked.wait(5)
+            return get_tile(tile_coord, format=format)
+        tile_client.get_tile = blocking_get_tile
+
+        # first tile blocks the worker
+        tile_mgr.load_tile_coord((0, 0, 2))
+        for coord, requests in zip(coords[1:], [1, 3, 2]):
+            for _ in range(requests):
+                tile_mgr.load_tile_coord(coord)
+        assert len(tile_mgr.stale_tile_refresher) == 4
+        blocked.set()
+        self.wait_for_refresh(tile_mgr)
+        assert tile_client.requested_tiles == [(0, 0, 2), (2, 0, 2), (3, 0, 2), (1, 0, 2)]
+
+    def test_queue_size(self, tile_mgr, file_cache, tile_client):
+        tile_mgr.stale_tile_refresher.size = 2
+        tile_mgr.stale_tile_refresher._running = 1  # no workers are started
+        for x in range(4):
+            tile_mgr.stale_tile_refresher.add((x, 0, 2))
+        assert len(tile_mgr.stale_tile_refresher) == 2
+
+    def test_repeated_requests(self, tile_mgr):
+        refresher = tile_mgr.stale_tile_refresher
+        refresher.size = 2
+        refresher._running = 1  # no workers are started
+        for _ in range(10):
+            for x, requests in enumerate([1, 3]):
+                for _ in range(requests):
+                    refresher.add((x, 0, 2))
+        # outdated queue entries are removed
+        assert len(refresher._queue) <= 4
+        assert refresher._next()[1] == (1, 0, 2)
+        assert refresher._next()[1] == (0, 0, 2)
+        assert refresher._next() is None
+
+    def test_workers(self, file_cache, tile_locker, tile_client):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        tile_mgr = TileManager(grid, file_cache, [TiledSource(grid, tile_client)], 'png',
+                               locker=tile_locker, image_opts=ImageOptions(format='image/png'),
+                               stale_while_revalidate=True, refresh_workers=4)
+        coords = [(x, 0, 2) for x in range(4)]
+        for coord in coords:
+            create_cached_tile(Tile(coord), file_cache, timestamp=time.time()-3600)
+        tile_mgr._expire_timestamp = time.time() - 60
+        get_tile = tile_client.get_tile
+        threads = set()
+
+        def slow_get_tile(tile_coord, format=None):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+            return get_tile(tile_coord, format=format)
+        tile_client.get_tile = slow_get_tile
+
+        tile_mgr.load_tile_coords(coords)
+        self.wait_for_refresh(tile_mgr)
+        assert sorted(tile_client.requested_tiles) == coords
+        assert len(threads) > 1
+
 
 class TestTileManagerRemoveTiles(object):
     @pytest.fixture
@@ -387,6 +534,114 @@ class TestTileManagerWMSSourceConcurrent(TestTileManagerWMSSource):
                            )
 
 
+class TestTileManagerWMSSourceCoalesced(object):
+    @pytest.fixture
+    def tile_mgr(self, mock_file_cache, tile_locker, mock_wms_client):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        source = WMSSource(mock_wms_client)
+        image_opts = ImageOptions(format='image/png')
+        return TileManager(grid, mock_file_cache, [source], 'png',
+                           meta_size=[2, 2], meta_buffer=0, image_opts=image_opts,
+                           locker=tile_locker,
+                           concurrent_tile_creators=4,
+                           coalesce_meta_tiles=4,
+                           # waits only until all meta tiles reached the coalescer
+                           coalesce_meta_tiles_delay=60,
+                           )
+
+    def test_create_adjacent_meta_tiles(self, tile_mgr, mock_file_cache, mock_wms_client):
+        tiles = tile_mgr.creator().create_tiles([Tile((0, 0, 3)), Tile((2, 0, 3)), Tile((4, 0, 3))])
+        assert len(mock_file_cache.stored_tiles) == 12
+        assert mock_wms_client.requested == \
+            [((-180.0, -90.0, 90.0, 0.0), (1536, 512), SRS(4326))]
+        for tile in tiles:
+            assert tile.image_result.as_image().size == (256, 256)
+
+    def test_create_separate_meta_tiles(self, tile_mgr, mock_file_cache, mock_wms_client):
+        tile_mgr.creator().create_tiles([Tile((0, 0, 3)), Tile((4, 0, 3)), Tile((0, 2, 3))])
+        assert len(mock_file_cache.stored_tiles) == 12
+        assert sorted(mock_wms_client.requested) == \
+            [((-180.0, -90.0, -90.0, 0.0), (512, 512), SRS(4326)),
+             ((-180.0, 0.0, -90.0, 90.0), (512, 512), SRS(4326)),
+             ((0.0, -90.0, 90.0, 0.0), (512, 512), SRS(4326))]
+
+    def test_max_meta_tiles(self, tile_mgr, mock_file_cache, mock_wms_client):
+        tile_mgr.meta_tile_coalescer.max_meta_tiles = 2
+        tile_mgr.creator().create_tiles([Tile((0, 0, 3)), Tile((2, 0, 3)), Tile((4, 0, 3))])
+        assert len(mock_file_cache.stored_tiles) == 12
+        assert sorted(mock_wms_client.requested) == \
+            [((-180.0, -90.0, 0.0, 0.0), (1024, 512), SRS(4326)),
+             ((0.0, -90.0, 90.0, 0.0), (512, 512), SRS(4326))]
+
+    def test_source_error(self, tile_mgr, mock_file_cache, mock_wms_client):
+        def retrieve(query, format):
+            mock_wms_client.requested.append((query.bbox, query.size, query.srs))
+            raise SourceError('failed')
+        mock_wms_client.retrieve = retrieve
+        with pytest.raises(SourceError):
+            tile_mgr.creator().create_tiles([Tile((0, 0, 3)), Tile((2, 0, 3))])
+        assert mock_file_cache.stored_tiles == set()
+        assert len(mock_wms_client.requested) == 1
+
+    def test_max_output_pixels_of_source(self, mock_file_cache, tile_locker, mock_wms_client):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        source = WMSSource(mock_wms_client, max_output_pixels=1024 * 512)
+        tile_mgr = TileManager(grid, mock_file_cache, [source], 'png',
+                               meta_size=[2, 2], meta_buffer=0, image_opts=ImageOptions(format='image/png'),
+                               locker=tile_locker, concurrent_tile_creators=4,
+                               coalesce_meta_tiles=4, coalesce_meta_tiles_delay=60,
+                               )
+        assert tile_mgr.meta_tile_coalescer.max_pixels == 1024 * 512
+        tile_mgr.creator().create_tiles([Tile((0, 0, 3)), Tile((2, 0, 3)), Tile((4, 0, 3))])
+        assert sorted(mock_wms_client.requested) == \
+            [((-180.0, -90.0, 0.0, 0.0), (1024, 512), SRS(4326)),
+             ((0.0, -90.0, 90.0, 0.0), (512, 512), SRS(4326))]
+
+    def test_no_delay_without_other_meta_tiles(self, tile_mgr, mock_file_cache, mock_wms_client):
+        start = time.monotonic()
+        tile_mgr.creator().create_tiles([Tile((0, 0, 3))])
+        tile_mgr.creator().create_tiles([Tile((2, 0, 3))])
+        # each meta tile is queried right away, without waiting for the 60s delay
+        assert time.monotonic() - start < 30
+        assert len(mock_wms_client.requested) == 2
+        assert tile_mgr.meta_tile_coalescer._active == 0
+
+
+class TestTileManagerWMSSourceStaleMetaTiles(object):
+    @pytest.fixture
+    def tile_mgr(self, file_cache, tile_locker, mock_wms_client):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        source = WMSSource(mock_wms_client)
+        image_opts = ImageOptions(format='image/png')
+        tile_mgr = TileManager(grid, file_cache, [source], 'png',
+                               meta_size=[2, 2], meta_buffer=0, image_opts=image_opts,
+                               locker=tile_locker,
+                               )
+        tile_mgr._expire_timestamp = time.time() - 60
+        return tile_mgr
+
+    @pytest.fixture
+    def failing_wms_client(self, mock_wms_client):
+        def retrieve(query, format):
+            mock_wms_client.requested.append((query.bbox, query.size, query.srs))
+            raise SourceError('failed')
+        mock_wms_client.retrieve = retrieve
+        return mock_wms_client
+
+    def test_serve_stale_meta_tile(self, tile_mgr, file_cache, failing_wms_client):
+        for coord in [(0, 0, 2), (1, 0, 2), (0, 1, 2), (1, 1, 2)]:
+            create_cached_tile(Tile(coord), file_cache, timestamp=time.time()-3600)
+        tile = tile_mgr.load_tile_coord((0, 0, 2))
+        assert tile.image_result_buffer().read() == b'foo'
+        assert len(failing_wms_client.requested) == 1
+
+    def test_partial_meta_tile(self, tile_mgr, file_cache, failing_wms_client):
+        for coord in [(0, 0, 2), (1, 0, 2), (0, 1, 2)]:
+            create_cached_tile(Tile(coord), file_cache, timestamp=time.time()-3600)
+        with pytest.raises(SourceError):
+            tile_mgr.load_tile_coord((0, 0, 2))
+
+
 class TestTileManagerWMSSourceMinimalMetaRequests(object):
     @pytest.fixture
     def tile_mgr(self, mock_file_cache, mock_wms_client, tile_locker):
@@ -1141,6 +1396,96 @@ class TestTileManagerEmptySources(object):
         assert mock_file_cache.loaded_tiles == counting_set([(0, 0, 0), (3, 2, 5)])
 
 
+class TestTileManagerMissingTiles(object):
+    @pytest.fixture
+    def file_cache(self, tmpdir):
+        return RecordFileCache(tmpdir.strpath, 'png')
+
+    def tile_mgr(self, cache, tile_locker, **kw):
+        grid = TileGrid(SRS(4326), origin='sw', bbox=[-180, -90, 180, 90])
+        return TileManager(
+            grid, cache, [], 'png',
+            locker=tile_locker,
+            image_opts=ImageOptions(format='image/png', resampling='nearest'),
+            missing_tile_ttl=60,
+            **kw
+        )
+
+    def test_repeated_misses(self, file_cache, tile_locker):
+        tm = self.tile_mgr(file_cache, tile_locker)
+        file_cache.store_tile(Tile((0, 0, 1), ImageResult(create_tmp_image_buf((256, 256), color=(255, 0, 0)))))
+
+        for _ in range(3):
+            tiles = tm.load_tile_coords([(0, 0, 1), (1, 0, 1)])
+            assert tiles[0].image_result
+            assert tiles[1].image_result is None
+            tiles = tm.load_tile_coords([(3, 2, 5)], dimensions={'time': '2020'})
+            assert is_blank(tiles)
+
+        assert file_cache.loaded_tiles == counting_set([(0, 0, 1)] * 3 + [(1, 0, 1), (3, 2, 5)])
+        assert ((1, 0, 1), None) in tm.missing_tiles
+        assert ((3, 2, 5), {'time': '2020'}) in tm.missing_tiles
+        assert ((3, 2, 5), {'time': '2021'}) not in tm.missing_tiles
+
+    def test_with_source(self, file_cache, tile_locker, mock_tile_client):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        tm = TileManager(
+            grid, file_cache, [TiledSource(grid, mock_tile_client)], 'png',
+            locker=tile_locker, image_opts=ImageOptions(format='image/png'),
+            missing_tile_ttl=60,
+        )
+        tm.load_tile_coords([(0, 0, 1)])
+        # missing tiles are created and stored
+        assert file_cache.stored_tiles == {(0, 0, 1)}
+        assert ((0, 0, 1), None) not in tm.missing_tiles
+
+    def test_cache_rescaled_tiles(self, file_cache, tile_locker):
+        tm = self.tile_mgr(file_cache, tile_locker, rescale_tiles=-1, cache_rescaled_tiles=True)
+        file_cache.store_tile(Tile((0, 0, 0), ImageResult(create_tmp_image_buf((256, 256), color=(255, 0, 0)))))
+
+        assert not is_blank(tm.load_tile_coords([(0, 0, 1)]))
+        assert file_cache.stored_tiles == {(0, 0, 0), (0, 0, 1)}
+        assert ((0, 0, 1), None) not in tm.missing_tiles
+
+        assert not is_blank(tm.load_tile_coords([(0, 0, 1)]))
+        assert file_cache.loaded_tiles == counting_set([(0, 0, 1), (0, 0, 1), (0, 0, 0)])
+
+    def test_cache_rescaled_tiles_dimensions(self, file_cache, tile_locker):
+        tm = self.tile_mgr(file_cache, tile_locker, rescale_tiles=-1, cache_rescaled_tiles=True)
+        dimensions = {'time': '2020'}
+        file_cache.store_tile(Tile((0, 0, 0), ImageResult(create_tmp_image_buf((256, 256), color=(255, 0, 0)))),
+                              dimensions=dimensions)
+
+        assert not is_blank(tm.load_tile_coords([(0, 0, 1)], dimensions=dimensions))
+        assert file_cache.stored_tiles == {(0, 0, 0), (0, 0, 1)}
+        assert ((0, 0, 1), dimensions) not in tm.missing_tiles
+
+
+class TestMissingTiles(object):
+    def test_ttl(self):
+        missing = MissingTiles(ttl=60)
+        missing.add((1, 2, 3))
+        assert ((1, 2, 3), None) in missing
+        assert ((1, 2, 4), None) not in missing
+        missing.discard((1, 2, 3))
+        assert ((1, 2, 3), None) not in missing
+
+        missing = MissingTiles(ttl=-1)
+        missing.add((1, 2, 3))
+        assert ((1, 2, 3), None) not in missing
+
+    def test_size(self):
+        missing = MissingTiles(ttl=60, size=2)
+        missing.add((0, 0, 3))
+        missing.add((1, 0, 3))
+        missing.add((0, 0, 4))
+        missing.add((2, 0, 3))
+        assert ((0, 0, 3), None) not in missing
+        assert ((1, 0, 3), None) in missing
+        assert ((2, 0, 3), None) in missing
+        assert ((0, 0, 4), None) in missing
+
+
 class TestTileManagerRescaleTiles(object):
     @pytest.fixture
     def file_cache(self, tmpdir):
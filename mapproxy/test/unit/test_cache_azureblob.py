@@ -18,12 +18,33 @@ import os
 import pytest
 
 try:
-    from mapproxy.cache.azureblob import AzureBlobCache
+    from mapproxy.cache.azureblob import AzureBlobCache, container_client
 except ImportError:
     AzureBlobCache = None
 
+from mapproxy.cache.tile import Tile
 from mapproxy.test.unit.test_cache_tile import TileCacheTestBase
 
+AZURITE_CONNECTION_STRING = 'DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;AccountKey=' \
+    'Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr' \
+    '/KBHBeksoGMGw==;BlobEndpoint=%s/devstoreaccount1;'
+
+
+@pytest.mark.skipif(not AzureBlobCache, reason="azure-storage-blob package required")
+def test_shared_container_client():
+    connection_string = AZURITE_CONNECTION_STRING % 'http://localhost:10000'
+    client = container_client(connection_string, 'mapproxy')
+    assert container_client(connection_string, 'mapproxy') is client
+    assert container_client(connection_string, 'other') is not client
+    assert container_client(connection_string, 'mapproxy', max_pool_connections=20) is not client
+
+    cache = AzureBlobCache('/mycache', 'png', container_name='mapproxy', connection_string=connection_string)
+    assert cache.container_client is client
+    cache = AzureBlobCache('/mycache', 'png', container_name='mapproxy', connection_string=connection_string,
+                           retries=3, connect_timeout=2)
+    assert cache.container_client is not client
+    assert cache.container_client is cache.container_client
+
 
 @pytest.mark.skipif(not AzureBlobCache or not os.environ.get('MAPPROXY_TEST_AZURE_BLOB'),
                     reason="azure-storage-blob package and MAPPROXY_TEST_AZURE_BLOB env required")
@@ -40,9 +61,7 @@ class TestAzureBlobCache(TileCacheTestBase):
 
         # Use default storage account of Azurite emulator
         self.host = os.environ['MAPPROXY_TEST_AZURE_BLOB']
-        self.connection_string = 'DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;AccountKey=' \
-                                 'Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr' \
-                                 '/KBHBeksoGMGw==;BlobEndpoint=' + self.host + '/devstoreaccount1;'
+        self.connection_string = AZURITE_CONNECTION_STRING % self.host
 
         self.cache = AzureBlobCache(
             base_path=self.base_path,
@@ -61,6 +80,22 @@ class TestAzureBlobCache(TileCacheTestBase):
     def test_default_coverage(self):
         assert self.cache.coverage is None
 
+    def test_remove_tiles(self):
+        tiles = [self.create_tile((x, 0, 4)) for x in range(10)]
+        self.cache.store_tiles(tiles[:8])
+        # includes missing tiles
+        self.cache.remove_tiles([Tile((x, 0, 4)) for x in range(1, 10)])
+        assert self.cache.is_cached(Tile((0, 0, 4)))
+        for x in range(1, 10):
+            assert not self.cache.is_cached(Tile((x, 0, 4)))
+
+    def test_is_cached_tiles(self):
+        self.cache.store_tiles([self.create_tile((x, 0, 4)) for x in (10, 12)])
+        tiles = [Tile((x, 0, 4)) for x in (10, 11, 12, 13)]
+        assert self.cache.is_cached_tiles(tiles) == [True, False, True, False]
+        assert tiles[0].timestamp
+        assert tiles[0].size
+
     @pytest.mark.parametrize('layout,tile_coord,key', [
         ['mp', (12345, 67890, 2), 'mycache/webmercator/02/0001/2345/0006/7890.png'],
         ['mp', (12345, 67890, 12), 'mycache/webmercator/12/0001/2345/0006/7890.png'],
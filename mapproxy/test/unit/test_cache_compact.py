@@ -28,6 +28,7 @@ from mapproxy.cache.tile import Tile
 from mapproxy.image import ImageResult
 from mapproxy.image.opts import ImageOptions
 from mapproxy.script.defrag import defrag_compact_cache
+from mapproxy.seed.util import ProgressStore
 from mapproxy.test.helper import assert_permissions
 from mapproxy.test.unit.test_cache_tile import TileCacheTestBase
 
@@ -347,10 +348,75 @@ class DefragmentationTestBase(object):
         after = os.path.getsize(fname)
         assert after < before
 
+    def test_defragmentation_online(self):
+        cache = self.cache_class(self.cache_dir)
+
+        for _ in range(2):
+            t = Tile((5000, 1000, 12),
+                     ImageResult(BytesIO(b'a' * 60 * 1024), image_opts=ImageOptions(format='image/png')))
+            cache.store_tile(t)
+
+        fname = os.path.join(self.cache_dir, 'L12', 'R0380C1380.bundle')
+        before = os.path.getsize(fname)
+        level_stats = defrag_compact_cache(cache, min_bytes=50000, online=True)
+        after = os.path.getsize(fname)
+        assert after < before
+
+        assert list(level_stats.keys()) == [12]
+        assert level_stats[12]['bundles'] == 1
+        assert level_stats[12]['size'] == before
+        assert level_stats[12]['fragmentation_bytes'] >= 60 * 1024
+        assert level_stats[12]['reclaimed_bytes'] == before - after
+
+        # no temporary or lock files left
+        for f in os.listdir(os.path.join(self.cache_dir, 'L12')):
+            assert f.startswith('R0380C1380.bundl')
+
+        t = Tile((5000, 1000, 12))
+        assert cache.load_tile(t)
+        assert t.image_result_buffer().read() == b'a' * 60 * 1024
+
+    def test_defragmentation_progress(self):
+        cache = self.cache_class(self.cache_dir)
+
+        for x in (0, 200):
+            for _ in range(2):
+                t = Tile((x, 0, 12),
+                         ImageResult(BytesIO(b'a' * 60 * 1024), image_opts=ImageOptions(format='image/png')))
+                cache.store_tile(t)
+
+        first = os.path.join(self.cache_dir, 'L12', 'R0000C0000.bundle')
+        second = os.path.join(self.cache_dir, 'L12', 'R0000C0080.bundle')
+        progress_store = ProgressStore(os.path.join(self.cache_dir, 'progress'))
+        # first bundle was processed by an interrupted run
+        progress_store.add('defrag-' + self.cache_dir, first)
+
+        logger = mockProgressLog()
+        before = os.path.getsize(first)
+        defrag_compact_cache(cache, min_bytes=50000, log_progress=logger, progress_store=progress_store)
+        assert len(logger.logs) == 1
+        assert logger.logs[0]['fname'] == second
+        assert os.path.getsize(first) == before
+        assert progress_store.get('defrag-' + self.cache_dir) is None
+
 
 class TestDefragmentationV1(DefragmentationTestBase):
     cache_class = CompactCacheV1
 
+    def test_defragmentation_online(self):
+        cache = self.cache_class(self.cache_dir)
+
+        for _ in range(2):
+            t = Tile((5000, 1000, 12),
+                     ImageResult(BytesIO(b'a' * 60 * 1024), image_opts=ImageOptions(format='image/png')))
+            cache.store_tile(t)
+
+        # bundle and index can not be replaced atomically, v1 caches are skipped
+        fname = os.path.join(self.cache_dir, 'L12', 'R0380C1380.bundle')
+        before = os.path.getsize(fname)
+        assert defrag_compact_cache(cache, min_bytes=50000, online=True) == {}
+        assert os.path.getsize(fname) == before
+
 
 class TestDefragmentationV2(DefragmentationTestBase):
     cache_class = CompactCacheV2
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+import json
 import os
 import random
 import re
@@ -20,9 +22,16 @@ import time
 
 import pytest
 
+try:
+    import responses
+except ImportError:
+    responses = None
+
 from mapproxy.cache.couchdb import CouchDBCache, CouchDBMDTemplate
 from mapproxy.cache.tile import Tile
 from mapproxy.grid.tile_grid import tile_grid
+from mapproxy.image import ImageResult
+from mapproxy.image.opts import ImageOptions
 from mapproxy.test.image import create_tmp_image_buf
 from mapproxy.test.unit.test_cache_tile import TileCacheTestBase
 
@@ -84,6 +93,86 @@ class TestCouchDBCache(TileCacheTestBase):
         assert self.cache.remove_tile(tile)
         assert self.cache.remove_tile(tile)
 
+    def test_load_tiles_bulk(self):
+        self.cache.store_tiles([self.create_tile((x, 0, 4)) for x in (0, 2)])
+        self.cache.remove_tile(Tile((2, 0, 4)))
+        self.cache.store_tile(self.create_tile((3, 0, 4)))
+
+        tiles = [Tile((x, 0, 4)) for x in range(4)]
+        assert not self.cache.load_tiles(tiles)
+        assert [t.is_missing() for t in tiles] == [False, True, True, False]
+        assert tiles[0].timestamp
+        assert tiles[0].image_result_buffer().read() == self.create_tile().image_result_buffer().read()
+
+    def test_store_tile_overwrite(self):
+        self.cache.store_tile(self.create_tile((0, 0, 4)))
+        another_tile = self.create_another_tile((0, 0, 4))
+        self.cache.store_tile(another_tile)
+        tile = Tile((0, 0, 4))
+        assert self.cache.load_tile(tile)
+        assert tile.image_result_buffer().read() == another_tile.image_result_buffer().read()
+
+
+@pytest.mark.skipif(not responses, reason="responses required")
+class TestCouchDBCacheRequests(object):
+    couch_url = 'http://couchdb.example.org:5984'
+
+    @pytest.fixture
+    def cache(self):
+        return CouchDBCache(self.couch_url, 'tiles', file_ext='png',
+                            tile_grid=tile_grid(3857, name='webmercator'),
+                            md_template=CouchDBMDTemplate({}))
+
+    @responses.activate
+    def test_load_tiles(self, cache):
+        responses.put(self.couch_url + '/tiles', status=201)
+        responses.post(self.couch_url + '/tiles/_all_docs', json={'rows': [
+            {'key': 'webmercator-4-0-0', 'doc': {
+                'timestamp': 1234.0,
+                '_attachments': {'tile': {'data': base64.b64encode(tile_image.getvalue()).decode('ascii')}}}},
+            {'key': 'webmercator-4-1-0', 'error': 'not_found'},
+            {'key': 'webmercator-4-2-0', 'value': {'rev': '2-abc', 'deleted': True}, 'doc': None},
+        ]})
+
+        tiles = [Tile((x, 0, 4)) for x in range(3)]
+        assert not cache.load_tiles(tiles)
+        assert tiles[0].image_result_buffer().read() == tile_image.getvalue()
+        assert tiles[0].timestamp == 1234.0
+        assert tiles[1].is_missing()
+        assert tiles[2].is_missing()
+
+        # init_db and a single _all_docs request
+        assert len(responses.calls) == 2
+        req = responses.calls[1].request
+        assert 'include_docs=true' in req.url
+        assert 'attachments=true' in req.url
+        assert json.loads(req.body) == {'keys': ['webmercator-4-0-0', 'webmercator-4-1-0', 'webmercator-4-2-0']}
+
+        cache.load_tiles([Tile((x, 0, 4)) for x in range(3)])
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_store_tile_multipart(self, cache):
+        url = self.couch_url + '/tiles/webmercator-4-0-0'
+        responses.put(self.couch_url + '/tiles', status=201)
+        responses.put(url, status=409)
+        responses.head(url, headers={'ETag': '"1-abc"'})
+        responses.put(url, status=201)
+
+        tile = Tile((0, 0, 4), ImageResult(tile_image, image_opts=ImageOptions(format='image/png')))
+        assert cache.store_tile(tile)
+
+        assert [c.request.method for c in responses.calls] == ['PUT', 'PUT', 'HEAD', 'PUT']
+        req = responses.calls[3].request
+        assert req.headers['Content-Type'].startswith('multipart/related; boundary=')
+        boundary = req.headers['Content-Type'].split('"')[1].encode('ascii')
+        doc_part, data_part = req.body.split(b'--' + boundary)[1:3]
+        doc = json.loads(doc_part.split(b'\r\n\r\n', 1)[1])
+        assert doc['_rev'] == '1-abc'
+        assert doc['_attachments']['tile'] == {
+            'content_type': 'image/png', 'follows': True, 'length': len(tile_image.getvalue())}
+        assert data_part == b'\r\n\r\n' + tile_image.getvalue() + b'\r\n'
+
 
 class TestCouchDBMDTemplate(object):
     def test_empty(self):
@@ -202,7 +202,7 @@ class TestGeopackageLevelCache(TileCacheTestBase):
         assert self.cache.is_cached(Tile((0, 0, 2)))
 
     def test_bulk_store_tiles_with_different_levels(self):
-        self.cache.store_tiles([
+        assert self.cache.store_tiles([
             self.create_tile((0, 0, 1)),
             self.create_tile((0, 0, 2)),
             self.create_tile((1, 0, 2)),
@@ -13,9 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import time
+
 import pytest
 
+from mapproxy.cache.base import TileLocker
+from mapproxy.cache.tile_manager import TileManager
 from mapproxy.extent import MapExtent
+from mapproxy.grid.tile_grid import TileGrid
+from mapproxy.image.opts import ImageOptions
+from mapproxy.source.tile import TiledSource
 from mapproxy.srs import SRS
 
 try:
@@ -26,6 +34,7 @@ except ImportError:
     mock_aws = None
 
 from mapproxy.cache.s3 import S3Cache
+from mapproxy.test.unit.test_cache import MockTileClient
 from mapproxy.test.unit.test_cache_tile import TileCacheTestBase
 
 
@@ -65,6 +74,50 @@ class TestS3Cache(TileCacheTestBase):
     def test_default_coverage(self):
         assert self.cache.coverage is None
 
+    def test_shared_client(self):
+        assert self.cache.conn() is self.cache.conn()
+        other = S3Cache('other', 'png', bucket_name=self.bucket_name)
+        assert other.conn() is self.cache.conn()
+
+        other = S3Cache('other', 'png', bucket_name=self.bucket_name, max_pool_connections=20,
+                        retries=5, read_timeout=3)
+        assert other.conn() is not self.cache.conn()
+        assert other.conn().meta.config.max_pool_connections == 20
+        assert other.conn().meta.config.retries['total_max_attempts'] == 6
+        assert other.conn().meta.config.read_timeout == 3
+        # requests of all threads share one pool with a thread for each connection
+        assert other._executor.size == 20
+
+    def test_tile_manager_without_head_requests(self):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        client = MockTileClient()
+        tile_mgr = TileManager(grid, self.cache, [TiledSource(grid, client)], 'png',
+                               image_opts=ImageOptions(format='image/png'),
+                               locker=TileLocker(os.path.join(self.cache_dir, 'lock'), 10, 'id'))
+        self.cache.store_tile(self.create_tile((0, 0, 1)))
+
+        calls = []
+
+        def record_call(model, **kw):
+            calls.append(model.name)
+        events = self.cache.conn().meta.events
+        events.register('before-call.s3', record_call)
+        try:
+            # existing tile, missing tile
+            tiles = tile_mgr.load_tile_coords([(0, 0, 1), (1, 0, 1)])
+            assert tiles[0].timestamp is not None
+            assert client.requested_tiles == [(1, 0, 1)]
+            assert 'HeadObject' not in calls
+
+            # expired tile is detected by the timestamp of the GET response
+            calls[:] = []
+            tile_mgr._expire_timestamp = time.time() + 60
+            tile_mgr.load_tile_coords([(0, 0, 1)])
+            assert client.requested_tiles == [(1, 0, 1), (0, 0, 1)]
+            assert 'HeadObject' not in calls
+        finally:
+            events.unregister('before-call.s3', record_call)
+
     @pytest.mark.parametrize('layout,tile_coord,key', [
         ['mp', (12345, 67890,  2), 'mycache/webmercator/02/0001/2345/0006/7890.png'],
         ['mp', (12345, 67890, 12), 'mycache/webmercator/12/0001/2345/0006/7890.png'],
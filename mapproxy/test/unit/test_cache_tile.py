@@ -225,6 +225,21 @@ class TileCacheTestBase:
         self.create_cached_tile(tile)
         assert self.cache.is_cached(Tile((1, 0, 4)))
 
+    def test_iter_tiles(self):
+        if not getattr(self.cache, 'supports_tile_iteration', False):
+            pytest.skip('cache does not support tile iteration')
+        for coord in [(0, 0, 4), (1, 0, 4), (5, 12, 4), (0, 0, 5)]:
+            self.create_cached_tile(self.create_tile(coord))
+
+        assert sorted(t.coord for t in self.cache.iter_tiles(4)) == [(0, 0, 4), (1, 0, 4), (5, 12, 4)]
+        assert [t.coord for t in self.cache.iter_tiles(5)] == [(0, 0, 5)]
+        assert list(self.cache.iter_tiles(6)) == []
+        assert sorted(t.coord for t in self.cache.iter_tiles(4, bbox=(1, 0, 5, 12))) == [(1, 0, 4), (5, 12, 4)]
+
+        tiles = list(self.cache.iter_tile_metadata(4, bbox=(5, 12, 5, 12)))
+        assert [t.coord for t in tiles] == [(5, 12, 4)]
+        assert tiles[0].image_result is None
+
     def create_cached_tile(self, tile):
         self.cache.store_tile(tile)
 
@@ -244,6 +259,26 @@ class TestFileTileCache(TileCacheTestBase):
                                      '04', '000', '000', '005', '000', '000', '012.png')
         assert os.path.exists(tile_location), tile_location
 
+    def test_store_tile_removed_dir(self):
+        self.cache.store_tile(self.create_tile((5, 12, 4)))
+        # directory is removed after it was created, e.g. by a cleanup
+        shutil.rmtree(os.path.join(self.cache_dir, '04'))
+        self.cache.store_tile(self.create_tile((5, 13, 4)))
+        assert self.cache.is_cached(Tile((5, 13, 4)))
+
+    @pytest.mark.skipif(sys.platform == 'win32', reason='batch_writes not supported on windows')
+    def test_store_tiles_batch_writes(self):
+        self.cache = FileCache(self.cache_dir, 'png', directory_layout='tms', batch_writes=True)
+        tiles = [self.create_tile((x, y, 4)) for x in range(2) for y in range(3)]
+        tiles[0].stored = True
+        assert self.cache.store_tiles(tiles)
+        assert not self.cache.is_cached(Tile((0, 0, 4)))
+        for x, y, z in [t.coord for t in tiles[1:]]:
+            tile = Tile((x, y, z))
+            assert self.cache.load_tile(tile)
+            assert tile.image_result.as_buffer().read() == tile_image.getvalue()
+        assert sorted(os.listdir(os.path.join(self.cache_dir, '4', '0'))) == ['1.png', '2.png']
+
     @pytest.mark.skipif(sys.platform == 'win32',
                         reason='link_single_color_tiles not supported on windows')
     def test_single_color_tile_store(self):
@@ -376,6 +411,20 @@ class TestFileTileCache(TileCacheTestBase):
         with pytest.raises(NotImplementedError):
             cache.level_location(0)
 
+    @pytest.mark.parametrize('layout', ['tc', 'mp', 'tms', 'reverse_tms', 'quadkey', 'arcgis'])
+    def test_iter_tiles_layouts(self, layout):
+        cache = FileCache(self.cache_dir, 'png', directory_layout=layout)
+        coords = [(0, 0, 3), (7, 5, 3), (1, 2, 4)]
+        for coord in coords:
+            cache.store_tile(self.create_tile(coord))
+        assert sorted(t.coord for t in cache.iter_tiles(3)) == [(0, 0, 3), (7, 5, 3)]
+        assert [t.coord for t in cache.iter_tiles(4)] == [(1, 2, 4)]
+
+        tiles = list(cache.iter_tile_metadata(3, bbox=(5, 5, 7, 7)))
+        assert [t.coord for t in tiles] == [(7, 5, 3)]
+        assert tiles[0].size == len(tile_image.getvalue())
+        assert abs(tiles[0].timestamp - time.time()) < 60
+
 
 class TestQuadkeyFileTileCache(TileCacheTestBase):
     def setup_method(self):
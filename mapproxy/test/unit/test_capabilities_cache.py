@@ -0,0 +1,87 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+
+from mapproxy.request.base import Request
+from mapproxy.service.capabilities_cache import CapabilitiesCache
+
+
+def make_request(**environ):
+    env = {"REQUEST_METHOD": "GET", "SERVER_NAME": "localhost", "SERVER_PORT": "80",
+           "wsgi.url_scheme": "http", "PATH_INFO": "/service"}
+    env.update(environ)
+    return Request(env)
+
+
+class TestCapabilitiesCache(object):
+
+    def setup_method(self):
+        self.rendered = []
+
+    def render(self):
+        self.rendered.append(1)
+        return "<doc>%d</doc>" % len(self.rendered)
+
+    def test_cached(self):
+        cache = CapabilitiesCache()
+        resp = cache.response("a", self.render, make_request(), "text/xml")
+        assert resp.response == b"<doc>1</doc>"
+        assert resp.headers["Content-type"] == "text/xml; charset=utf-8"
+        resp2 = cache.response("a", self.render, make_request(), "text/xml")
+        assert resp2.response == b"<doc>1</doc>"
+        assert resp2.etag == resp.etag
+        assert len(self.rendered) == 1
+
+        resp = cache.response("b", self.render, make_request(), "text/xml")
+        assert resp.response == b"<doc>2</doc>"
+        assert resp.etag != resp2.etag
+
+    def test_not_cacheable(self):
+        cache = CapabilitiesCache()
+        resp = cache.response(None, self.render, make_request(), "text/xml")
+        resp2 = cache.response(None, self.render, make_request(), "text/xml")
+        assert len(self.rendered) == 2
+        assert resp.etag != resp2.etag
+
+    def test_lru(self):
+        cache = CapabilitiesCache(size=2)
+        for key in ["a", "b", "c", "a"]:
+            cache.document(key, self.render)
+        assert len(self.rendered) == 4
+
+    def test_not_modified(self):
+        cache = CapabilitiesCache()
+        etag = cache.response("a", self.render, make_request(), "text/xml").etag
+        resp = cache.response("a", self.render, make_request(HTTP_IF_NONE_MATCH=etag), "text/xml")
+        assert resp.status == "304 Not Modified"
+        assert resp.response == []
+
+    def test_gzip(self):
+        cache = CapabilitiesCache()
+        resp = cache.response("a", self.render, make_request(HTTP_ACCEPT_ENCODING="gzip, deflate"),
+                              "application/xml")
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert resp.headers["Vary"].endswith(", Accept-Encoding")
+        assert gzip.decompress(resp.response) == b"<doc>1</doc>"
+
+        resp2 = cache.response("a", self.render, make_request(), "application/xml")
+        assert "Content-Encoding" not in resp2.headers
+        assert resp2.etag + "-gzip" == resp.etag
+
+        resp3 = cache.response("a", self.render, make_request(HTTP_ACCEPT_ENCODING="gzip;q=0, deflate"),
+                               "application/xml")
+        assert "Content-Encoding" not in resp3.headers
+        assert resp3.response == b"<doc>1</doc>"
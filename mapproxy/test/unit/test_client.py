@@ -15,11 +15,14 @@
 
 
 import os
+import threading
 import time
 
 import pytest
 
+from mapproxy.client.breaker import CircuitBreaker, breaker_for_url
 from mapproxy.client.http import HTTPClient, HTTPClientError
+from mapproxy.client.limiter import AdaptiveLimiter, limiter_for_url
 from mapproxy.client.tile import TileClient, TileURLTemplate
 from mapproxy.client.wms import WMSClient, WMSInfoClient
 from mapproxy.grid.tile_grid import tile_grid
@@ -310,6 +313,162 @@ A4GBAFjOKer89961zgK5F7WF0bnj4JXMJTENAKaSbn+2kmOeUJXRmm/kEd5jhW6Y
 """
 
 
+class TestAdaptiveLimiter(object):
+    def test_additive_increase(self):
+        limiter = AdaptiveLimiter(max_requests=4)
+        limiter.limit = 2.0
+        for _ in range(4):
+            assert limiter.acquire()
+            limiter.release(0.1)
+        assert limiter.limit == pytest.approx(3.6, abs=0.1)
+        for _ in range(10):
+            assert limiter.acquire()
+            limiter.release(0.1)
+        assert limiter.limit == 4
+        assert limiter.in_flight == 0
+
+    def test_decrease_on_overload(self):
+        limiter = AdaptiveLimiter(max_requests=8, min_requests=2)
+        assert limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+        assert limiter.limit == 6
+        limiter._last_decrease = 0
+        assert limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+        assert limiter.limit == 4.5
+
+        for _ in range(5):
+            limiter._last_decrease = 0
+            assert limiter.acquire()
+            limiter.release(0.1, overloaded=True)
+        assert limiter.limit == 2
+
+    def test_decrease_once_per_latency(self):
+        limiter = AdaptiveLimiter(max_requests=8)
+        assert limiter.acquire()
+        limiter.release(10)
+        assert limiter.acquire()
+        limiter.release(10, overloaded=True)
+        limiter.acquire()
+        limiter.release(10, overloaded=True)
+        assert limiter.limit == 6
+
+    def test_decrease_on_high_latency(self):
+        limiter = AdaptiveLimiter(max_requests=8, latency_tolerance=2)
+        for _ in range(5):
+            assert limiter.acquire()
+            limiter.release(0.01)
+        assert limiter.limit == 8
+        for _ in range(5):
+            limiter._last_decrease = 0
+            assert limiter.acquire()
+            limiter.release(0.1)
+        assert limiter.limit < 8
+
+    def test_reject(self):
+        limiter = AdaptiveLimiter(max_requests=2, max_wait=0.05)
+        assert limiter.acquire()
+        assert limiter.acquire()
+        assert not limiter.acquire()
+        assert limiter.rejected == 1
+        limiter.release(0.1)
+        assert limiter.acquire()
+
+    def test_wait_for_release(self):
+        limiter = AdaptiveLimiter(max_requests=1, max_wait=5)
+        assert limiter.acquire()
+        t = threading.Timer(0.05, limiter.release, args=(0.1, ))
+        t.start()
+        assert limiter.acquire()
+        t.join()
+
+    def test_limiter_for_url(self):
+        limiter = limiter_for_url('http://example.org/wms', max_requests=4)
+        assert limiter is limiter_for_url('http://example.org/tms', max_requests=4)
+        assert limiter is not limiter_for_url('http://example.com/wms', max_requests=4)
+        assert limiter is not limiter_for_url('http://example.org/wms', max_requests=8)
+
+    def test_http_client_overload(self):
+        limiter = AdaptiveLimiter(max_requests=4)
+        client = HTTPClient(limiter=limiter)
+        with mock_httpd(TESTSERVER_ADDRESS, [({'path': '/'}, {'status': '503', 'body': b''})]):
+            with pytest.raises(HTTPClientError):
+                client.open(TESTSERVER_URL + '/')
+        assert limiter.limit == 3
+        assert limiter.in_flight == 0
+
+    def test_http_client_rejected(self):
+        limiter = AdaptiveLimiter(max_requests=1, max_wait=0)
+        assert limiter.acquire()
+        client = HTTPClient(limiter=limiter)
+        with pytest.raises(HTTPClientError) as exc:
+            client.open(TESTSERVER_URL + '/')
+        assert exc.value.response_code == 503
+        assert limiter.in_flight == 1
+
+
+class TestCircuitBreaker(object):
+    def test_open_after_failures(self):
+        breaker = CircuitBreaker(failures=3, reset_timeout=30)
+        for _ in range(2):
+            assert breaker.allow()
+            breaker.record(False)
+        assert not breaker.is_open
+        assert breaker.allow()
+        breaker.record(False)
+        assert breaker.is_open
+        assert not breaker.allow()
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failures=2)
+        breaker.record(False)
+        breaker.record(True)
+        breaker.record(False)
+        assert not breaker.is_open
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failures=1, reset_timeout=30)
+        breaker.record(False)
+        assert not breaker.allow()
+        breaker.open_until = time.monotonic() - 1
+        # single test request
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record(False)
+        assert not breaker.allow()
+
+        breaker.open_until = time.monotonic() - 1
+        assert breaker.allow()
+        breaker.record(True)
+        assert not breaker.is_open
+        assert breaker.allow()
+        assert breaker.allow()
+
+    def test_breaker_for_url(self):
+        breaker = breaker_for_url('http://example.org/wms')
+        assert breaker is breaker_for_url('http://example.org/tms')
+        assert breaker is not breaker_for_url('http://example.com/wms')
+
+    def test_http_client(self):
+        breaker = CircuitBreaker(failures=2, reset_timeout=30)
+        client = HTTPClient(circuit_breaker=breaker)
+        with mock_httpd(TESTSERVER_ADDRESS, [({'path': '/'}, {'status': '404', 'body': b''}),
+                                             ({'path': '/'}, {'status': '500', 'body': b''}),
+                                             ({'path': '/'}, {'status': '503', 'body': b''})]):
+            for code in (404, 500, 503):
+                with pytest.raises(HTTPClientError) as exc:
+                    client.open(TESTSERVER_URL + '/')
+                assert exc.value.response_code == code
+        assert breaker.is_open
+
+        # no request to the server
+        start = time.time()
+        with pytest.raises(HTTPClientError) as exc:
+            client.open(TESTSERVER_URL + '/')
+        assert exc.value.response_code == 503
+        assert time.time() - start < 0.5
+
+
 class TestTileClient(object):
     def test_tc_path(self):
         template = TileURLTemplate(TESTSERVER_URL + '/%(tc_path)s.png')
@@ -23,6 +23,7 @@ from unittest import SkipTest
 import yaml
 import pytest
 
+import mapproxy.version
 from mapproxy.config.coverage import load_coverage
 from mapproxy.config.loader import (
     load_configuration,
@@ -37,6 +38,7 @@ from mapproxy.seed.spec import validate_seed_conf
 from mapproxy.srs import SRS
 from mapproxy.test.helper import TempFile
 from mapproxy.test.unit.test_grid import assert_almost_equal_bbox
+from mapproxy.util import tracing
 from mapproxy.util.coverage import coverage
 from mapproxy.util.geom import EmptyGeometryError
 
@@ -1026,6 +1028,24 @@ services:
             config = load_configuration(f)  # defaults to ignore_warnings=True
             assert config.caches['temp'].coverage() == coverage([-50, -50, 50, 50], SRS(4326))
 
+    def test_tracing(self, monkeypatch):
+        class FakeTrace(object):
+            def get_tracer(self, name, version):
+                return (name, version)
+
+        monkeypatch.setattr(tracing, 'otel_trace', FakeTrace())
+        try:
+            ProxyConfiguration({'globals': {'tracing': {'enabled': True}}})
+            assert tracing._tracer == ('mapproxy', mapproxy.version.version)
+        finally:
+            tracing.set_tracer(None)
+
+    def test_tracing_missing_opentelemetry(self, monkeypatch):
+        monkeypatch.setattr(tracing, 'otel_trace', None)
+        with pytest.raises(ConfigurationError):
+            ProxyConfiguration({'globals': {'tracing': {'enabled': True}}})
+        assert not tracing.enabled()
+
 
 class TestImageOptions(object):
     def test_default_format(self):
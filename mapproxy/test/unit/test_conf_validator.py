@@ -52,6 +52,36 @@ class TestValidator(object):
         errors = validate(conf)
         assert errors == []
 
+    def test_cache_options(self):
+        conf = self._test_conf('''
+            caches:
+                one_cache:
+                    grids: [GLOBAL_MERCATOR]
+                    sources: [one_source]
+                    missing_tile_ttl: 60
+                    coalesce_meta_tiles: 4
+                    coalesce_meta_tiles_delay: 0.1
+                    stale_while_revalidate: true
+                    refresh_workers: 4
+        ''')
+
+        errors = validate(conf)
+        assert errors == []
+
+    def test_invalid_refresh_workers(self):
+        conf = self._test_conf('''
+            caches:
+                one_cache:
+                    grids: [GLOBAL_MERCATOR]
+                    sources: [one_source]
+                    refresh_workers: 0
+        ''')
+
+        errors = validate(conf)
+        assert errors == [
+            '0 is less than the minimum of 1 in root.caches.one_cache.refresh_workers'
+        ]
+
     def test_missing_layer_source(self):
         conf = self._test_conf()
         del conf['caches']['one_cache']
@@ -18,7 +18,9 @@ from __future__ import division
 import os
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pytest
 import shapely
 import shapely.prepared
@@ -241,6 +243,32 @@ class TestGeomCoverage(object):
         for i in range(110):
             assert self.coverage.intersects((-30, 10, -8, 70), SRS(4326))
 
+    def test_bboxes(self):
+        bboxes = [
+            (15, 15, 20, 20), (15, 15, 80, 20), (9, 10, 20, 20),
+            (-30, 10, -8, 70), (-30, 10, -11, 70), (110, 5, 115, 15),
+        ]
+        assert self.coverage.intersects_bboxes(bboxes, SRS(4326)).tolist() == [
+            self.coverage.intersects(b, SRS(4326)) for b in bboxes]
+        assert self.coverage.contains_bboxes(np.array(bboxes), SRS(4326)).tolist() == [
+            self.coverage.contains(b, SRS(4326)) for b in bboxes]
+        assert self.coverage.intersects_bboxes(
+            [(0, 0, 1000, 1000), (0, 0, 1500000, 1500000)], SRS(900913)).tolist() == [False, True]
+
+    def test_threads(self):
+        srs = SRS(4326)
+        bboxes = [(x, 10, x + 5, 70) for x in range(-40, 100)]
+        expected = [self.coverage.intersects(b, srs) for b in bboxes]
+        # new coverage, all threads prepare the geometry concurrently
+        cov = coverage(shapely.wkt.loads(self.geom.wkt), srs)
+
+        def check(_):
+            return [cov.intersects(b, srs) for b in bboxes]
+
+        with ThreadPoolExecutor(8) as executor:
+            for result in executor.map(check, range(32)):
+                assert result == expected
+
     def test_eq(self):
         g1 = shapely.wkt.loads("POLYGON((10 10, 10 50, -10 60, 10 80, 80 80, 80 10, 10 10))")
         g2 = shapely.wkt.loads("POLYGON((10 10, 10 50, -10 60, 10 80, 80 80, 80 10, 10 10))")
@@ -278,6 +306,18 @@ class TestBBOXCoverage(object):
         assert not self.coverage.intersects((0, 0, 1000, 1000), SRS(900913))
         assert self.coverage.intersects((0, 0, 1500000, 1500000), SRS(900913))
 
+    def test_bboxes(self):
+        bboxes = [
+            (15, 15, 20, 20), (15, 15, 80, 20), (9, 10, 20, 20),
+            (-30, 10, -8, 70), (-30, 10, -11, 70), (9, 9.99999999, 20, 20),
+        ]
+        assert self.coverage.intersects_bboxes(bboxes, SRS(4326)).tolist() == [
+            self.coverage.intersects(b, SRS(4326)) for b in bboxes]
+        assert self.coverage.contains_bboxes(bboxes, SRS(4326)).tolist() == [
+            self.coverage.contains(b, SRS(4326)) for b in bboxes]
+        assert self.coverage.intersects_bboxes(
+            [(0, 0, 1000, 1000), (0, 0, 1500000, 1500000)], SRS(900913)).tolist() == [False, True]
+
     def test_intersection(self):
         assert (self.coverage.intersection((15, 15, 20, 20), SRS(4326)) ==
                 BBOXCoverage((15, 15, 20, 20), SRS(4326)))
@@ -399,6 +439,16 @@ class TestMultiCoverage(object):
         assert self.coverage.intersects((110, 5, 115, 15), SRS(4326))
         assert self.coverage.intersects((90, 5, 105, 15), SRS(4326))
 
+    def test_bboxes(self):
+        bboxes = [
+            (15, 15, 20, 20), (15, 15, 80, 20), (9, 10, 20, 20),
+            (-30, 10, -8, 70), (-30, 10, -11, 70), (110, 5, 115, 15),
+        ]
+        assert self.coverage.intersects_bboxes(bboxes, SRS(4326)).tolist() == [
+            self.coverage.intersects(b, SRS(4326)) for b in bboxes]
+        assert self.coverage.contains_bboxes(bboxes, SRS(4326)).tolist() == [
+            self.coverage.contains(b, SRS(4326)) for b in bboxes]
+
     def test_eq(self):
         g1 = shapely.wkt.loads("POLYGON((10 10, 10 50, -10 60, 10 80, 80 80, 80 10, 10 10))")
         g2 = shapely.wkt.loads("POLYGON((10 10, 10 50, -10 60, 10 80, 80 80, 80 10, 10 10))")
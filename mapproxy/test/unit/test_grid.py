@@ -18,6 +18,7 @@ from __future__ import print_function, division
 import copy
 
 from mapproxy.grid import NoTiles, _create_tile_list
+from mapproxy.grid.coverage_index import CoverageTileIndex, OUTSIDE, BOUNDARY, INSIDE
 from mapproxy.grid.meta_grid import MetaGrid
 from mapproxy.grid.resolutions import (
     resolutions,
@@ -32,9 +33,11 @@ from mapproxy.grid.tile_grid import (
     UnsupportedException,
 )
 from mapproxy.srs import SRS
+from mapproxy.util.coverage import GeomCoverage
 from mapproxy.util.bbox import TransformationError, bbox_intersects, bbox_contains
 
 import pytest
+import shapely.wkt
 
 
 class TestResolution(object):
@@ -1597,3 +1600,62 @@ def test_tile_grid_from_ogc_tile_matrix_set_errors():
         match="Tile matrix set with varying pointOfOrigin depending on tile matrix",
     ):
         tile_grid_from_ogc_tile_matrix_set(d)
+
+
+class TestCoverageTileIndex(object):
+
+    def setup_method(self):
+        # box from 10 10 to 80 80 with small spike/corner to -10 60 (upper left)
+        geom = shapely.wkt.loads("POLYGON((10 10, 10 50, -10 60, 10 80, 80 80, 80 10, 10 10))")
+        self.coverage = GeomCoverage(geom, SRS(4326))
+
+    def expected_states(self, grid, coords, meta_size=None):
+        if meta_size:
+            mgrid = MetaGrid(grid, meta_size=meta_size)
+            bboxes = [mgrid.meta_tile(c).bbox for c in coords]
+        else:
+            bboxes = [grid.tile_bbox(c) for c in coords]
+        states = []
+        for bbox in bboxes:
+            if self.coverage.contains(bbox, grid.srs):
+                states.append(INSIDE)
+            elif self.coverage.intersects(bbox, grid.srs):
+                states.append(BOUNDARY)
+            else:
+                states.append(OUTSIDE)
+        return states
+
+    @pytest.mark.parametrize('origin', ['sw', 'nw'])
+    @pytest.mark.parametrize('max_cells', [1 << 16, 0])
+    def test_tiles(self, origin, max_cells):
+        grid = tile_grid(4326, origin=origin)
+        index = CoverageTileIndex(self.coverage, grid, max_cells=max_cells)
+        for level in range(6):
+            width, height = grid.grid_sizes[level]
+            coords = [(x, y, level) for y in range(height) for x in range(width)]
+            assert index.states(coords).tolist() == self.expected_states(grid, coords)
+        assert (index.level_index(5) is None) == (max_cells == 0)
+
+    def test_meta_tiles(self):
+        grid = tile_grid(3857)
+        index = CoverageTileIndex(self.coverage, grid, meta_size=(4, 4))
+        for level in range(8):
+            width, height = grid.grid_sizes[level]
+            meta_width, meta_height = min(4, width), min(4, height)
+            coords = [(x, y, level) for y in range(0, height, meta_height) for x in range(0, width, meta_width)]
+            assert index.states(coords).tolist() == self.expected_states(grid, coords, meta_size=(4, 4))
+
+    def test_mixed_levels(self):
+        grid = tile_grid(4326)
+        index = CoverageTileIndex(self.coverage, grid)
+        coords = [(5, 3, 3), (0, 0, 3), (10, 5, 4), (0, 0, 0)]
+        assert index.intersects(coords).tolist() == [True, False, True, True]
+        assert index.states([]).tolist() == []
+
+    def test_index_limited_to_coverage(self):
+        grid = tile_grid(3857)
+        index = CoverageTileIndex(self.coverage, grid, max_cells=20000)
+        # only ~70x100 of the 256x256 tiles of level 8 are in the coverage extent
+        assert index.level_index(8) is not None
+        assert index.level_index(10) is None
+        assert index.states([(0, 0, 8), (160, 160, 8)]).tolist() == [OUTSIDE, INSIDE]
@@ -0,0 +1,171 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+
+import pytest
+
+from mapproxy.config import load_default_config, local_base_config
+from mapproxy.config.configuration.base import ConfigurationError
+from mapproxy.config.configuration.global_conf import GlobalConfiguration
+from mapproxy.util import profiler
+from mapproxy.util.profiler import SamplingProfiler
+from mapproxy.wsgiapp import load_profiler, make_wsgi_app
+
+
+def wait_for_tile(event):
+    event.wait(5)
+
+
+def handle_request(prof, started, event):
+    with prof.request('tms'):
+        prof.set_layer('osm/EPSG:3857')
+        started.set()
+        wait_for_tile(event)
+
+
+class TestSamplingProfiler(object):
+
+    def test_sample_and_write(self, tmpdir):
+        prof = SamplingProfiler(tmpdir.strpath, interval=0.001)
+        started = threading.Event()
+        event = threading.Event()
+        t = threading.Thread(target=handle_request, args=(prof, started, event))
+        t.start()
+        try:
+            started.wait(5)
+            prof.sample()
+            prof.sample()
+        finally:
+            event.set()
+            t.join()
+        # request finished, thread is not sampled
+        prof.sample()
+
+        samples, = prof._samples.values()
+        assert list(prof._samples.keys()) == [('tms', 'osm/EPSG:3857')]
+        (stack, count), = samples.items()
+        assert count == 2
+        assert 'test_profiler:handle_request;' in stack
+        assert 'test_profiler:wait_for_tile;' in stack
+
+        prof.write()
+        base = os.path.join(tmpdir.strpath, 'tms-osm_EPSG_3857.%d' % os.getpid())
+        with open(base + '.collapsed') as f:
+            assert f.read() == '%s 2\n' % stack
+        with open(base + '.speedscope.json') as f:
+            speedscope = json.load(f)
+        assert speedscope['name'] == 'tms osm/EPSG:3857'
+        assert speedscope['profiles'][0]['weights'] == [0.002]
+
+    def test_start_stop(self, tmpdir):
+        prof = SamplingProfiler(tmpdir.join('profiles').strpath, interval=0.001)
+        prof.start()
+        assert prof.running
+        with prof.request('wms'):
+            while not prof._samples:
+                threading.Event().wait(0.001)
+        prof.stop()
+        assert not prof.running
+        assert os.path.exists(prof._filename(('wms', None), 'collapsed'))
+
+    def test_max_keys(self, tmpdir):
+        prof = SamplingProfiler(tmpdir.strpath, max_keys=2)
+        for layers in ['a', 'b', 'c', 'd']:
+            with prof.request('wms'):
+                prof.set_layer(layers)
+                prof.sample()
+        assert sorted(prof._samples.keys()) == [
+            ('wms', profiler.OTHER_LAYERS), ('wms', 'a'), ('wms', 'b')]
+        assert sum(prof._samples[('wms', profiler.OTHER_LAYERS)].values()) == 2
+
+    def test_long_layer_names(self, tmpdir):
+        prof = SamplingProfiler(tmpdir.strpath)
+        for layers in ['a' * 1000, 'a' * 999 + 'b']:
+            with prof.request('wms'):
+                prof.set_layer(layers)
+                prof.sample()
+        prof.write()
+        filenames = sorted(os.listdir(tmpdir.strpath))
+        assert len(filenames) == 4
+        assert all(len(f) < 150 for f in filenames)
+
+
+def test_not_running(monkeypatch, tmpdir):
+    prof = SamplingProfiler(tmpdir.strpath)
+    monkeypatch.setattr(profiler, '_profiler', prof)
+    assert profiler.request('tms') is profiler.NOOP
+    profiler.set_layer('osm')
+    assert prof._threads == {}
+
+    prof.running = True
+    with profiler.request('tms'):
+        profiler.set_layer('osm')
+        assert list(prof._threads.values()) == [['tms', 'osm']]
+    assert prof._threads == {}
+
+
+def test_request_of_profiled_apps(monkeypatch, tmpdir):
+    prof = SamplingProfiler(tmpdir.strpath)
+    prof.running = True
+    monkeypatch.setattr(profiler, '_profiler', prof)
+    conf = load_default_config()
+
+    conf.profiler_enabled = False
+    with local_base_config(conf):
+        assert profiler.request('tms') is profiler.NOOP
+        prof.all_apps = True
+        assert profiler.request('tms') is not profiler.NOOP
+
+    prof.all_apps = False
+    conf.profiler_enabled = True
+    with local_base_config(conf):
+        assert profiler.request('tms') is not profiler.NOOP
+
+
+def test_load_profiler(monkeypatch, tmpdir):
+    installed = []
+    monkeypatch.setattr(profiler, '_profiler', None)
+    monkeypatch.setattr(profiler, '_install_signal_handler', lambda: installed.append(True))
+
+    globals_conf = GlobalConfiguration(tmpdir.strpath, {'profiler': {'dir': 'profiles', 'interval': 0.02}}, None)
+    load_profiler(globals_conf)
+    assert profiler._profiler.output_dir == tmpdir.join('profiles').strpath
+    assert profiler._profiler.interval == 0.02
+    assert not profiler._profiler.running
+    # signal handler is opt-in
+    assert installed == []
+
+    load_profiler(GlobalConfiguration(tmpdir.strpath, {'profiler': {'dir': 'profiles', 'toggle_signal': True}}, None))
+    assert installed == [True]
+
+    with pytest.raises(ConfigurationError):
+        load_profiler(GlobalConfiguration(tmpdir.strpath, {'profiler': {'enabled': True}}, None))
+
+
+def test_make_wsgi_app(monkeypatch, tmpdir):
+    monkeypatch.setattr(profiler, '_profiler', None)
+    conf_file = tmpdir.join('mapproxy.yaml')
+    conf_file.write('services:\n  demo:\nglobals:\n  profiler:\n    dir: profiles\n')
+    app = make_wsgi_app(conf_file.strpath)
+    assert app.base_config.profiler_enabled
+    assert profiler._profiler is not None
+
+    # reloaded without profiler
+    conf_file.write('services:\n  demo:\n')
+    app = make_wsgi_app(conf_file.strpath)
+    assert not app.base_config.profiler_enabled
@@ -740,6 +740,33 @@ class TestTileRequest(object):
         assert tile_req.layer == "osm"
         assert tile_req.dimensions == {"_layer_spec": "EPSG4326"}
 
+    @pytest.mark.parametrize("query,origin", [
+        ("", None),
+        ("token=abc", None),
+        ("ORIGIN=nw&token=abc", "nw"),
+        ("origin=foo", None),
+    ])
+    def test_tile_request_origin(self, query, origin):
+        env = {"PATH_INFO": "/tiles/osm/5/2/3.png", "QUERY_STRING": query}
+        tile_req = tile_request(Request(env))
+        assert tile_req.tile == (2, 3, 5)
+        assert tile_req.origin == origin
+
+    @pytest.mark.parametrize("path,handler,layer", [
+        ("/tms", "tms_root_resource", None),
+        ("/tms/1.0.0/", "tms_capabilities", None),
+        ("/tms/1.0.0/osm/EPSG3857", "tms_capabilities", "osm"),
+        ("/tms/1.0.0/osm/EPSG3857/5/2/3.png", "map", "osm"),
+    ])
+    def test_tms_request_handler(self, path, handler, layer):
+        tms = tile_request(Request({"PATH_INFO": path, "QUERY_STRING": ""}))
+        assert tms.request_handler_name == handler
+        assert getattr(tms, "layer", None) == layer
+
+    def test_invalid_tms_request(self):
+        with pytest.raises(RequestError):
+            tile_request(Request({"PATH_INFO": "/tms/1.0.0/osm/5/2.png", "QUERY_STRING": ""}))
+
 
 def test_request_params_pickle():
     params = RequestParams(dict(foo="bar", zing="zong"))
@@ -16,8 +16,11 @@
 from __future__ import division
 
 import os
+import shutil
+import tempfile
 import time
 from collections import defaultdict
+from io import BytesIO
 
 try:
     import cPickle as pickle
@@ -26,8 +29,12 @@ except ImportError:
 
 import pytest
 
-from mapproxy.seed.seeder import TileWalker, SeedTask, SeedProgress
+from mapproxy.seed.seeder import TileWalker, TileListWalker, SeedTask, SeedProgress, CleanupTask
+from mapproxy.seed.access_log import read_tile_access_logs, popular_tiles, seed_tile_coords
+from mapproxy.seed.cleanup import simple_cleanup
 from mapproxy.cache.dummy import DummyLocker
+from mapproxy.cache.file import FileCache
+from mapproxy.cache.tile import Tile
 from mapproxy.cache.tile_manager import TileManager
 from mapproxy.source.tile import TiledSource
 from mapproxy.grid.tile_grid import tile_grid_for_epsg, TileGrid
@@ -41,6 +48,8 @@ from mapproxy.seed.config import (
     LevelsResolutionRange,
 )
 from mapproxy.seed.util import ProgressStore
+from mapproxy.seed.transfer import TileTransfer, cache_tile_coords, grid_tile_coords
+from mapproxy.image import ImageResult
 from mapproxy.test.helper import TempFile
 
 
@@ -193,6 +202,105 @@ class TestSeeder(object):
         assert self.seed_pool.seeded_tiles[2] == set([(2, 0), (3, 0), (2, 1), (3, 1)])
 
 
+class TestAccessLogSeeder(object):
+
+    def setup_method(self):
+        self.grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        self.tile_mgr = TileManager(
+            self.grid, MockCache(), [TiledSource(self.grid, None)], "png", locker=DummyLocker()
+        )
+        self.seed_pool = MockSeedPool()
+
+    def make_task(self, tiles, levels, time_budget=None):
+        md = dict(name="", cache_name="", grid_name="")
+        coverage = BBOXCoverage([-180, -90, 180, 90], SRS(4326))
+        return SeedTask(
+            md, self.tile_mgr, levels, refresh_timestamp=None, refresh_all=False, coverage=coverage,
+            tiles=tiles, time_budget=time_budget,
+        )
+
+    def test_read_tile_access_logs(self):
+        with TempFile() as fname:
+            with open(fname, 'w') as f:
+                f.write(
+                    '[2025-01-01 10:00:00,000] mapproxy.tile.access - INFO - osm_GLOBAL 2/1/0\n'
+                    'osm_GLOBAL 2/1/0\n'
+                    'osm_GLOBAL 1/0/0\n'
+                    'other_GLOBAL 1/0/0\n'
+                    'osm_GLOBAL broken\n'
+                )
+            counts = read_tile_access_logs([fname])
+        assert counts == {
+            'osm_GLOBAL': {2: {(1, 0, 2): 2}, 1: {(0, 0, 1): 1}},
+            'other_GLOBAL': {1: {(0, 0, 1): 1}},
+        }
+
+    def test_popular_tiles(self):
+        counts = {
+            1: {(0, 0, 1): 10, (1, 0, 1): 5},
+            2: {(0, 0, 2): 80, (1, 0, 2): 3, (2, 0, 2): 2},
+        }
+        assert popular_tiles(counts, [1, 2], traffic_share=0.9) == [
+            ((0, 0, 2), 80), ((0, 0, 1), 10),
+        ]
+        assert popular_tiles(counts, [1], traffic_share=1.0) == [
+            ((0, 0, 1), 10), ((1, 0, 1), 5),
+        ]
+        assert popular_tiles(counts, [3]) == []
+
+    def test_seed_tile_coords_children(self):
+        tiles = [((1, 0, 1), 10), ((0, 0, 1), 1)]
+        coords = seed_tile_coords(tiles, self.tile_mgr, [1, 2, 3], child_levels=1)
+        assert coords[0] == (1, 0, 1)
+        assert set(coords[1:5]) == set([(2, 0, 2), (3, 0, 2), (2, 1, 2), (3, 1, 2)])
+        assert coords[5] == (0, 0, 1)
+        assert len(coords) == 10
+
+    def test_seed_tile_coords_levels_and_coverage(self):
+        tiles = [((1, 0, 1), 10), ((0, 0, 1), 1)]
+        coverage = BBOXCoverage([0, -90, 180, 90], SRS(4326))
+        coords = seed_tile_coords(tiles, self.tile_mgr, [2], child_levels=2, coverage=coverage)
+        assert set(coords) == set([(2, 0, 2), (3, 0, 2), (2, 1, 2), (3, 1, 2)])
+
+    def test_seed_tile_coords_meta_tiles(self):
+        source = TiledSource(self.grid, None)
+        source.supports_meta_tiles = True
+        self.tile_mgr = TileManager(
+            self.grid, MockCache(), [source], "png", locker=DummyLocker(), meta_size=[2, 2],
+        )
+        tiles = [((3, 1, 2), 5), ((0, 0, 2), 2), ((2, 0, 2), 1)]
+        coords = seed_tile_coords(tiles, self.tile_mgr, [2])
+        assert coords == [(2, 0, 2), (0, 0, 2)]
+
+    def test_walk_in_order(self):
+        task = self.make_task([(1, 0, 1), (0, 1, 2), (0, 0, 0)], [0, 1, 2])
+        seeder = TileListWalker(task, self.seed_pool, handle_uncached=True, work_on_metatiles=False)
+        seeded = []
+        self.seed_pool.process = lambda tiles, progress: seeded.extend(tiles)
+        seeder.walk()
+        assert seeded == [(1, 0, 1), (0, 1, 2), (0, 0, 0)]
+        assert seeder.seed_progress.progress == pytest.approx(1.0)
+
+    def test_walk_continue(self):
+        task = self.make_task([(1, 0, 1), (0, 1, 2), (0, 0, 0)], [0, 1, 2])
+        seeder = TileListWalker(task, self.seed_pool, handle_uncached=True, work_on_metatiles=False,
+                                seed_progress=SeedProgress([(1, 3)]))
+        seeder.walk()
+        assert self.seed_pool.seeded_tiles == {2: set([(0, 1)]), 0: set([(0, 0)])}
+
+    def test_walk_time_budget(self):
+        task = self.make_task([(1, 0, 1), (0, 1, 2), (0, 0, 0)], [0, 1, 2], time_budget=0.01)
+
+        def process(tiles, progress):
+            self.seed_pool.seeded_tiles[tiles[0][2]].add(tiles[0][:2])
+            time.sleep(0.02)
+
+        seeder = TileListWalker(task, self.seed_pool, handle_uncached=True, work_on_metatiles=False)
+        self.seed_pool.process = process
+        seeder.walk()
+        assert self.seed_pool.seeded_tiles == {1: set([(1, 0)])}
+
+
 class TestLevels(object):
 
     def test_level_list(self):
@@ -362,3 +470,155 @@ class TestSeedProgress(object):
                     assert not new.already_processed()
             with new.step_down(2, 4):
                 assert not new.already_processed()
+
+
+class TestSimpleCleanup(object):
+
+    def setup_method(self):
+        self.grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_task(self, layout, levels, coverage=None, meta_size=None):
+        cache = FileCache(self.tmp_dir, 'png', directory_layout=layout)
+        tile_mgr = TileManager(self.grid, cache, [TiledSource(self.grid, None)], 'png',
+                               locker=DummyLocker(), meta_size=meta_size)
+        md = dict(name='', cache_name='', grid_name='')
+        return CleanupTask(md, tile_mgr, levels, remove_timestamp=time.time() + 60, remove_all=False,
+                           coverage=coverage or BBOXCoverage([-180, -90, 180, 90], SRS(4326)),
+                           complete_extent=coverage is None)
+
+    def store(self, task, coords):
+        for coord in coords:
+            task.tile_manager.cache.store_tile(Tile(coord, ImageResult(BytesIO(b'tile'))))
+
+    def cached(self, task, level):
+        return set(t.coord for t in task.tile_manager.cache.iter_tiles(level))
+
+    @pytest.mark.parametrize('layout', ['tc', 'mp', 'tms', 'arcgis', 'quadkey'])
+    def test_levels(self, layout):
+        task = self.make_task(layout, [1, 3])
+        self.store(task, [(0, 0, 1), (1, 0, 2), (3, 1, 3)])
+        simple_cleanup(task, dry_run=False, concurrency=2)
+        assert self.cached(task, 1) == set()
+        assert self.cached(task, 2) == {(1, 0, 2)}
+        assert self.cached(task, 3) == set()
+
+    @pytest.mark.parametrize('layout', ['tc', 'mp', 'tms', 'arcgis', 'quadkey'])
+    def test_coverage(self, layout):
+        coverage = BBOXCoverage([-180, -90, 0, 0], SRS(4326))
+        task = self.make_task(layout, [2, 3], coverage=coverage)
+        self.store(task, [(0, 0, 2), (1, 0, 2), (2, 0, 2), (0, 1, 2), (3, 0, 3), (4, 0, 3), (0, 2, 3)])
+        simple_cleanup(task, dry_run=False, concurrency=2)
+        assert self.cached(task, 2) == {(2, 0, 2), (0, 1, 2)}
+        assert self.cached(task, 3) == {(4, 0, 3), (0, 2, 3)}
+
+    def test_coverage_meta_tiles(self):
+        coverage = BBOXCoverage([-180, -90, -90, 0], SRS(4326))
+        task = self.make_task('tc', [3], coverage=coverage, meta_size=[2, 2])
+        self.store(task, [(0, 0, 3), (1, 1, 3), (2, 0, 3)])
+        simple_cleanup(task, dry_run=False)
+        assert self.cached(task, 3) == {(2, 0, 3)}
+
+    def test_dry_run(self):
+        coverage = BBOXCoverage([-180, -90, 0, 0], SRS(4326))
+        task = self.make_task('tc', [2], coverage=coverage)
+        self.store(task, [(0, 0, 2), (2, 0, 2)])
+        simple_cleanup(task, dry_run=True)
+        assert self.cached(task, 2) == {(0, 0, 2), (2, 0, 2)}
+
+
+class TestTileTransfer(object):
+
+    def setup_method(self):
+        self.grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source = FileCache(os.path.join(self.tmp_dir, 'src'), 'png')
+        self.dest = FileCache(os.path.join(self.tmp_dir, 'dest'), 'png')
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def store(self, coord, data=b'tile'):
+        self.source.store_tile(Tile(coord, ImageResult(BytesIO(data))))
+
+    def test_grid_tile_coords(self):
+        batches = list(grid_tile_coords(self.grid, [0, 1, 2], batch_size=4))
+        assert batches == [
+            [(0, 0, 0)],
+            [(0, 0, 1), (1, 0, 1)],
+            [(0, 1, 2), (1, 1, 2), (2, 1, 2), (3, 1, 2)],
+            [(0, 0, 2), (1, 0, 2), (2, 0, 2), (3, 0, 2)],
+        ]
+
+    def test_grid_tile_coords_coverage(self):
+        coverage = BBOXCoverage([0, 0, 90, 90], SRS(4326))
+        assert list(grid_tile_coords(self.grid, [2], coverage)) == [[(2, 1, 2)]]
+
+    def test_cache_tile_coords(self):
+        self.store((0, 0, 1))
+        self.store((1, 1, 2))
+        self.store((3, 0, 2))
+        batches = [sorted(b) for b in cache_tile_coords(self.source, self.grid, [0, 1, 2])]
+        assert batches == [[(0, 0, 1)], [(1, 1, 2), (3, 0, 2)]]
+        coverage = BBOXCoverage([-180, 0, 0, 90], SRS(4326))
+        assert list(cache_tile_coords(self.source, self.grid, [2], coverage)) == [[(1, 1, 2)]]
+
+    def test_transfer(self):
+        self.store((0, 0, 1), b'foo')
+        self.store((1, 1, 2), b'bar')
+
+        result = TileTransfer(self.source, self.dest, readers=2, writers=2).transfer(
+            grid_tile_coords(self.grid, [0, 1, 2], batch_size=2))
+        assert result.checked == 11
+        assert result.copied == 2
+
+        t = Tile((0, 0, 1))
+        assert self.dest.load_tile(t)
+        assert t.image_result_buffer().read() == b'foo'
+        assert self.dest.is_cached(Tile((1, 1, 2)))
+        assert not self.dest.is_cached(Tile((0, 0, 2)))
+
+    def test_transfer_dry_run(self):
+        self.store((0, 0, 1))
+        result = TileTransfer(self.source, self.dest, dry_run=True).transfer(
+            grid_tile_coords(self.grid, [1]))
+        assert result.copied == 1
+        assert not self.dest.is_cached(Tile((0, 0, 1)))
+
+    def test_transfer_failed_store(self):
+        class FailingCache(object):
+            def __init__(self):
+                self.stored = []
+
+            def store_tiles(self, tiles):
+                return all([self.store_tile(t) for t in tiles])
+
+            def store_tile(self, tile):
+                if tile.coord[2] == 2:
+                    return False
+                self.stored.append(tile.coord)
+                return True
+
+        self.store((0, 0, 1))
+        self.store((1, 1, 2))
+        self.store((3, 0, 2))
+        dest = FailingCache()
+        result = TileTransfer(self.source, dest).transfer(
+            grid_tile_coords(self.grid, [0, 1, 2], batch_size=4))
+        assert result.checked == 11
+        assert result.copied == 1
+        assert result.failed == 2
+        assert (0, 0, 1) in dest.stored
+
+    def test_transfer_error(self):
+        class FailingCache(object):
+            def store_tiles(self, tiles):
+                raise IOError('disk full')
+
+        self.store((0, 0, 1))
+        with pytest.raises(IOError):
+            TileTransfer(self.source, FailingCache()).transfer(
+                grid_tile_coords(self.grid, [0, 1, 2], batch_size=1))
@@ -0,0 +1,75 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from mapproxy.template import Template, template_loader, strip_blank_lines
+
+
+class TestTemplateLoader(object):
+
+    def test_cached(self, tmp_path):
+        template_file = tmp_path / "foo.xml"
+        template_file.write_text("<foo>{{value}}</foo>")
+        get_template = template_loader(__package__)
+
+        template = get_template(str(template_file))
+        assert get_template(str(template_file)) is template
+        assert template.substitute(value=1) == "<foo>1</foo>"
+
+    def test_reload_modified(self, tmp_path):
+        template_file = tmp_path / "foo.xml"
+        template_file.write_text("<foo>{{value}}</foo>")
+        get_template = template_loader(__package__)
+        template = get_template(str(template_file))
+
+        template_file.write_text("<bar>{{value}}</bar>")
+        mtime = os.stat(template_file).st_mtime
+        os.utime(template_file, (mtime + 10, mtime + 10))
+        template2 = get_template(str(template_file))
+        assert template2 is not template
+        assert template2.substitute(value=1) == "<bar>1</bar>"
+
+    def test_packaged_templates(self):
+        get_template = template_loader("mapproxy.service", "templates")
+        template = get_template("tms_root_resource.xml")
+        assert get_template("tms_root_resource.xml") is template
+
+
+class TestTemplate(object):
+
+    def test_generate(self):
+        template = Template("<a>\n{{for i in items}}\n  <b>{{ i }}</b>\n{{endfor}}\n</a>")
+        chunks = list(template.generate(items=[1, 2]))
+        assert len(chunks) > 1
+        assert "".join(chunks) == template.substitute(items=[1, 2])
+        assert "".join(chunks) == "<a>\n  <b>1</b>\n  <b>2</b>\n</a>"
+
+    def test_compiled_expressions(self):
+        template = Template("{{py: x = 2}}{{for i in items}}{{ i * x }}{{endfor}}")
+        assert template.substitute(items=[1, 2, 3]) == "246"
+        # each expression is compiled once
+        assert len(template._code_cache) == 3
+        assert template.substitute(items=[4]) == "8"
+        assert len(template._code_cache) == 3
+
+
+def test_strip_blank_lines():
+    doc = "<a>\n  \n<b/>\n\n</a>"
+    chunks = [doc[i:i + 3] for i in range(0, len(doc), 3)]
+    expected = "\n".join(x for x in doc.split("\n") if x.rstrip())
+    assert "\n".join(strip_blank_lines(chunks)) == expected
+    assert "\n".join(strip_blank_lines([doc])) == expected
+    assert list(strip_blank_lines([])) == []
@@ -0,0 +1,161 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from mapproxy.cache.base import TileLocker
+from mapproxy.cache.file import FileCache
+from mapproxy.cache.tile_manager import TileManager
+from mapproxy.client.http import _trace_url
+from mapproxy.grid.tile_grid import TileGrid
+from mapproxy.image import ImageResult
+from mapproxy.image.opts import ImageOptions
+from mapproxy.layer.map_layer import MapLayer
+from mapproxy.srs import SRS
+from mapproxy.test.image import create_debug_img
+from mapproxy.util import async_, tracing
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class RecordedSpan(object):
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.parent = parent
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class RecordingTracer(object):
+    """
+    Implements the `start_as_current_span` method of the OpenTelemetry
+    Tracer, with the current span in a context variable.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = RecordedSpan(name, attributes or {}, _current_span.get())
+        with self._lock:
+            self.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def named(self, name):
+        return [s for s in self.spans if s.name == name]
+
+
+@pytest.fixture
+def tracer():
+    tracer = RecordingTracer()
+    tracing.set_tracer(tracer)
+    yield tracer
+    tracing.set_tracer(None)
+
+
+class MockSource(MapLayer):
+    def get_map(self, query):
+        return ImageResult(create_debug_img(query.size))
+
+
+class TestSpan(object):
+
+    def test_disabled(self):
+        assert not tracing.enabled()
+        with tracing.span('mapproxy.test', cache='osm') as span:
+            span.set_attribute('mapproxy.tiles', 1)
+        assert span is tracing.NOOP_SPAN
+        func = object()
+        assert tracing.bind_context(func) is func
+
+    def test_attributes(self, tracer):
+        with tracing.span('mapproxy.test', cache='osm', tiles=None):
+            with tracing.span('mapproxy.test.child'):
+                pass
+        parent, child = tracer.spans
+        assert parent.attributes == {'mapproxy.cache': 'osm'}
+        assert child.parent is parent
+
+    def test_bind_context_threads(self, tracer):
+        def work(i):
+            with tracing.span('mapproxy.work'):
+                return i
+
+        with tracing.span('mapproxy.test') as parent:
+            assert list(async_.imap(work, range(4))) == [0, 1, 2, 3]
+            assert async_.Executor(2).map(work, range(4)) == [0, 1, 2, 3]
+            assert async_.Executor(2).submit(work, 5).result() == 5
+
+        spans = tracer.named('mapproxy.work')
+        assert len(spans) == 9
+        assert all(s.parent is parent for s in spans)
+
+    def test_traced_lock(self, tracer):
+        lock = threading.Lock()
+        with tracing.TracedLock(lock, 'mapproxy.lock_wait', cache='osm'):
+            assert lock.locked()
+            assert tracer.spans[0].name == 'mapproxy.lock_wait'
+        assert not lock.locked()
+
+
+class TestTileManagerSpans(object):
+
+    @pytest.fixture
+    def tile_mgr(self, tmpdir):
+        grid = TileGrid(SRS(4326), bbox=[-180, -90, 180, 90])
+        cache = FileCache(cache_dir=tmpdir.join('cache').strpath, file_ext='png')
+        return TileManager(grid, cache, [MockSource()], 'png',
+                           image_opts=ImageOptions(format='image/png'),
+                           locker=TileLocker(tmpdir.join('lock').strpath, 10, 'id'),
+                           identifier='osm_cache')
+
+    def test_load_tile_coords(self, tile_mgr, tracer):
+        tile_mgr.load_tile_coords([(0, 0, 1), (1, 0, 1)])
+
+        load, = tracer.named('mapproxy.load_tile_coords')
+        assert load.attributes == {'mapproxy.cache': 'osm_cache', 'mapproxy.tiles': ['1/0/0', '1/1/0']}
+        cache_load, = tracer.named('mapproxy.cache.load')
+        assert cache_load.parent is load
+        create, = tracer.named('mapproxy.create_tiles')
+        assert create.parent is load
+        lock_waits = tracer.named('mapproxy.lock_wait')
+        assert [s.attributes['mapproxy.tiles'] for s in lock_waits] == [['1/0/0'], ['1/1/0']]
+        assert all(s.parent is create for s in lock_waits)
+        get_maps = tracer.named('mapproxy.get_map')
+        assert [s.attributes['mapproxy.source'] for s in get_maps] == ['MockSource', 'MockSource']
+        assert tracer.named('mapproxy.encode')
+
+    def test_cached(self, tile_mgr, tracer):
+        tile_mgr.load_tile_coords([(0, 0, 1)])
+        del tracer.spans[:]
+        tile_mgr.load_tile_coords([(0, 0, 1)])
+        assert [s.name for s in tracer.spans] == ['mapproxy.load_tile_coords', 'mapproxy.cache.load']
+
+
+def test_trace_url():
+    assert _trace_url('http://example.org/wms') == 'http://example.org/wms'
+    assert _trace_url('https://user:p@ss@example.org/?a=b@c') == 'https://example.org/?a=b@c'
@@ -23,12 +23,18 @@ import tempfile
 import threading
 import time
 
+import pytest
+
 from mapproxy.util.lock import FileLock, SemLock, cleanup_lockdir, LockTimeout
 from mapproxy.util.fs import (
     _force_rename_dir,
     swap_dir,
     cleanup_directory,
     write_atomic,
+    write_atomic_at,
+    supports_write_at,
+    DirectoryCache,
+    DirectoryCleanup,
 )
 from mapproxy.util.py import reraise_exception
 from mapproxy.util.times import timestamp_before
@@ -436,6 +442,86 @@ class TestCleanupDirectory(DirTest):
             assert os.path.exists(filename), filename
 
 
+class TestDirectoryCleanup(DirTest):
+
+    def make_tree(self, old_date):
+        files = []
+        for a in range(3):
+            for b in range(3):
+                dirname = os.path.join(self.tmpdir, "a%d" % a, "b%d" % b, "c")
+                os.makedirs(dirname)
+                for n in range(4):
+                    filename = os.path.join(dirname, "f%d.txt" % n)
+                    open(filename, "wb").close()
+                    if n % 2 == 0:
+                        os.utime(filename, (old_date, old_date))
+                    files.append(filename)
+        return files
+
+    @pytest.mark.parametrize("concurrency", [1, 4])
+    def test_remove_some(self, concurrency):
+        files = self.make_tree(timestamp_before(weeks=1))
+        os.makedirs(os.path.join(self.tmpdir, "empty", "dir"))
+
+        dir_cleanup = DirectoryCleanup(timestamp_before(minutes=1), concurrency=concurrency)
+        dir_cleanup.run(self.tmpdir)
+
+        assert dir_cleanup.removed == len(files) // 2
+        for filename in files[::2]:
+            assert not os.path.exists(filename), filename
+        for filename in files[1::2]:
+            assert os.path.exists(filename), filename
+        assert not os.path.exists(os.path.join(self.tmpdir, "empty"))
+
+    @pytest.mark.parametrize("concurrency", [1, 4])
+    def test_remove_all(self, concurrency):
+        self.make_tree(timestamp_before(weeks=1))
+        DirectoryCleanup(timestamp_before(), remove_all=True, concurrency=concurrency).run(self.tmpdir)
+        assert not os.path.exists(self.tmpdir)
+
+    def test_file_handler(self):
+        files = self.make_tree(timestamp_before(weeks=1))
+        file_handler_calls = []
+        DirectoryCleanup(timestamp_before(minutes=1), concurrency=2,
+                         file_handler=file_handler_calls.append).run(self.tmpdir)
+        assert sorted(file_handler_calls) == sorted(files[::2])
+        for filename in files:
+            assert os.path.exists(filename), filename
+
+    def test_filter(self):
+        files = self.make_tree(timestamp_before(weeks=1))
+        dirs_seen = []
+
+        def dir_filter(parts):
+            dirs_seen.append(parts)
+            return parts[0] != "a1"
+
+        def file_filter(parts):
+            return parts[-1] != "f0.txt"
+
+        DirectoryCleanup(timestamp_before(), remove_all=True, concurrency=2,
+                         dir_filter=dir_filter, file_filter=file_filter).run(self.tmpdir)
+        assert ["a1", "b0"] not in dirs_seen
+        for filename in files:
+            keep = "/a1/" in filename or filename.endswith("f0.txt")
+            assert os.path.exists(filename) == keep, filename
+
+    def test_progress(self):
+        self.make_tree(timestamp_before(weeks=1))
+        progress = []
+        dir_cleanup = DirectoryCleanup(timestamp_before(), remove_all=True)
+        dir_cleanup.subtrees_per_thread = 3
+        dir_cleanup.run(self.tmpdir, progress=progress.append)
+        assert progress == [os.path.join(self.tmpdir, "a1"), os.path.join(self.tmpdir, "a2"), None]
+
+    def test_skip_dir(self):
+        files = self.make_tree(timestamp_before(weeks=1))
+        dir_cleanup = DirectoryCleanup(timestamp_before(), remove_all=True)
+        dir_cleanup.run(self.tmpdir, skip_dir=lambda path: path < os.path.join(self.tmpdir, "a2"))
+        for filename in files:
+            assert os.path.exists(filename) == ("/a2/" not in filename), filename
+
+
 def _write_atomic_data(i_filename):
     (i, filename) = i_filename
     data = str(i) + "\n" + "x" * 10000
@@ -502,3 +588,43 @@ def test_reraise_exception():
         assert ex
     else:
         assert False, "expected exception"
+
+
+class TestDirectoryCache(DirTest):
+
+    def test_ensure(self):
+        cache = DirectoryCache(size=2)
+        filename = os.path.join(self.tmpdir, "a", "b", "c.txt")
+        cache.ensure(filename)
+        assert os.path.isdir(os.path.dirname(filename))
+
+        # known directories are not checked again
+        shutil.rmtree(os.path.join(self.tmpdir, "a"))
+        cache.ensure(filename)
+        assert not os.path.exists(os.path.dirname(filename))
+
+        cache.forget(filename)
+        cache.ensure(filename)
+        assert os.path.isdir(os.path.dirname(filename))
+
+    def test_size(self):
+        cache = DirectoryCache(size=2)
+        for name in ["a", "b", "c"]:
+            cache.ensure(os.path.join(self.tmpdir, name, "x.txt"))
+        assert len(cache._dirs) == 2
+        assert os.path.join(self.tmpdir, "a") not in cache._dirs
+
+
+@pytest.mark.skipif(not supports_write_at, reason="requires dir_fd support")
+class TestWriteAtomicAt(DirTest):
+
+    def test_write(self):
+        dir_fd = os.open(self.tmpdir, os.O_RDONLY)
+        try:
+            write_atomic_at(dir_fd, "foo.txt", b"12345")
+            write_atomic_at(dir_fd, "foo.txt", b"678")
+        finally:
+            os.close(dir_fd)
+        with open(os.path.join(self.tmpdir, "foo.txt"), "rb") as f:
+            assert f.read() == b"678"
+        assert os.listdir(self.tmpdir) == ["foo.txt"]
@@ -18,11 +18,14 @@ try:
 except ImportError:
     import queue as Queue  # type: ignore
 
+import os
 import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from mapproxy.config import base_config
 from mapproxy.config import local_base_config
+from mapproxy.util import tracing
 
 import logging
 
@@ -113,7 +116,7 @@ class ThreadPool(object):
 
         i = 0
         for i, (func, arg) in enumerate(func_args):
-            self.task_queue.put((i, func, arg))
+            self.task_queue.put((i, tracing.bind_context(func), arg))
 
         results = {}
 
@@ -222,6 +225,54 @@ def starcall(args):
     return pool.starcall(args)
 
 
+class Executor(object):
+    """
+    Persistent thread pool for `map` and `submit` calls with up to `size`
+    concurrent threads. The threads are started on first use and after a fork.
+    Calls run within the `base_config` (and tracing span) of the caller.
+    """
+
+    def __init__(self, size, name='mapproxy'):
+        self.size = size
+        self.name = name
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ThreadPoolExecutor(self.size, thread_name_prefix=self.name)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def map(self, func, items):
+        """
+        Call `func` for all `items` and return the results as a list.
+        """
+        items = list(items)
+        if len(items) <= 1 or self.size <= 1:
+            return [func(item) for item in items]
+
+        conf = base_config()
+
+        def call(item):
+            with local_base_config(conf):
+                return func(item)
+        return list(self._executor().map(tracing.bind_context(call), items))
+
+    def submit(self, func, *args):
+        """
+        Call `func` with `args` in the background and return a Future.
+        """
+        conf = base_config()
+
+        def call():
+            with local_base_config(conf):
+                return func(*args)
+        return self._executor().submit(tracing.bind_context(call))
+
+
 def run_non_blocking(func, args, kw={}):
     return func(*args, **kw)
 
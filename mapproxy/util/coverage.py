@@ -19,9 +19,10 @@ import threading
 from abc import ABC, abstractmethod
 from typing import Optional, Union
 
+import numpy as np
+import shapely
 from shapely.geometry.base import BaseGeometry
 from shapely.geometry import Point, MultiPolygon
-from shapely.prepared import prep
 from shapely.ops import unary_union
 
 from mapproxy.util.bbox import bbox_intersects, bbox_contains
@@ -68,6 +69,30 @@ class Coverage(ABC):
     def contains(self, bbox: BBOX, srs: _SRS) -> bool:
         pass
 
+    def intersects_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        """
+        Return a boolean array with the result of `intersects` for each bbox
+        of `bboxes` (sequence or (N, 4) array).
+        """
+        return np.array([self.intersects(tuple(bbox), srs) for bbox in bboxes], dtype=bool)
+
+    def contains_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        """
+        Return a boolean array with the result of `contains` for each bbox
+        of `bboxes` (sequence or (N, 4) array).
+        """
+        return np.array([self.contains(tuple(bbox), srs) for bbox in bboxes], dtype=bool)
+
+
+def _bboxes_in_srs(bboxes, src_srs: _SRS, dst_srs: _SRS) -> np.ndarray:
+    """
+    Return `bboxes` as (N, 4) array, transformed from `src_srs` to `dst_srs`.
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    if src_srs != dst_srs:
+        bboxes = np.array([src_srs.transform_bbox_to(dst_srs, bbox) for bbox in bboxes], dtype=float).reshape(-1, 4)
+    return bboxes
+
 
 class MultiCoverage(Coverage):
     """Aggregates multiple coverages"""
@@ -90,6 +115,14 @@ class MultiCoverage(Coverage):
     def contains(self, bbox: BBOX, srs: _SRS):
         return any(c.contains(bbox, srs) for c in self.coverages)
 
+    def intersects_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        return np.logical_or.reduce([c.intersects_bboxes(bboxes, srs) for c in self.coverages])
+
+    def contains_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        return np.logical_or.reduce([c.contains_bboxes(bboxes, srs) for c in self.coverages])
+
     def transform_to(self, srs: _SRS) -> 'MultiCoverage':
         return MultiCoverage([c.transform_to(srs) for c in self.coverages])
 
@@ -161,6 +194,20 @@ class BBOXCoverage(Coverage):
         bbox = self._bbox_in_coverage_srs(bbox, srs)
         return bbox_contains(self.bbox, bbox)
 
+    def intersects_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        b = _bboxes_in_srs(bboxes, srs, self.srs)
+        x0, y0, x1, y1 = self.bbox
+        return (x0 < b[:, 2]) & (x1 > b[:, 0]) & (y0 < b[:, 3]) & (y1 > b[:, 1])
+
+    def contains_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        b = _bboxes_in_srs(bboxes, srs, self.srs)
+        x0, y0, x1, y1 = self.bbox
+        # allow tiny rounding errors, see bbox_contains
+        x_delta = abs(x1 - x0) / 10e12
+        y_delta = abs(y1 - y0) / 10e12
+        return ((x0 <= b[:, 0] + x_delta) & (x1 >= b[:, 2] - x_delta) &
+                (y0 <= b[:, 1] + y_delta) & (y1 >= b[:, 3] - y_delta))
+
     def transform_to(self, srs: _SRS) -> 'BBOXCoverage':
         if srs == self.srs:
             return self
@@ -195,9 +242,9 @@ class GeomCoverage(Coverage):
         self.bbox = geom.bounds
         self.srs = srs
         self.clip = clip
-        self._prep_lock = threading.Lock()
-        self._prepared_geom = None
-        self._prepared_counter = 0
+        # prepared geometries build their index lazily and are not
+        # thread-safe, each thread uses its own prepared copy
+        self._prepared = threading.local()
         self._prepared_max = 10000
 
     @property
@@ -208,15 +255,21 @@ class GeomCoverage(Coverage):
     def geom(self):
         return self._geom
 
-    @property
-    def prepared_geom(self):
+    def _prepared_geom(self, calls=1):
+        """
+        Return the prepared geometry for the current thread.
+        """
+        local = self._prepared
+        geom = getattr(local, 'geom', None)
         # GEOS internal data structure for prepared geometries grows over time,
         # recreate to limit memory consumption
-        if not self._prepared_geom or self._prepared_counter > self._prepared_max:
-            self._prepared_geom = prep(self.geom)
-            self._prepared_counter = 0
-        self._prepared_counter += 1
-        return self._prepared_geom
+        if geom is None or local.counter > self._prepared_max:
+            geom = shapely.from_wkb(shapely.to_wkb(self.geom))
+            shapely.prepare(geom)
+            local.geom = geom
+            local.counter = 0
+        local.counter += calls
+        return geom
 
     def _geom_in_coverage_srs(self, geom, srs):
         if isinstance(geom, BaseGeometry):
@@ -241,8 +294,7 @@ class GeomCoverage(Coverage):
 
     def intersects(self, bbox: BBOX, srs: _SRS) -> bool:
         bbox = self._geom_in_coverage_srs(bbox, srs)
-        with self._prep_lock:
-            return self.prepared_geom.intersects(bbox)
+        return bool(shapely.intersects(self._prepared_geom(), bbox))
 
     def intersection(self, bbox: BBOX, srs: _SRS) -> 'GeomCoverage':
         bbox = self._geom_in_coverage_srs(bbox, srs)
@@ -250,8 +302,17 @@ class GeomCoverage(Coverage):
 
     def contains(self, bbox: BBOX, srs: _SRS) -> bool:
         bbox = self._geom_in_coverage_srs(bbox, srs)
-        with self._prep_lock:
-            return self.prepared_geom.contains(bbox)
+        return bool(shapely.contains(self._prepared_geom(), bbox))
+
+    def intersects_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        b = _bboxes_in_srs(bboxes, srs, self.srs)
+        boxes = shapely.box(b[:, 0], b[:, 1], b[:, 2], b[:, 3])
+        return shapely.intersects(self._prepared_geom(len(b)), boxes)
+
+    def contains_bboxes(self, bboxes, srs: _SRS) -> np.ndarray:
+        b = _bboxes_in_srs(bboxes, srs, self.srs)
+        boxes = shapely.box(b[:, 0], b[:, 1], b[:, 2], b[:, 3])
+        return shapely.contains(self._prepared_geom(len(b)), boxes)
 
     def __eq__(self, other):
         if not isinstance(other, GeomCoverage):
@@ -119,6 +119,8 @@ class Template(object):
                     name += ':%s' % lineno
         self.name = name
         self._parsed = parse(content, name=name, line_offset=line_offset)
+        # compiled code objects of all expressions and code blocks
+        self._code_cache = {}
         if namespace is None:
             namespace = {}
         self.namespace = namespace
@@ -144,6 +146,13 @@ class Template(object):
             hex(id(self))[2:], self.name)
 
     def substitute(self, *args, **kw):
+        return ''.join(self.generate(*args, **kw))
+
+    def generate(self, *args, **kw):
+        """
+        Like `substitute`, but returns the result as an iterator of text
+        chunks.
+        """
         if args:
             if kw:
                 raise TypeError(
@@ -161,14 +170,14 @@ class Template(object):
         ns['__template_name__'] = self.name
         if self.namespace:
             ns.update(self.namespace)
-        result, defs, inherit = self._interpret(ns)
+        parts, defs, inherit = self._interpret_parts(ns)
         if not inherit:
             inherit = self.default_inherit
         if inherit:
-            result = self._interpret_inherit(result, defs, inherit, ns)
-        return result
+            return iter([self._interpret_inherit(''.join(parts), defs, inherit, ns)])
+        return iter(parts)
 
-    def _interpret(self, ns):
+    def _interpret_parts(self, ns):
         __traceback_hide__ = True  # noqa
         parts = []
         defs = {}
@@ -177,7 +186,7 @@ class Template(object):
             inherit = defs.pop('__inherit__')
         else:
             inherit = None
-        return ''.join(parts), defs, inherit
+        return parts, defs, inherit
 
     def _interpret_inherit(self, body, defs, inherit_template, ns):
         __traceback_hide__ = True  # noqa
@@ -284,7 +293,7 @@ class Template(object):
         __traceback_hide__ = True  # noqa
         try:
             try:
-                value = eval(code, self.default_namespace, ns)
+                value = eval(self._compile(code, 'eval'), self.default_namespace, ns)
             except SyntaxError:
                 raise SyntaxError(
                     'invalid syntax in expression: %s' % code)
@@ -299,10 +308,18 @@ class Template(object):
             e.args = (self._add_line_info(arg0, pos),)
             raise reraise((exc_info[0], e, exc_info[2]))
 
+    def _compile(self, code, mode):
+        try:
+            return self._code_cache[code, mode]
+        except KeyError:
+            source = code.lstrip(' \t') if mode == 'eval' else code  # like eval() with str
+            compiled = self._code_cache[code, mode] = compile(source, '<string>', mode)
+            return compiled
+
     def _exec(self, code, ns, pos):
         __traceback_hide__ = True  # noqa
         try:
-            exec(code, self.default_namespace, ns)
+            exec(self._compile(code, 'exec'), self.default_namespace, ns)
         except Exception:
             exc_info = sys.exc_info()
             e = exc_info[1]
@@ -23,6 +23,9 @@ import sys
 import random
 import errno
 import shutil
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
 
 
 def swap_dir(src_dir, dst_dir, keep_old=False, backup_ext='.tmp'):
@@ -102,6 +105,222 @@ def cleanup_directory(directory, before_timestamp, remove_all=False, remove_empt
         remove_dir_if_empty(directory)
 
 
+# remove files with unlinkat relative to an open directory where possible
+_use_dir_fd = (
+    os.unlink in os.supports_dir_fd and os.rmdir in os.supports_dir_fd
+    and os.open in os.supports_dir_fd and os.scandir in os.supports_fd
+)
+
+
+class DirectoryCleanup(object):
+    """
+    Remove all files older than `before_timestamp` (or all files if
+    `remove_all` is set) below a directory.
+
+    The directory tree is split into subtrees that are cleaned by
+    `concurrency` threads. Directories are read with ``os.scandir``. Files
+    are removed relative to the file descriptor of their directory on
+    platforms that support it.
+
+    :param file_handler: called with the filename of each file that should
+        be removed instead of removing it
+    :param dir_filter: called with the path elements (relative to the
+        cleanup directory) of each subdirectory, return ``False`` to skip it
+    :param file_filter: called with the path elements of each file,
+        return ``False`` to keep the file
+    """
+
+    # split the tree until there are that many subtrees per thread
+    subtrees_per_thread = 16
+    max_split_depth = 3
+    file_chunk_size = 1000
+
+    def __init__(self, before_timestamp, remove_all=False, remove_empty_dirs=True,
+                 file_handler=None, concurrency=1, dir_filter=None, file_filter=None):
+        self.before_timestamp = before_timestamp
+        self.remove_all = remove_all
+        self.remove_empty_dirs = remove_empty_dirs
+        self.file_handler = file_handler
+        self.concurrency = max(1, concurrency)
+        self.dir_filter = dir_filter
+        self.file_filter = file_filter
+        self.removed = 0
+        self._lock = threading.Lock()
+
+    def run(self, directory, skip_dir=None, progress=None):
+        """
+        Cleanup `directory`.
+
+        :param skip_dir: called with the path of each subtree, return
+            ``True`` to skip the subtree (e.g. if it was already processed)
+        :param progress: called with the path of the next subtree each time
+            all subtrees before were processed, and with ``None`` at the end
+        """
+        if not os.path.isdir(directory):
+            return
+
+        files, subtrees, split_dirs = self._split(directory, skip_dir)
+        jobs = [(self._clean_files, chunk) for chunk in _chunks(files, self.file_chunk_size)]
+        first_subtree = len(jobs)
+        jobs.extend((self._clean_tree, subtree) for subtree in subtrees)
+
+        if self.concurrency > 1 and len(jobs) > 1:
+            pool = ThreadPoolExecutor(self.concurrency)
+            try:
+                results = [pool.submit(func, arg) for func, arg in jobs]
+                for i, f in enumerate(results):
+                    f.result()
+                    self._report(i, first_subtree, subtrees, progress)
+            finally:
+                # stop queued jobs on errors and interrupts
+                pool.shutdown(cancel_futures=True)
+        else:
+            for i, (func, arg) in enumerate(jobs):
+                func(arg)
+                self._report(i, first_subtree, subtrees, progress)
+
+        if self.remove_empty_dirs:
+            # deepest directories first
+            for path in reversed(split_dirs):
+                remove_dir_if_empty(path)
+            remove_dir_if_empty(directory)
+
+    def _report(self, job_idx, first_subtree, subtrees, progress):
+        if progress is None or job_idx < first_subtree:
+            return
+        next_idx = job_idx - first_subtree + 1
+        progress(subtrees[next_idx][0] if next_idx < len(subtrees) else None)
+
+    def _split(self, directory, skip_dir):
+        """
+        Split `directory` into subtrees. Returns the files found on the way,
+        the sorted subtrees as ``(path, parts)`` and the split directories.
+        """
+        files = []
+        split_dirs = []
+        subtrees = [(directory, [])]
+        depth = 0
+        while (len(subtrees) < self.concurrency * self.subtrees_per_thread
+               and depth < self.max_split_depth):
+            depth += 1
+            next_subtrees = []
+            for path, parts in subtrees:
+                split_dirs.append(path)
+                try:
+                    with os.scandir(path) as it:
+                        entries = sorted(it, key=lambda e: e.name)
+                except FileNotFoundError:
+                    continue
+                for entry in entries:
+                    entry_parts = parts + [entry.name]
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.dir_filter and not self.dir_filter(entry_parts):
+                            continue
+                        if skip_dir and skip_dir(entry.path):
+                            continue
+                        next_subtrees.append((entry.path, entry_parts))
+                    else:
+                        files.append((entry, entry_parts))
+            subtrees = next_subtrees
+            if not subtrees:
+                break
+        # the root is cleaned in run
+        return files, subtrees, split_dirs[1:]
+
+    def _clean_files(self, files):
+        for entry, parts in files:
+            self._handle_file(entry, parts, None, os.path.dirname(entry.path))
+
+    def _clean_tree(self, subtree):
+        path, parts = subtree
+        if _use_dir_fd:
+            try:
+                dir_fd = os.open(path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+            except FileNotFoundError:
+                return
+            try:
+                empty = self._clean_dir(dir_fd, path, parts)
+            finally:
+                os.close(dir_fd)
+        else:
+            empty = self._clean_dir(None, path, parts)
+        if empty and self.remove_empty_dirs:
+            remove_dir_if_empty(path)
+
+    def _clean_dir(self, dir_fd, path, parts):
+        """
+        Cleanup the directory `path`, opened as `dir_fd` (or ``None``).
+        Returns ``True`` if the directory is empty afterwards.
+        """
+        with os.scandir(path if dir_fd is None else dir_fd) as it:
+            entries = list(it)
+
+        remaining = len(entries)
+        for entry in entries:
+            entry_parts = parts + [entry.name]
+            if entry.is_dir(follow_symlinks=False):
+                if self.dir_filter and not self.dir_filter(entry_parts):
+                    continue
+                if self._clean_subdir(dir_fd, os.path.join(path, entry.name), entry.name, entry_parts):
+                    remaining -= 1
+            elif self._handle_file(entry, entry_parts, dir_fd, path):
+                remaining -= 1
+        return remaining == 0
+
+    def _clean_subdir(self, dir_fd, path, name, parts):
+        if dir_fd is None:
+            empty = self._clean_dir(None, path, parts)
+            if empty and self.remove_empty_dirs:
+                return remove_dir_if_empty(path)
+            return False
+
+        try:
+            sub_fd = os.open(name, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0), dir_fd=dir_fd)
+        except FileNotFoundError:
+            return True
+        try:
+            empty = self._clean_dir(sub_fd, path, parts)
+        finally:
+            os.close(sub_fd)
+        if empty and self.remove_empty_dirs:
+            try:
+                os.rmdir(name, dir_fd=dir_fd)
+            except OSError as ex:
+                if ex.errno not in (errno.ENOENT, errno.ENOTEMPTY):
+                    raise
+                return ex.errno == errno.ENOENT
+            return True
+        return False
+
+    def _handle_file(self, entry, parts, dir_fd, path):
+        """
+        Remove the file `entry` if it matches. Returns ``True`` if the
+        file was removed.
+        """
+        if self.file_filter and not self.file_filter(parts):
+            return False
+        try:
+            if not self.remove_all and entry.stat(follow_symlinks=False).st_mtime >= self.before_timestamp:
+                return False
+            if self.file_handler is not None:
+                self.file_handler(os.path.join(path, entry.name))
+                return False
+            if dir_fd is None:
+                os.unlink(os.path.join(path, entry.name))
+            else:
+                os.unlink(entry.name, dir_fd=dir_fd)
+        except FileNotFoundError:
+            return True
+        with self._lock:
+            self.removed += 1
+        return True
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
 def remove_dir_if_empty(directory):
     try:
         os.rmdir(directory)
@@ -135,6 +354,66 @@ def ensure_directory(file_name, directory_permissions=None):
                 raise e
 
 
+class DirectoryCache(object):
+    """
+    Bounded set of directories that are known to exist.
+
+    `ensure` only calls `ensure_directory` for directories that are not
+    known yet. Directories that are removed afterwards (e.g. by a cleanup)
+    need to be removed with `forget` before they can be created again.
+    """
+
+    def __init__(self, size=4096, directory_permissions=None):
+        self.size = size
+        self.directory_permissions = directory_permissions
+        self._dirs = {}
+        self._lock = threading.Lock()
+
+    def ensure(self, file_name):
+        """
+        Create the directory of `file_name` if it does not exist.
+        """
+        dir_name = os.path.dirname(file_name)
+        if dir_name in self._dirs:
+            return
+        ensure_directory(file_name, self.directory_permissions)
+        with self._lock:
+            self._dirs[dir_name] = True
+            if len(self._dirs) > self.size:
+                # remove oldest entry
+                del self._dirs[next(iter(self._dirs))]
+
+    def forget(self, file_name):
+        with self._lock:
+            self._dirs.pop(os.path.dirname(file_name), None)
+
+
+# write_atomic_at is supported
+supports_write_at = (
+    not sys.platform.startswith('win')
+    and os.open in os.supports_dir_fd and os.rename in os.supports_dir_fd
+)
+
+
+def write_atomic_at(dir_fd, name, data):
+    """
+    Like `write_atomic`, but `name` is relative to the open directory
+    `dir_fd`. Only available if `supports_write_at` is true.
+    """
+    tmp_name = name + '.tmp-' + str(random.randint(0, 99999999))
+    try:
+        fd = os.open(tmp_name, os.O_EXCL | os.O_CREAT | os.O_WRONLY, 0o664, dir_fd=dir_fd)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.rename(tmp_name, name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    except OSError as ex:
+        try:
+            os.unlink(tmp_name, dir_fd=dir_fd)
+        except OSError:
+            pass
+        raise ex
+
+
 def write_atomic(filename, data):
     """
     write_atomic writes `data` to a random file in filename's directory
@@ -0,0 +1,354 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Counters and histograms in the Prometheus text exposition format.
+
+Metrics are only recorded after `Registry.enable` was called (i.e. if the
+metrics service is configured). Within the requests of a MapProxy app,
+metrics are only recorded if the app has the metrics service
+(`metrics_enabled` of the app's base_config), since multiple apps can run
+in one process (MultiMapProxy). With a `multiprocess_dir`, each process
+writes its metrics to a file in that directory and the metrics of all
+processes are combined when they are rendered.
+"""
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from mapproxy.config.config import _config as _base_config
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _CounterValue(object):
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def state(self):
+        return self.value
+
+
+class _HistogramValue(object):
+    __slots__ = ('upper_bounds', 'buckets', 'sum', '_lock')
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.buckets = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.buckets[idx] += 1
+            self.sum += value
+
+    def state(self):
+        with self._lock:
+            return [list(self.buckets), self.sum]
+
+
+class Metric(object):
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues):
+        """
+        Return the value for the `labelvalues`, created on first access.
+        """
+        try:
+            return self._values[labelvalues]
+        except KeyError:
+            pass
+        assert len(labelvalues) == len(self.labelnames)
+        with self._lock:
+            value = self._values.get(labelvalues)
+            if value is None:
+                value = self._values[labelvalues] = self._new_value()
+            return value
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def merge(a, b):
+        """
+        Return the combined state of two processes.
+        """
+        raise NotImplementedError
+
+    def samples(self, labels, state):
+        """
+        Return the name, labels and value of all samples for `state`.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    def state(self) -> dict:
+        return {json.dumps(labels): value.state() for labels, value in list(self._values.items())}
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, *labelvalues, amount=1):
+        self.labels(*labelvalues).inc(amount)
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def samples(self, labels, state):
+        yield self.name, labels, state
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_value(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value, *labelvalues):
+        self.labels(*labelvalues).observe(value)
+
+    @staticmethod
+    def merge(a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1]]
+
+    def samples(self, labels, state):
+        buckets, total = state
+        count = 0
+        for upper_bound, bucket in zip(self.upper_bounds + (math.inf, ), buckets):
+            count += bucket
+            le = '+Inf' if upper_bound == math.inf else repr(float(upper_bound))
+            yield self.name + '_bucket', labels + [('le', le)], count
+        yield self.name + '_sum', labels, total
+        yield self.name + '_count', labels, count
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join('%s="%s"' % (k, _escape(str(v))) for k, v in labels) + '}'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return '%s %s' % (name, value)
+
+
+class Registry(object):
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self._enabled = False
+        self.multiprocess_dir: Optional[str] = None
+        self.flush_interval = 5.0
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    @property
+    def enabled(self) -> bool:
+        """
+        True if metrics are recorded for the current app (or outside of
+        the requests of an app, if any app enabled the registry).
+        """
+        if not self._enabled:
+            return False
+        conf = _base_config.top
+        return conf is None or conf.get('metrics_enabled', True)
+
+    def enable(self, multiprocess_dir=None, flush_interval=None):
+        self._enabled = True
+        self.multiprocess_dir = multiprocess_dir
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+
+    def disable(self):
+        self._enabled = False
+        self.multiprocess_dir = None
+
+    def state(self) -> dict:
+        return {metric.name: metric.state() for metric in self.metrics}
+
+    def _state_filename(self):
+        return os.path.join(self.multiprocess_dir, 'metrics-%d.json' % os.getpid())
+
+    def flush(self, force=False):
+        """
+        Write the metrics of this process to the `multiprocess_dir`, at most
+        every `flush_interval` seconds (unless `force` is True).
+        """
+        if not self.enabled or not self.multiprocess_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return  # another thread is flushing
+        try:
+            self._last_flush = now
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.multiprocess_dir, prefix='.metrics-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.state(), f)
+            os.replace(tmp_name, self._state_filename())
+        except OSError as ex:
+            log.warning('unable to write metrics to %s: %s', self.multiprocess_dir, ex)
+        finally:
+            self._flush_lock.release()
+
+    def _combined_state(self) -> dict:
+        if not self.multiprocess_dir:
+            return self.state()
+        self.flush(force=True)
+        metrics = {metric.name: metric for metric in self.metrics}
+        combined: dict = {}
+        for filename in sorted(glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json'))):
+            try:
+                with open(filename) as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as ex:
+                log.warning('unable to read metrics from %s: %s', filename, ex)
+                continue
+            for name, values in state.items():
+                if name not in metrics:
+                    continue
+                combined_values = combined.setdefault(name, {})
+                for labels, value in values.items():
+                    if labels in combined_values:
+                        value = metrics[name].merge(combined_values[labels], value)
+                    combined_values[labels] = value
+        return combined
+
+    def render(self) -> str:
+        """
+        Return all metrics in the Prometheus text format.
+        """
+        state = self._combined_state()
+        lines = []
+        for metric in self.metrics:
+            lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+            lines.append('# TYPE %s %s' % (metric.name, metric.type))
+            for labels, value in sorted(state.get(metric.name, {}).items()):
+                labels = list(zip(metric.labelnames, json.loads(labels)))
+                for sample in metric.samples(labels, value):
+                    lines.append(_format_sample(*sample))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+@contextmanager
+def timer(histogram: Histogram, *labelvalues):
+    """
+    Observe the duration of the with-block in `histogram`, if metrics
+    are enabled.
+    """
+    if not registry.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, *labelvalues)
+
+
+class TimedLock(object):
+    """
+    Wraps a lock and observes the time to acquire it in `histogram_value`
+    (from `Histogram.labels`).
+    """
+
+    def __init__(self, lock, histogram_value):
+        self.lock = lock
+        self.histogram_value = histogram_value
+
+    def __enter__(self):
+        start = time.perf_counter()
+        result = self.lock.__enter__()
+        self.histogram_value.observe(time.perf_counter() - start)
+        return result
+
+    def __exit__(self, *args):
+        return self.lock.__exit__(*args)
+
+
+REQUEST_DURATION = registry.histogram(
+    'mapproxy_request_duration_seconds', 'Duration of requests by service.', ['service'])
+RESPONSE_BYTES = registry.counter(
+    'mapproxy_response_bytes_total', 'Bytes served by service.', ['service'])
+TILE_LAYER_DURATION = registry.histogram(
+    'mapproxy_tile_layer_duration_seconds', 'Duration of tile requests by layer.', ['layer'])
+CACHE_TILES = registry.counter(
+    'mapproxy_cache_tiles_total', 'Requested tiles by cache and result (hit, miss or stale).', ['cache', 'result'])
+TILE_CREATION_DURATION = registry.histogram(
+    'mapproxy_tile_creation_duration_seconds', 'Duration of tile creation by cache.', ['cache'])
+LOCK_WAIT = registry.histogram(
+    'mapproxy_tile_lock_wait_seconds', 'Time spent waiting for tile locks by cache.', ['cache'])
+UPSTREAM_DURATION = registry.histogram(
+    'mapproxy_upstream_duration_seconds', 'Duration of upstream requests by host.', ['host'])
+IMAGE_ENCODE_DURATION = registry.histogram(
+    'mapproxy_image_encode_duration_seconds', 'Duration of image encoding by format.', ['format'])
+IMAGE_DECODE_DURATION = registry.histogram(
+    'mapproxy_image_decode_duration_seconds', 'Duration of image decoding.')
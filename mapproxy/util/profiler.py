@@ -0,0 +1,317 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sampling profiler for request threads.
+
+The profiler samples the stacks of all threads that handle a request at a
+fixed interval and writes the samples for each service and layer as
+collapsed stacks (for flamegraph.pl and similar tools) and as speedscope
+files. The profiler is only active after `configure` was called (i.e. if
+``globals.profiler`` is configured) and sampling was started. Within the
+requests of a MapProxy app, only apps with ``globals.profiler`` are
+sampled (`profiler_enabled` of the app's base_config), since multiple apps
+can run in one process (MultiMapProxy).
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+from mapproxy.config.config import _config as _base_config
+
+log = logging.getLogger(__name__)
+
+NOOP = nullcontext()
+
+TOGGLE_SIGNAL = getattr(signal, 'SIGUSR2', None)
+
+# samples of further layers (e.g. WMS requests with other LAYERS
+# combinations) are combined as OTHER_LAYERS of their service
+MAX_KEYS = 100
+OTHER_LAYERS = '_other'
+
+# keep file names below NAME_MAX, even for long layer names
+MAX_NAME_LENGTH = 100
+
+
+def _frame_name(code, module):
+    return '%s:%s' % (module, code.co_name)
+
+
+class SamplingProfiler(object):
+    """
+    Samples the stacks of registered request threads every `interval`
+    seconds and writes them to `output_dir` every `write_interval` seconds
+    and when sampling stops. Samples are kept for up to `max_keys`
+    service/layer combinations.
+
+    `all_apps` enables sampling for the requests of all apps, not only
+    for apps with ``globals.profiler`` (see `request`).
+    """
+
+    def __init__(self, output_dir: str, interval=0.01, write_interval=30.0, max_keys=MAX_KEYS):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.write_interval = write_interval
+        self.max_keys = max_keys
+        self.all_apps = False
+        self.running = False
+        self._threads: dict[int, list] = {}
+        self._samples: dict[tuple, Counter] = {}
+        self._frame_names: dict = {}
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+
+    @contextmanager
+    def request(self, service: str):
+        """
+        Sample the current thread for `service` within the with-block.
+        """
+        ident = threading.get_ident()
+        self._threads[ident] = [service, None]
+        try:
+            yield
+        finally:
+            self._threads.pop(ident, None)
+
+    def set_layer(self, layer: str):
+        label = self._threads.get(threading.get_ident())
+        if label is not None:
+            label[1] = layer
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._run, name='mapproxy-profiler', daemon=True)
+                self._sampler.start()
+        log.info('started profiler, writing samples to %s', self.output_dir)
+
+    def stop(self, wait=True):
+        """
+        Stop sampling. The samples are written by the sampler thread,
+        `wait` for it to finish.
+        """
+        with self._lock:
+            self.running = False
+            sampler = self._sampler
+        if wait and sampler is not None and sampler is not threading.current_thread():
+            sampler.join()
+
+    def toggle(self):
+        if self.running:
+            log.info('stopping profiler')
+            self.stop(wait=False)
+        else:
+            self.start()
+
+    def _run(self):
+        last_write = time.monotonic()
+        try:
+            while self.running:
+                time.sleep(self.interval)
+                self.sample()
+                if time.monotonic() - last_write >= self.write_interval:
+                    self.write()
+                    last_write = time.monotonic()
+        finally:
+            self.write()
+
+    def _stack(self, frame) -> str:
+        names = []
+        frame_names = self._frame_names
+        while frame is not None:
+            code = frame.f_code
+            name = frame_names.get(code)
+            if name is None:
+                name = frame_names[code] = _frame_name(code, frame.f_globals.get('__name__', '?'))
+            names.append(name)
+            frame = frame.f_back
+        names.reverse()
+        return ';'.join(names)
+
+    def sample(self):
+        frames = sys._current_frames()
+        for ident, label in list(self._threads.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            key = tuple(label)
+            samples = self._samples.get(key)
+            if samples is None:
+                if len(self._samples) >= self.max_keys:
+                    key = (label[0], OTHER_LAYERS)
+                    samples = self._samples.get(key)
+                if samples is None:
+                    samples = self._samples[key] = Counter()
+            samples[self._stack(frame)] += 1
+
+    def _filename(self, key, ext):
+        name = '-'.join(re.sub(r'[^\w.]+', '_', part) for part in key if part)
+        if len(name) > MAX_NAME_LENGTH:
+            name = name[:MAX_NAME_LENGTH] + '_' + hashlib.sha1(name.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.output_dir, '%s.%d.%s' % (name or 'unknown', os.getpid(), ext))
+
+    def write(self):
+        """
+        Write collapsed stacks and speedscope files for all samples.
+        """
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+        except OSError as ex:
+            log.warning('unable to write profile to %s: %s', self.output_dir, ex)
+            return
+        for key, samples in list(self._samples.items()):
+            samples = dict(samples)
+            try:
+                _write_file(self._filename(key, 'collapsed'), collapsed_stacks(samples))
+                _write_file(self._filename(key, 'speedscope.json'),
+                            json.dumps(speedscope_profile(samples, ' '.join(p for p in key if p), self.interval)))
+            except OSError as ex:
+                log.warning('unable to write profile to %s: %s', self.output_dir, ex)
+
+
+def _write_file(filename, content):
+    fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(filename), prefix='.profile-')
+    with os.fdopen(fd, 'w') as f:
+        f.write(content)
+    os.replace(tmp_name, filename)
+
+
+def collapsed_stacks(samples: dict) -> str:
+    """
+    Return `samples` in the collapsed stack format.
+
+    >>> print(collapsed_stacks({'a;b': 2, 'a': 1}), end='')
+    a 1
+    a;b 2
+    """
+    return ''.join('%s %d\n' % (stack, count) for stack, count in sorted(samples.items()))
+
+
+def speedscope_profile(samples: dict, name: str, interval: float) -> dict:
+    """
+    Return `samples` as sampled profile in the speedscope file format.
+
+    >>> profile = speedscope_profile({'a;b': 2, 'a': 1}, 'tms', 0.01)
+    >>> profile['shared']['frames']
+    [{'name': 'a'}, {'name': 'b'}]
+    >>> profile['profiles'][0]['samples'], profile['profiles'][0]['weights']
+    ([[0], [0, 1]], [0.01, 0.02])
+    """
+    frames: list[dict] = []
+    frame_index: dict[str, int] = {}
+    stacks = []
+    weights = []
+    for stack, count in sorted(samples.items()):
+        indices = []
+        for frame in stack.split(';'):
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({'name': frame})
+            indices.append(frame_index[frame])
+        stacks.append(indices)
+        weights.append(round(count * interval, 6))
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'mapproxy',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': round(sum(weights), 6),
+            'samples': stacks,
+            'weights': weights,
+        }],
+    }
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+_signal_handler_installed = False
+
+
+def configure(output_dir: str, interval=None, start=False, toggle_signal=False,
+              all_apps=False) -> SamplingProfiler:
+    """
+    Create the profiler (or update the existing profiler after a
+    configuration reload). Installs the `TOGGLE_SIGNAL` handler if
+    `toggle_signal` is True. See `SamplingProfiler` for `all_apps`.
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(output_dir)
+        atexit.register(_profiler.stop)
+    _profiler.output_dir = output_dir
+    if interval:
+        _profiler.interval = interval
+    if all_apps:
+        _profiler.all_apps = True
+    if toggle_signal:
+        _install_signal_handler()
+    if start:
+        _profiler.start()
+    return _profiler
+
+
+def _install_signal_handler():
+    global _signal_handler_installed
+    if TOGGLE_SIGNAL is None or _signal_handler_installed:
+        return
+    try:
+        signal.signal(TOGGLE_SIGNAL, lambda signum, frame: _profiler.toggle())
+        _signal_handler_installed = True
+    except ValueError:
+        # signal handlers can only be installed in the main thread
+        log.warning('unable to install signal handler to toggle profiler')
+
+
+def request(service: str):
+    """
+    Return a context manager that samples the current thread for `service`,
+    if the profiler is running and the current app is profiled.
+    """
+    if _profiler is None or not _profiler.running:
+        return NOOP
+    if not _profiler.all_apps:
+        conf = _base_config.top
+        if conf is not None and not conf.get('profiler_enabled', True):
+            return NOOP
+    return _profiler.request(service)
+
+
+def set_layer(layer: str):
+    """
+    Set the `layer` for the samples of the current request.
+    """
+    if _profiler is not None and _profiler.running:
+        _profiler.set_layer(layer)
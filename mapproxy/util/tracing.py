@@ -0,0 +1,141 @@
+# This file is part of the MapProxy project.
+# Copyright (C) 2025 Omniscale <http://omniscale.de>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Tracing spans for requests.
+
+Spans are only recorded after `set_tracer` was called with a tracer that
+implements ``start_as_current_span(name, attributes=...)`` like the
+OpenTelemetry `Tracer` (e.g. if ``globals.tracing.enabled`` is set).
+Without a tracer, `span` returns a shared no-op span.
+"""
+import contextvars
+import itertools
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+MAX_TILE_COORDS = 16
+
+_tracer = None
+
+
+class _NoopSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def has_opentelemetry_support():
+    return otel_trace is not None
+
+
+def opentelemetry_tracer():
+    """
+    Return the OpenTelemetry tracer for MapProxy. Spans are exported by
+    the tracer provider of the OpenTelemetry SDK (if configured).
+    """
+    import mapproxy.version
+    return otel_trace.get_tracer('mapproxy', mapproxy.version.version)
+
+
+def set_tracer(tracer):
+    """
+    Record spans with `tracer`. None disables tracing.
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **attributes):
+    """
+    Return a context manager for a new span with `attributes` (prefixed
+    with ``mapproxy.``, None values are skipped).
+
+    >>> with span('mapproxy.test', cache='osm_cache') as s:
+    ...     s.set_attribute('mapproxy.tiles', 1)
+    """
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.start_as_current_span(name, attributes={
+        'mapproxy.' + k: v for k, v in attributes.items() if v is not None
+    })
+
+
+def tile_coords(coords):
+    """
+    Return the first `MAX_TILE_COORDS` tile coords as ``z/x/y`` strings
+    for span attributes, or None if tracing is disabled.
+
+    >>> set_tracer(object())
+    >>> tile_coords([(1, 2, 3), None, (4, 5, 6)])
+    ['3/1/2', '6/4/5']
+    >>> set_tracer(None)
+    >>> tile_coords([(1, 2, 3)]) is None
+    True
+    """
+    if _tracer is None:
+        return None
+    coords = (c for c in coords if c is not None)
+    return ['%d/%d/%d' % (c[2], c[0], c[1]) for c in itertools.islice(coords, MAX_TILE_COORDS)]
+
+
+def bind_context(func):
+    """
+    Return `func` bound to the current context, to continue the current
+    span if `func` is called in another thread. Each call runs in its own
+    copy of the context, so the result can be called concurrently.
+    """
+    if _tracer is None:
+        return func
+    ctx = contextvars.copy_context()
+
+    def call(*args, **kw):
+        return ctx.copy().run(func, *args, **kw)
+    return call
+
+
+class TracedLock(object):
+    """
+    Wraps a lock and records the time to acquire it as span.
+    """
+
+    def __init__(self, lock, name, **attributes):
+        self.lock = lock
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        with span(self.name, **self.attributes):
+            return self.lock.__enter__()
+
+    def __exit__(self, *args):
+        return self.lock.__exit__(*args)
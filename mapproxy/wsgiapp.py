@@ -31,6 +31,7 @@ from mapproxy.config import local_base_config
 from mapproxy.config.loader import load_configuration
 from mapproxy.config.configuration.base import ConfigurationError
 from mapproxy.util.escape import escape_html
+from mapproxy.util import metrics, profiler, tracing
 
 log = logging.getLogger('mapproxy.config')
 log_wsgiapp = logging.getLogger('mapproxy.wsgiapp')
@@ -52,6 +53,11 @@ def make_wsgi_app(services_conf=None, debug=False, ignore_config_warnings=True,
     try:
         conf = load_configuration(mapproxy_conf=services_conf, ignore_warnings=ignore_config_warnings)
         services = conf.configured_services()
+        # the profiler is shared by all apps of this process, only sample
+        # the requests of apps with globals.profiler
+        conf.base_config.profiler_enabled = bool(conf.globals.get_value('profiler'))
+        if conf.base_config.profiler_enabled:
+            load_profiler(conf.globals)
     except ConfigurationError as e:
         log.fatal(e)
         raise
@@ -66,6 +72,18 @@ def make_wsgi_app(services_conf=None, debug=False, ignore_config_warnings=True,
     return app
 
 
+def load_profiler(globals_conf):
+    """
+    Configure the sampling profiler from ``globals.profiler``.
+    """
+    output_dir = globals_conf.get_path('profiler.dir', {})
+    if output_dir is None:
+        raise ConfigurationError('globals.profiler requires dir')
+    profiler.configure(output_dir, interval=globals_conf.get_value('profiler.interval'),
+                       start=bool(globals_conf.get_value('profiler.enabled')),
+                       toggle_signal=bool(globals_conf.get_value('profiler.toggle_signal')))
+
+
 class ReloaderApp(object):
     def __init__(self, timestamp_file, make_app_func):
         self.timestamp_file = timestamp_file
@@ -143,13 +161,16 @@ class MapProxyApp(object):
                 headers.append(('Access-control-allow-origin', self.cors_origin))
                 return orig_start_response(status, headers, exc_info)
 
-        with local_base_config(self.base_config):
+        with local_base_config(self.base_config), tracing.span('mapproxy.request', path=req.path) as span:
             match = self.handler_path_re.match(req.path)
             if match:
                 handler_name = match.group(1)
                 if handler_name in self.handlers:
+                    span.set_attribute('mapproxy.handler', handler_name)
+                    start = time.perf_counter()
                     try:
-                        resp = self.handlers[handler_name].handle(req)
+                        with profiler.request(handler_name):
+                            resp = self.handlers[handler_name].handle(req)
                     except Exception:
                         if self.base_config.debug_mode:
                             raise
@@ -159,6 +180,8 @@ class MapProxyApp(object):
                             import traceback
                             traceback.print_exc(file=environ['wsgi.errors'])
                             resp = Response('internal error', status=500)
+                    if metrics.registry.enabled:
+                        return self._observe_response(handler_name, start, resp(environ, start_response))
             if resp is None:
                 if req.path in ('', '/'):
                     resp = self.welcome_response(escape_html(req.script_url))
@@ -166,6 +189,20 @@ class MapProxyApp(object):
                     resp = Response('not found', mimetype='text/plain', status=404)
             return resp(environ, start_response)
 
+    def _observe_response(self, handler_name, start, resp_iter):
+        # count bytes as they are sent, duration includes streamed responses
+        size = 0
+        try:
+            for chunk in resp_iter:
+                size += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(resp_iter, 'close'):
+                resp_iter.close()
+            metrics.REQUEST_DURATION.observe(time.perf_counter() - start, handler_name)
+            metrics.RESPONSE_BYTES.inc(handler_name, amount=size)
+            metrics.registry.flush()
+
     def welcome_response(self, script_url):
         import mapproxy.version
         html = "<html><body><h1>Welcome to MapProxy %s</h1>" % mapproxy.version.version